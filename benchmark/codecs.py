@@ -0,0 +1,142 @@
+"""Message size and encode/decode time for each codec.
+
+Usage:
+    python -m benchmark.codecs [corpus.jsonl ...] [-n ITERATIONS] [-o DICTIONARY]
+
+The corpus is json lines of published results, as written by the file
+sink (CERP_SINK=file:<path>). Without a corpus a synthetic one is built
+from the bank ids of all parsers with random walk rates. The zstd
+dictionary is trained on the first half of the corpus and every codec
+is measured on the second half; -o saves the dictionary for
+CERP_ZSTD_DICT.
+"""
+import argparse
+import base64
+import json
+import logging
+import random
+import time
+import warnings
+import zlib
+
+from src.fetcher import Fetcher
+from src.parser.countries import PARSERS
+from src.parser.countries import parser_class
+from src.publish import codec
+
+CURRENCIES = ["USD", "EUR", "RUB", "KZT", "UZS", "KGS", "CNY", "GBP", "CHF", "JPY", "TRY", "AED"]
+
+
+# synthetic() returns results of every country for given number of runs (5 minutes apart)
+def synthetic(runs):
+    random.seed(1)
+    logger = logging.getLogger("benchmark")
+    banks = dict((country, parser_class(country)(logger, Fetcher()).sources()[:-1]) for country in PARSERS)
+    rates = {}
+
+    corpus = []
+    for run in range(runs):
+        for country in sorted(banks):
+            bank_rates = {}
+            for bank_id in banks[country]:
+                bank_rates[bank_id] = {}
+                for side in ("usd", "eur", "rub"):
+                    key = (bank_id, side)
+                    rates[key] = rates.get(key, random.randint(10000, 5000000))
+                    # rates change a few times a day
+                    if random.random() < 0.02:
+                        rates[key] += random.randint(-500, 500)
+                    bank_rates[bank_id][side + "_buy"] = rates[key]
+                    bank_rates[bank_id][side + "_sale"] = rates[key] + 2000
+
+            corpus.append({
+                "country": country,
+                "date_key": "2026-10-18",
+                "timestamp": 1760745600 + run * 300,
+                "bank_rates": bank_rates,
+                "all_rates": dict((code, {"code": code, "nominal": 1, "value": rates.get((code, "nb"), 100000 + i)})
+                                  for i, code in enumerate(CURRENCIES)),
+                "skipped": [],
+            })
+    return corpus
+
+
+def load(paths):
+    corpus = []
+    for path in paths:
+        with open(path) as f:
+            corpus.extend(json.loads(line) for line in f if line.strip())
+    return corpus
+
+
+# measure() returns average size (bytes), encode and decode time (microseconds) of messages
+def measure(encode, decode, messages, iterations):
+    encoded = [encode(message) for message in messages]
+    size = sum(len(text) for text in encoded) / float(len(encoded))
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for message in messages:
+            encode(message)
+    encode_time = (time.perf_counter() - start) * 1e6 / (iterations * len(messages))
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in encoded:
+            decode(text)
+    decode_time = (time.perf_counter() - start) * 1e6 / (iterations * len(messages))
+
+    return size, encode_time, decode_time
+
+
+def run(corpus, iterations, dictionary_out=None):
+    training, messages = corpus[:len(corpus) // 2], corpus[len(corpus) // 2:]
+
+    codecs = [
+        ("legacy (zlib, no header)", None, codec.decode),
+        ("none", codec.NoneCodec(), codec.decode),
+        ("zlib:1", codec.ZlibCodec(1), codec.decode),
+        ("zlib:6", codec.ZlibCodec(6), codec.decode),
+        ("zlib:9", codec.ZlibCodec(9), codec.decode),
+        ("wire", codec.WireCodec(), codec.decode),
+    ]
+
+    if codec.HAS_ZSTD:
+        dictionary = codec.train_dictionary(training)
+        if dictionary_out:
+            with open(dictionary_out, 'wb') as f:
+                f.write(dictionary)
+
+        for level in (3, 19):
+            codecs.append(("zstd:" + str(level), codec.ZstdCodec(level), codec.decode))
+            with_dictionary = codec.ZstdCodec(level, dictionary)
+            dictionaries = {with_dictionary.header(): dictionary}
+            codecs.append(("zstd:" + str(level) + " + dictionary", with_dictionary,
+                           lambda text, d=dictionaries: codec.decode(text, d)))
+    else:
+        print("zstandard is not installed, zstd codecs are skipped")
+
+    print("%d messages (dictionary trained on %d)" % (len(messages), len(training)))
+    print("%-28s%12s%14s%14s" % ("codec", "bytes", "encode", "decode"))
+    for name, c, decode in codecs:
+        encode = legacy if c is None else c.encode
+        size, encode_time, decode_time = measure(encode, decode, messages, iterations)
+        print("%-28s%12.0f%11.1f us%11.1f us" % (name, size, encode_time, decode_time))
+
+
+# legacy() is app.compress_json (kept here to not import app with its clients)
+def legacy(message):
+    return base64.b64encode(zlib.compress(json.dumps(message).encode('utf-8'))).decode('ascii')
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    args = argparse.ArgumentParser(description="Message size and encode/decode time for each codec")
+    args.add_argument("corpus", nargs="*", help="json lines of published results")
+    args.add_argument("-n", "--iterations", type=int, default=20)
+    args.add_argument("-r", "--runs", type=int, default=100, help="runs of synthetic corpus")
+    args.add_argument("-o", "--dictionary", help="save trained zstd dictionary")
+    options = args.parse_args()
+
+    run(load(options.corpus) if options.corpus else synthetic(options.runs), options.iterations, options.dictionary)
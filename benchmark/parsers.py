@@ -0,0 +1,95 @@
+"""Parse time per bank for each parsing engine.
+
+Usage:
+    python -m benchmark.parsers [country ...] [-n ITERATIONS]
+
+Every bank page is downloaded once, then each bank function is timed
+against the same page with every engine of src.parser.internal.document.
+"""
+import argparse
+import logging
+import time
+
+from src.fetcher import Fetcher
+from src.fetcher.cache import freeze
+from src.parser import ParserKG
+from src.parser import ParserKZ
+from src.parser import ParserTJ
+from src.parser import ParserUZ
+from src.parser.internal import document
+
+PARSERS = {
+    "kg": ParserKG,
+    "kz": ParserKZ,
+    "tj": ParserTJ,
+    "uz": ParserUZ,
+}
+
+
+class RecordingFetcher(Fetcher):
+    """ Downloads every page once, then serves it (or its error) from memory """
+
+    def __init__(self):
+        Fetcher.__init__(self)
+        self.pages = {}
+
+    def fetch_versioned(self, link, method="GET", data=None, timeout=10, mobile=False, limit=None, until=None):
+        key = (method, link, freeze(data), mobile, limit, until)
+        if key not in self.pages:
+            try:
+                self.pages[key] = Fetcher.fetch_versioned(self, link, method, data, timeout, mobile, limit=limit,
+                                                          until=until)
+            except Exception as e:
+                self.pages[key] = e
+
+        page = self.pages[key]
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+
+# time_bank() returns average milliseconds of one call or None if bank can't be parsed
+def time_bank(func, iterations):
+    try:
+        func()
+    except Exception:
+        return None
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def run(countries, iterations):
+    logger = logging.getLogger("benchmark")
+    print("%-24s" % "bank" + "".join("%14s" % engine for engine in document.ENGINES))
+
+    for country in countries:
+        parser = PARSERS[country](logger, RecordingFetcher())
+        functions = parser.bank_rate_functions()
+
+        # download all pages before timing
+        for bank_id in functions:
+            time_bank(functions[bank_id], 0)
+
+        for bank_id in sorted(functions):
+            row = "%-24s" % bank_id
+            for engine in document.ENGINES:
+                parser.engine = engine
+                elapsed = time_bank(functions[bank_id], iterations)
+                row += "%14s" % ("n/a" if elapsed is None else "%.2f ms" % elapsed)
+            print(row)
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description="Parse time per bank for each parsing engine")
+    args.add_argument("countries", nargs="*", help="countries (default all): " + ", ".join(sorted(PARSERS)))
+    args.add_argument("-n", "--iterations", type=int, default=20)
+    options = args.parse_args()
+    countries = options.countries or sorted(PARSERS)
+    for country in countries:
+        if country not in PARSERS:
+            args.error("unknown country '" + country + "'")
+
+    run(countries, options.iterations)
@@ -0,0 +1,71 @@
+"""Cost of converting rate strings to fixed-point integers.
+
+Usage:
+    python -m benchmark.rates [-n ITERATIONS] [-c COUNT]
+
+Compares the Decimal conversion (str -> Decimal * 10000 -> round) with
+rate_helper.from_string integer arithmetic and the from_strings batch on
+the same strings, results must be identical.
+"""
+import argparse
+import random
+import time
+
+from src.parser.internal import rate_helper as rate
+
+
+# legacy() is from_string before integer arithmetic
+def legacy(val):
+    if isinstance(val, str):
+        val = val.replace(" ", "").strip()
+        if ',' in val and '.' in val:
+            val = val.replace(",", "")
+        else:
+            val = val.replace(",", ".")
+
+    if val is None or val == "" or val == "–":
+        return 0
+
+    return rate.from_decimal(val)
+
+
+def values(count):
+    rnd = random.Random(1)
+    shapes = ["%d,%02d", "%d.%04d", "%d %03d.%02d", "%d,%03d.%02d"]
+    result = []
+    for i in range(count):
+        shape = shapes[i % len(shapes)]
+        result.append(shape % tuple(rnd.randint(1, 999) for _ in range(shape.count("%"))))
+    result.append("–")
+    return result
+
+
+def measure(func, strings, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(strings)
+    return (time.perf_counter() - start) * 1e6 / iterations / len(strings)
+
+
+def run(iterations, count):
+    strings = values(count)
+    if [legacy(val) for val in strings] != rate.from_strings(strings):
+        raise AssertionError("fixed-point conversion differs from Decimal")
+
+    old = measure(lambda s: [legacy(val) for val in s], strings, iterations)
+    new = measure(lambda s: [rate.from_string(val) for val in s], strings, iterations)
+    batch = measure(rate.from_strings, strings, iterations)
+    print("values:           %d" % len(strings))
+    print("decimal:          %.3f us/value" % old)
+    print("fixed-point:      %.3f us/value" % new)
+    print("from_strings:     %.3f us/value" % batch)
+    print("speedup:          %.2fx" % (old / new))
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description="Cost of converting rate strings to fixed-point integers")
+    args.add_argument("-n", "--iterations", type=int, default=200)
+    args.add_argument("-c", "--count", type=int, default=1000)
+    options = args.parse_args()
+
+    run(options.iterations, options.count)
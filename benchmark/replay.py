@@ -0,0 +1,117 @@
+"""Offline parser benchmark and regression check on the fixture corpus.
+
+Usage:
+    python -m benchmark.replay [country ...] [-n ITERATIONS]
+    python -m benchmark.replay [country ...] --record
+    python -m benchmark.replay [country ...] --update-golden
+
+--record downloads every bank page into fixtures/<country>/ and saves
+the outputs of all parse functions as golden outputs. Without it every
+parse function and parse_all of each country run on the recorded pages
+only: wall & CPU time per call and peak memory allocated by a call are
+reported, and the run fails if an output differs from the golden one.
+"""
+import argparse
+import logging
+import sys
+import time
+import tracemalloc
+import warnings
+
+from src.fetcher.replay import RECORD
+from src.parser import base
+from src.parser import replay
+from src.parser.countries import PARSERS
+
+
+# measure() returns average wall & cpu milliseconds and peak KiB allocated by one call (None if call fails)
+def measure(func, iterations):
+    try:
+        func()
+    except Exception:
+        return None
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for _ in range(iterations):
+        func()
+    wall = (time.perf_counter() - wall) * 1000 / iterations
+    cpu = (time.process_time() - cpu) * 1000 / iterations
+
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1] / 1024.0
+    finally:
+        tracemalloc.stop()
+
+    return wall, cpu, peak
+
+
+def row(name, measured):
+    if measured is None:
+        return "%-24s%12s%12s%12s" % (name, "error", "", "")
+    return "%-24s%9.2f ms%9.2f ms%8.0f KiB" % ((name,) + measured)
+
+
+def record(countries, logger):
+    for country in countries:
+        parser = replay.replay_parser(country, logger, mode=RECORD)
+        results = replay.outputs(parser)
+        replay.save_golden(country, results)
+        failed = sorted(bank_id for bank_id in results if "error" in (results[bank_id] or {}))
+        print("%s: recorded %d sources into %s (failed: %s)" % (
+            country, len(results), replay.corpus(country), ", ".join(failed) or "none"))
+
+
+def run(countries, iterations, logger, update_golden=False):
+    changed = {}
+    print("%-24s%12s%12s%12s" % ("source", "wall", "cpu", "peak"))
+
+    for country in countries:
+        golden = replay.load_golden(country)
+        if golden is None and not update_golden:
+            print("%s: no fixture corpus, record it with --record" % country)
+            continue
+
+        parser = replay.replay_parser(country, logger, workers=1)
+        functions = parser.bank_rate_functions()
+        functions[base.ALL_RATES] = parser.all_rates_function()
+        for bank_id in sorted(functions):
+            print(row(bank_id, measure(functions[bank_id], iterations)))
+        print(row(country + " parse_all", measure(parser.parse_all, max(iterations // 5, 1))))
+
+        results = replay.outputs(parser)
+        if update_golden:
+            replay.save_golden(country, results)
+        else:
+            changed[country] = replay.changed(golden, results)
+
+    for country in sorted(changed):
+        if changed[country]:
+            print("%s: output changed: %s" % (country, ", ".join(changed[country])))
+    return not any(changed.values())
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    args = argparse.ArgumentParser(description="Offline parser benchmark and regression check on the fixture corpus")
+    args.add_argument("countries", nargs="*", help="countries (default all): " + ", ".join(sorted(PARSERS)))
+    args.add_argument("-n", "--iterations", type=int, default=20)
+    args.add_argument("--record", action="store_true", help="download pages & save golden outputs")
+    args.add_argument("--update-golden", action="store_true", help="accept current outputs as golden")
+    options = args.parse_args()
+    countries = options.countries or sorted(PARSERS)
+    for country in countries:
+        if country not in PARSERS:
+            args.error("unknown country '" + country + "'")
+
+    # parse errors are part of the report, not of the log
+    log = logging.getLogger("benchmark")
+    log.disabled = True
+
+    if options.record:
+        record(countries, log)
+    elif not run(countries, options.iterations, log, options.update_golden):
+        sys.exit(1)
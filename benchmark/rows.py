@@ -0,0 +1,91 @@
+"""Per-page cost of classifying currency rows.
+
+Usage:
+    python -m benchmark.rows [-n ITERATIONS] [-r ROWS]
+
+Compares the old row loop (one uncompiled re.search per currency, tag.text
+and findChildren('td') recomputed for every check) with
+src.parser.internal.rows on the same parsed table.
+"""
+import argparse
+import re
+import time
+import warnings
+
+from bs4 import BeautifulSoup
+
+from src.parser.internal import rate_helper as rate
+from src.parser.internal import rows
+
+CODES = ["AED", "CNY", "GBP", "CHF", "JPY", "TRY", "USD", "EUR", "RUB", "KZT"]
+
+
+def page(count):
+    body = "".join(
+        "<tr><td><img src='/flags/%s.png'/> %s</td><td>%d,%02d</td><td>%d,%02d</td></tr>" %
+        (code, code, i + 1, i % 100, i + 2, i % 100)
+        for i, code in ((i, CODES[i % len(CODES)]) for i in range(count))
+    )
+    return "<table id='rates'>" + body + "</table>"
+
+
+# legacy() is the row loop used by parsers before rows.RowClassifier
+def legacy(tags):
+    rates = {}
+    for tag in tags:
+        if re.search(r'USD', tag.text):
+            rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
+            rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
+            continue
+
+        if re.search(r'EUR', tag.text):
+            rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
+            rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
+            continue
+
+        if re.search(r'RUB', tag.text):
+            rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
+            rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
+            continue
+
+        if re.search(r'KZT', tag.text):
+            rates['kzt_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
+            rates['kzt_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
+            continue
+
+    return rates
+
+
+def classified(tags):
+    return rows.classifier(rows.USD_EUR_RUB_KZT).rates(tags, 1, 2)
+
+
+def measure(func, tags, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(tags)
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def run(iterations, count):
+    tags = BeautifulSoup(page(count), "html.parser").find_all('tr')
+    if legacy(tags) != classified(tags):
+        raise AssertionError("row classifier result differs from legacy loop")
+
+    old = measure(legacy, tags, iterations)
+    new = measure(classified, tags, iterations)
+    print("rows per page:    %d" % count)
+    print("legacy loop:      %.3f ms/page" % old)
+    print("row classifier:   %.3f ms/page" % new)
+    print("speedup:          %.2fx" % (old / new))
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description="Per-page cost of classifying currency rows")
+    args.add_argument("-n", "--iterations", type=int, default=200)
+    args.add_argument("-r", "--rows", type=int, default=40)
+    options = args.parse_args()
+
+    # legacy loop uses deprecated findChildren
+    warnings.simplefilter("ignore", DeprecationWarning)
+    run(options.iterations, options.rows)
@@ -0,0 +1,84 @@
+"""Cold-start import cost of the lambda function per country.
+
+Usage:
+    python -m benchmark.startup [country ...] [-n RUNS] [-t TOP]
+
+Every run is a fresh interpreter started with `python -X importtime` that
+imports app and builds the parsers (what a cold lambda does before the
+first collection). Reports median wall time, total import time, number of
+imported modules and the top-level packages with the biggest import time.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from src.parser.countries import PARSERS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Code measured in the fresh interpreter
+COLD_START = "import app; app.get_parsers()"
+
+
+# imports() parses `-X importtime` report: module -> self time (us)
+def imports(report):
+    modules = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, _, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(self_time)
+    return modules
+
+
+def cold_start(country):
+    env = dict(os.environ, CERP_COUNTRY=country, CERP_LOG_LEVEL="ERROR", CERP_METRICS="")
+    env.setdefault("CERP_SINK", "sns")
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", COLD_START], cwd=ROOT, env=env,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(country + " cold start failed:\n" + process.stderr[-2000:])
+    return elapsed, imports(process.stderr)
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def run(countries, runs, top):
+    print("%-8s %10s %12s %8s" % ("country", "wall ms", "imports ms", "modules"))
+    for country in countries:
+        measured = [cold_start(country) for _ in range(runs)]
+        modules = measured[-1][1]
+        print("%-8s %10.1f %12.1f %8d" % (
+            country,
+            median([elapsed for elapsed, _ in measured]) * 1000,
+            median([sum(m.values()) for _, m in measured]) / 1000.0,
+            len(modules),
+        ))
+
+        packages = {}
+        for name, self_time in modules.items():
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0) + self_time
+        slowest = sorted(packages.items(), key=lambda item: -item[1])[:top]
+        print("         " + ", ".join("%s %.1f" % (package, us / 1000.0) for package, us in slowest))
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser(description="Cold-start import cost of the lambda function per country")
+    args.add_argument("countries", nargs="*", help="countries (default all): " + ", ".join(sorted(PARSERS)))
+    args.add_argument("-n", "--runs", type=int, default=5)
+    args.add_argument("-t", "--top", type=int, default=8)
+    options = args.parse_args()
+
+    countries = options.countries or sorted(PARSERS) + ["all"]
+    for country in countries:
+        if country not in PARSERS and country != "all":
+            args.error("unknown country '" + country + "'")
+    run(countries, options.runs, options.top)
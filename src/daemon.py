@@ -0,0 +1,130 @@
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+
+from src.parser import base
+
+# Default seconds between two collections of a commercial bank
+BANK_INTERVAL = 300
+
+# Default seconds between two collections of a national bank (its rates change once a day)
+NATIONAL_INTERVAL = 3600
+
+
+class Daemon:
+    """Long running collector, every source is collected on its own interval until stopped.
+
+    Parsers (with their sessions & caches) live as long as the daemon. Due sources of all countries
+    are collected together, the result of a country is merged into its last known state and the
+    state is handed to publish(result), the same way the lambda handler publishes a full run.
+
+    Attributes:
+        parsers -- parsers of collected countries
+        publish -- function receiving merged result of a country after each collection
+        bank_interval, national_interval -- seconds between collections of a source
+        intervals -- per source overrides: bank_id (or base.ALL_RATES) -> seconds
+        budget -- max seconds of one collection
+        profiler -- profiles every collection (see src.profiling.Profiler), disabled if None
+    """
+
+    def __init__(self, parsers, publish, logger, bank_interval=BANK_INTERVAL, national_interval=NATIONAL_INTERVAL,
+                 intervals=None, budget=60, profiler=None):
+        self.parsers = parsers
+        self.publish = publish
+        self.log = logger
+        self.bank_interval = bank_interval
+        self.national_interval = national_interval
+        self.intervals = intervals or {}
+        self.budget = budget
+        self.profiler = profiler
+
+        # (country, source) -> unix time of the next collection
+        self.next_run = {}
+        # country -> last known result
+        self.state = {}
+        self.stopped = threading.Event()
+
+    def interval(self, parser, source):
+        if source in self.intervals:
+            return self.intervals[source]
+        if source == base.ALL_RATES or source == parser.national_bank:
+            return self.national_interval
+        return self.bank_interval
+
+    def due(self, parser, now):
+        return [source for source in parser.sources() if self.next_run.get((parser.country, source), 0) <= now]
+
+    def run(self):
+        """ Collects due sources until stop() is called, the running collection is finished first """
+        self.log.info({"msg": "daemon started", "countries": [p.country for p in self.parsers]})
+        while not self.stopped.is_set():
+            self.tick()
+            self.stopped.wait(self.sleep_time())
+        self.log.info({"msg": "daemon stopped"})
+
+    def stop(self, *args):
+        self.stopped.set()
+
+    def handle_signals(self):
+        """ SIGTERM & SIGINT stop the daemon gracefully (call from main thread) """
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def sleep_time(self, now=None):
+        now = time() if now is None else now
+        upcoming = [self.next_run.get((p.country, source), 0) for p in self.parsers for source in p.sources()]
+        return max(min(upcoming) - now, 0) if upcoming else self.bank_interval
+
+    def tick(self, now=None):
+        """ Collects and publishes due sources of every country, returns number of collected sources """
+        now = time() if now is None else now
+        jobs = [(p, self.due(p, now)) for p in self.parsers]
+        jobs = [(p, sources) for p, sources in jobs if sources]
+        if not jobs:
+            return 0
+
+        if self.profiler is not None:
+            with self.profiler.run("tick"):
+                self.collect(jobs, now)
+        else:
+            self.collect(jobs, now)
+
+        return sum(len(sources) for _, sources in jobs)
+
+    def collect(self, jobs, now):
+        deadline = None if self.budget is None else time() + self.budget
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            futures = [(p, sources, pool.submit(p.parse_sources, sources, deadline=deadline)) for p, sources in jobs]
+            for p, sources, future in futures:
+                for source in sources:
+                    self.next_run[(p.country, source)] = now + self.interval(p, source)
+                try:
+                    self.update(p, sources, future.result())
+                except Exception as e:
+                    p.error("collection failed: " + str(e))
+
+    def update(self, parser, sources, result):
+        """ Merges result of collected sources into the state of the country and publishes it """
+        state = self.state.get(parser.country)
+
+        # rates of yesterday are not published with a new date, other sources are collected again
+        if state is not None and state["date_key"] != result["date_key"]:
+            state = None
+            for source in parser.sources():
+                if source not in sources:
+                    self.next_run[(parser.country, source)] = 0
+
+        if state is None:
+            state = dict(result, bank_rates={}, all_rates=None)
+
+        state = dict(state, bank_rates=dict(state["bank_rates"]))
+        state["bank_rates"].update(result["bank_rates"])
+        if result["all_rates"] is not None:
+            state["all_rates"] = result["all_rates"]
+        state["date_key"] = result["date_key"]
+        state["timestamp"] = result["timestamp"]
+        state["skipped"] = result["skipped"]
+
+        self.state[parser.country] = state
+        self.publish(state)
@@ -1 +1,2 @@
 from .fetcher import Fetcher
+from .fetcher import FetchError
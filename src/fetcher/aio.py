@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+from src.fetcher.fetcher import CHUNK_SIZE
+from src.fetcher.fetcher import POOL_MAXSIZE
+from src.fetcher.fetcher import BodyReader
+from src.fetcher.fetcher import DeadlineExceeded
+from src.fetcher.fetcher import FetchError
+from src.fetcher.fetcher import decode
+from src.fetcher.fetcher import headers_mobile
+from src.fetcher.fetcher import streamed
+from src.fetcher.fetcher import validator_key
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+    CLIENT_ERRORS = (aiohttp.ClientError,)
+except ImportError:
+    HAS_AIOHTTP = False
+    CLIENT_ERRORS = ()
+
+# Max connections open at the same time (all hosts)
+LIMIT = 100
+
+
+class AsyncFetcher:
+    """Fetcher for asyncio, requests of all parsers share one aiohttp session & connector.
+
+    fetch / fetch_versioned have the contract of Fetcher: GET returns text, POST returns bytes, failures
+    raise FetchError. Instead of Fetcher.time_limit the deadline (unix time) is given to every fetch.
+    The session is opened on the first fetch inside the running loop, close() must be awaited.
+    """
+
+    def __init__(self, session=None, http_cache=None, limit=LIMIT, limit_per_host=POOL_MAXSIZE):
+        if session is None and not HAS_AIOHTTP:
+            raise FetchError(None, "async fetcher requires aiohttp package")
+
+        self.session = session
+        # conditional GET cache (see cache.HttpCache), disabled if None
+        self.http_cache = http_cache
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.requests = 0
+        self.bytes = 0
+        self.not_modified = 0
+
+    def open(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host, ssl=False)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def fetch(self, link, method="GET", data=None, timeout=10, mobile=False, limit=None, until=None,
+                    deadline=None):
+        return (await self.fetch_versioned(link, method, data, timeout, mobile, limit, until, deadline))[0]
+
+    async def fetch_versioned(self, link, method="GET", data=None, timeout=10, mobile=False, limit=None, until=None,
+                              deadline=None):
+        """ Fetch document, returns (body, version) where version is the http validator or None """
+        if deadline is not None:
+            left = deadline - time.time()
+            if left <= 0:
+                raise DeadlineExceeded(link, "deadline exceeded")
+            timeout = min(timeout, left)
+
+        self.requests += 1
+        try:
+            if method == "GET":
+                return await asyncio.wait_for(self.get(link, data, mobile, limit, until), timeout)
+            elif method == "POST":
+                return await asyncio.wait_for(self.post(link, data, limit, until), timeout), None
+            else:
+                raise FetchError(link, "Unknown method '" + str(method) + "'")
+        except asyncio.TimeoutError:
+            raise FetchError(link, "timeout after " + str(timeout) + " sec")
+        except CLIENT_ERRORS as e:
+            raise FetchError(link, str(e))
+
+    async def post(self, link, data, limit=None, until=None):
+        async with self.open().post(link, data=data, ssl=False) as response:
+            content = await self.read(response, limit, until)
+        self.bytes += len(content)
+        return content
+
+    async def get(self, link, data, mobile, limit=None, until=None):
+        headers = dict(headers_mobile) if mobile else {}
+
+        key = entry = None
+        if self.http_cache is not None:
+            key = validator_key(link, data, mobile, limit, until)
+            entry = self.http_cache.load(key)
+            if entry is not None:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+        async with self.open().get(link, params=data, headers=headers, ssl=False) as response:
+            content = await self.read(response, limit, until)
+            status = response.status
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            text = decode(content, response.charset) if status != 304 else ""
+        self.bytes += len(content)
+
+        if status == 304 and entry is not None:
+            self.not_modified += 1
+            return entry["body"], entry["version"]
+
+        if key is None or status >= 400 or not (etag or last_modified):
+            return text, None
+
+        version = (etag or "") + "|" + (last_modified or "")
+        self.http_cache.store(key, {
+            "etag": etag,
+            "last_modified": last_modified,
+            "version": version,
+            "body": text,
+        })
+        return text, version
+
+    @staticmethod
+    async def read(response, limit=None, until=None):
+        """ Body bytes of response, read in chunks up to limit / until end markers (see Fetcher.fetch_versioned) """
+        if not streamed(limit, until):
+            return await response.read()
+
+        reader = BodyReader(limit, until)
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            if reader.feed(chunk):
+                break
+        return bytes(reader.body)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "not_modified": self.not_modified,
+        }
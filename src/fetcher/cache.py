@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Default max parsed documents kept in process memory (least recently used are evicted)
+PARSED_LIMIT = 256
+
+# Default max responses kept by in-process cache (least recently used are evicted)
+ENTRIES_LIMIT = 1024
+
+
+class DocumentCache:
+    """ Run scoped cache of fetched & parsed documents.
+
+    Concurrent loads of the same key are done only once, other callers wait for the first one.
+    A failed load is kept for later callers unless the error is transient (of the loading caller only,
+    e.g. its deadline), then current waiters get the error and the next caller loads again.
+    """
+
+    def __init__(self, transient=()):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.transient = transient
+
+    def get(self, key, load):
+        with self.lock:
+            entry = self.entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self.entries[key] = Future()
+
+        if owner:
+            try:
+                entry.set_result(load())
+            except BaseException as e:
+                # load was interrupted (e.g. fetcher.Suspended) or failed for this caller only, the next caller
+                # loads again
+                if isinstance(e, Exception) and not isinstance(e, self.transient):
+                    entry.set_exception(e)
+                else:
+                    with self.lock:
+                        del self.entries[key]
+                    entry.set_exception(e)
+                    raise
+
+        return entry.result()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# freeze() makes request params usable as a cache key
+def freeze(data):
+    if isinstance(data, dict):
+        return tuple(sorted(data.items()))
+    return data
+
+
+class HttpCache:
+    """ Base of conditional GET caches.
+
+    Validators (ETag / Last-Modified) and bodies are kept by the backend (load / store),
+    parsed documents (or rates extracted from them) are always kept in process memory next to the
+    validator they were parsed for, at most parsed_limit of them. A document of a changed validator
+    is replaced, documents of requests not fetched any more (e.g. dated urls) are evicted by newer ones.
+    """
+
+    def __init__(self, parsed_limit=PARSED_LIMIT):
+        self.lock = threading.Lock()
+        self.parsed = OrderedDict()
+        self.parsed_limit = parsed_limit
+
+    def load(self, key):
+        raise NotImplementedError
+
+    def store(self, key, entry):
+        raise NotImplementedError
+
+    def parsed_document(self, key, version):
+        with self.lock:
+            cached = self.parsed.get(key)
+            if cached is not None:
+                self.parsed.move_to_end(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        return None
+
+    def keep_parsed_document(self, key, version, document):
+        with self.lock:
+            self.parsed[key] = (version, document)
+            self.parsed.move_to_end(key)
+            while len(self.parsed) > self.parsed_limit:
+                self.parsed.popitem(last=False)
+
+
+class MemoryHttpCache(HttpCache):
+    """ In-process cache, lives as long as the (warm) container, keeps at most limit responses """
+
+    def __init__(self, limit=ENTRIES_LIMIT):
+        HttpCache.__init__(self)
+        self.entries = OrderedDict()
+        self.limit = limit
+
+    def load(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def store(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.limit:
+                self.entries.popitem(last=False)
+
+
+class FileHttpCache(HttpCache):
+    """ Local file cache, one json file per request """
+
+    def __init__(self, directory):
+        HttpCache.__init__(self)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".json")
+
+    def load(self, key):
+        try:
+            with open(self.path(key)) as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return None
+
+    def store(self, key, entry):
+        path = self.path(key)
+        tmp = path + "." + str(threading.get_ident()) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+
+class KeyValueHttpCache(HttpCache):
+    """ Cache on a shared key-value store, client needs redis-like get(key) / set(key, value) """
+
+    prefix = "cerp:http:"
+
+    def __init__(self, client):
+        HttpCache.__init__(self)
+        self.client = client
+
+    def load(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return json.loads(value)
+
+    def store(self, key, entry):
+        self.client.set(self.prefix + key, json.dumps(entry))
+
+
+class LocalKeyValueClient:
+    """ Local stand-in for a shared key-value store """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def get(self, key):
+        with self.lock:
+            return self.values.get(key)
+
+    def set(self, key, value):
+        with self.lock:
+            self.values[key] = value
+
+
+# http_cache_from_env() builds http cache from setting: memory, file:<directory>, local-kv (empty -> disabled)
+def http_cache_from_env(value):
+    if not value:
+        return None
+    if value == "memory":
+        return MemoryHttpCache()
+    if value.startswith("file:"):
+        return FileHttpCache(value[len("file:"):])
+    if value == "local-kv":
+        return KeyValueHttpCache(LocalKeyValueClient())
+
+    raise ValueError("unknown http cache '" + value + "'")
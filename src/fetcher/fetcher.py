@@ -1,4 +1,15 @@
+import threading
+import time
+from contextlib import contextmanager
+from time import thread_time
+from urllib.parse import urlencode
+
 import requests
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+
+from src.fetcher.cache import DocumentCache
+from src.fetcher.cache import freeze
 
 # disable https certificate warnings
 requests.packages.urllib3.disable_warnings()
@@ -6,24 +17,397 @@ requests.packages.urllib3.disable_warnings()
 headers_mobile = {
     'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 9_1 like Mac OS X) AppleWebKit/601.1.46 (KHTML, like Gecko) Version/9.0 Mobile/13B137 Safari/601.1'}
 
+# Number of hosts to keep connection pools for
+POOL_CONNECTIONS = 32
+
+# Max number of keep-alive connections kept open per host
+POOL_MAXSIZE = 16
+
+# Bytes read at once from a streamed body (see read_stream)
+CHUNK_SIZE = 16384
+
+# Session shared by all fetchers of the process (survives warm lambda invocations)
+_session = None
+_session_lock = threading.Lock()
+
+
+# new_session() returns keep-alive session with per-host connection limits.
+def new_session(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# shared_session() returns process wide session, creates it on first use.
+def shared_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = new_session()
+        return _session
+
+
+# reset_session() closes process wide session, the next shared_session() opens a new one.
+def reset_session():
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
 
 class Fetcher:
-    def __init__(self):
-        pass
+    def __init__(self, session=None, http_cache=None):
+        self.session = session if session is not None else shared_session()
+        # conditional GET cache (see cache.HttpCache), disabled if None
+        self.http_cache = http_cache
+        # parsed documents of the current run (see run_scope)
+        self.documents = None
+        # requests, downloaded bytes & not modified responses of this fetcher (see stats), updated by all threads
+        self.requests = 0
+        self.bytes = 0
+        self.not_modified = 0
+        self.counters_lock = threading.Lock()
+        # per thread deadline of fetches (see time_limit)
+        self.limits = threading.local()
+        # per thread fetch time, fetch cpu & downloaded bytes (see usage)
+        self.usages = threading.local()
+        # per thread responses downloaded by async pipeline (see serve)
+        self.served = threading.local()
+
+    def fetch(self, link, method="GET", data=None, timeout=10, mobile=False, limit=None, until=None):
+        return self.fetch_versioned(link, method, data, timeout, mobile, limit=limit, until=until)[0]
+
+    def fetch_versioned(self, link, method="GET", data=None, timeout=10, mobile=False, limit=None, until=None):
+        """ Fetch document, returns (body, version) where version is the http validator or None.
+
+        With limit (bytes) or until (end marker or markers in order of appearance, e.g. the closing tag of the
+        container with rates) the body is streamed and reading stops at the limit or right after the last marker,
+        the rest of the page is not downloaded (see read_stream).
+        """
+        responses = getattr(self.served, "responses", None)
+        if responses is not None:
+            return self.serve_response(responses, link, method, data, timeout, mobile, limit, until)
 
-    def fetch(self, link, method="GET", data=None, timeout=10, mobile=False):
+        deadline = getattr(self.limits, "deadline", None)
+        if deadline is not None:
+            left = deadline - time.time()
+            if left <= 0:
+                raise DeadlineExceeded(link, "deadline exceeded")
+            timeout = min(timeout, left)
+
+        start = time.time()
+        cpu = thread_time()
         try:
             if method == "GET":
-                if mobile:
-                    return requests.get(link, params=data, timeout=timeout, verify=False, headers=headers_mobile).text
-                else:
-                    return requests.get(link, params=data, timeout=timeout, verify=False).text
+                return self.get(link, data, timeout, mobile, limit, until)
             elif method == "POST":
-                return requests.post(link, data=data, timeout=timeout).content
+                response = self.session.post(link, data=data, timeout=timeout, stream=streamed(limit, until))
+                return self.read(response, limit, until), None
             else:
                 raise FetchError(link, "Unknown method '" + str(method) + "'")
         except requests.RequestException as e:
-            raise FetchError(link, e.message)
+            raise FetchError(link, str(e))
+        finally:
+            self.account(seconds=time.time() - start, requests=1, cpu=thread_time() - cpu)
+
+    def get(self, link, data, timeout, mobile, limit=None, until=None):
+        headers = dict(headers_mobile) if mobile else {}
+
+        key = entry = None
+        if self.http_cache is not None:
+            key = validator_key(link, data, mobile, limit, until)
+            entry = self.http_cache.load(key)
+            if entry is not None:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.session.get(link, params=data, timeout=timeout, verify=False, headers=headers,
+                                    stream=streamed(limit, until))
+        content = self.read(response, limit, until)
+
+        if response.status_code == 304 and entry is not None:
+            with self.counters_lock:
+                self.not_modified += 1
+            return entry["body"], entry["version"]
+
+        text = decode(content, response.encoding) if streamed(limit, until) else response.text
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if key is None or not response.ok or not (etag or last_modified):
+            return text, None
+
+        version = (etag or "") + "|" + (last_modified or "")
+        self.http_cache.store(key, {
+            "etag": etag,
+            "last_modified": last_modified,
+            "version": version,
+            "body": text,
+        })
+        return text, version
+
+    def read(self, response, limit=None, until=None):
+        """ Body bytes of response, a streamed response is read up to limit / until end markers """
+        content = read_stream(response, limit, until) if streamed(limit, until) else response.content
+        self.account(size=len(content))
+        return content
+
+    def fetch_document(self, link, parse, method="GET", data=None, timeout=10, mobile=False, limit=None, until=None):
+        """ Fetch and parse document, inside run_scope the same document is downloaded & parsed only once """
+        def load():
+            body, version = self.fetch_versioned(link, method=method, data=data, timeout=timeout, mobile=mobile,
+                                                 limit=limit, until=until)
+            if version is None:
+                return parse(body)
+
+            # not modified since last run -> reuse already parsed document
+            parsed_key = (validator_key(link, data, mobile, limit, until), parse)
+            document = self.http_cache.parsed_document(parsed_key, version)
+            if document is None:
+                document = parse(body)
+                self.http_cache.keep_parsed_document(parsed_key, version, document)
+            return document
+
+        documents = self.documents
+        if documents is None:
+            return load()
+
+        return documents.get(response_key(link, method, data, mobile, limit, until) + (parse,), load)
+
+    @contextmanager
+    def run_scope(self):
+        """ Share fetched documents between all parsing functions of one run """
+        self.documents = DocumentCache(transient=(DeadlineExceeded,))
+        try:
+            yield self.documents
+        finally:
+            self.documents = None
+
+    @contextmanager
+    def time_limit(self, deadline):
+        """ Fetches of the current thread fail with DeadlineExceeded after deadline (unix time, None is unlimited) """
+        previous = getattr(self.limits, "deadline", None)
+        self.limits.deadline = deadline
+        try:
+            yield
+        finally:
+            self.limits.deadline = previous
+
+    @contextmanager
+    def usage(self):
+        """ Counts requests, fetch seconds, fetch cpu seconds (tls, reading & decoding of responses) and downloaded
+        bytes of the current thread into yielded dict
+        """
+        previous = getattr(self.usages, "current", None)
+        usage = self.usages.current = {"requests": 0, "seconds": 0.0, "cpu": 0.0, "bytes": 0}
+        try:
+            yield usage
+        finally:
+            self.usages.current = previous
+
+    @contextmanager
+    def serve(self, responses):
+        """ Fetches of the current thread are served from responses: response_key() -> (body, version) or error.
+
+        Missing response raises Suspended with the request, the caller downloads it (see AsyncFetcher) into
+        responses and runs the parsing function again.
+        """
+        previous = getattr(self.served, "responses", None)
+        self.served.responses = responses
+        try:
+            yield
+        finally:
+            self.served.responses = previous
+
+    def serve_response(self, responses, link, method, data, timeout, mobile, limit=None, until=None):
+        key = response_key(link, method, data, mobile, limit, until)
+        if key not in responses:
+            raise Suspended(key, link, method, data, timeout, mobile, limit, until)
+
+        response = responses[key]
+        if isinstance(response, Exception):
+            raise response
+
+        body, version = response
+        # parsed documents are kept next to validators of http cache only
+        return body, version if self.http_cache is not None else None
+
+    def account(self, seconds=0.0, size=0, requests=0, cpu=0.0):
+        with self.counters_lock:
+            self.requests += requests
+            self.bytes += size
+
+        usage = getattr(self.usages, "current", None)
+        if usage is not None:
+            usage["requests"] += requests
+            usage["seconds"] += seconds
+            usage["cpu"] += cpu
+            usage["bytes"] += size
+
+    def stats(self):
+        """ Requests, downloaded bytes & not modified responses of this fetcher (same as AsyncFetcher.stats) """
+        with self.counters_lock:
+            return {
+                "requests": self.requests,
+                "bytes": self.bytes,
+                "not_modified": self.not_modified,
+            }
+
+    def session_stats(self):
+        """ Connection usage of the session: requests, new and reused connections per host. The session is
+        shared by all fetchers of the process (see shared_session), its stats are the same for all of them.
+        """
+        stats = {
+            "requests": 0,
+            "new": 0,
+            "reused": 0,
+            "hosts": {},
+        }
+
+        adapters = []
+        for adapter in self.session.adapters.values():
+            if adapter not in adapters:
+                adapters.append(adapter)
+
+        for adapter in adapters:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                host = pool.scheme + "://" + pool.host + ":" + str(pool.port)
+                reused = max(pool.num_requests - pool.num_connections, 0)
+                stats["hosts"][host] = {
+                    "requests": pool.num_requests,
+                    "new": pool.num_connections,
+                    "reused": reused,
+                }
+                stats["requests"] += pool.num_requests
+                stats["new"] += pool.num_connections
+                stats["reused"] += reused
+
+        return stats
+
+
+# validator_key() identifies GET request in http cache (a partly read body is kept apart from the whole one)
+def validator_key(link, data, mobile, limit=None, until=None):
+    key = "GET " + link
+    if data:
+        key += "?" + urlencode(freeze(data))
+    if mobile:
+        key += " mobile"
+    if limit is not None:
+        key += " limit=" + str(limit)
+    if until is not None:
+        key += " until=" + "|".join(end_markers(until))
+    return key
+
+
+# response_key() identifies request of served responses
+def response_key(link, method="GET", data=None, mobile=False, limit=None, until=None):
+    return method, link, freeze(data), mobile, limit, end_markers(until)
+
+
+# end_markers() normalizes until of a fetch: None, one marker or markers in order of appearance -> tuple
+def end_markers(until):
+    if until is None:
+        return ()
+    if isinstance(until, str):
+        return until,
+    return tuple(until)
+
+
+# streamed() returns true if body of the fetch is streamed (read partly)
+def streamed(limit, until):
+    return limit is not None or until is not None
+
+
+# read_stream() reads body of a streamed response in chunks until limit bytes or all end markers were read,
+# the rest of the body is not downloaded (the response is closed, the connection is not kept alive).
+def read_stream(response, limit=None, until=None, chunk_size=CHUNK_SIZE):
+    reader = BodyReader(limit, until)
+    try:
+        for chunk in response.iter_content(chunk_size):
+            if reader.feed(chunk):
+                break
+    finally:
+        response.close()
+    return bytes(reader.body)
+
+
+# decode() returns text of body in the declared encoding or the detected one (as requests Response.text)
+def decode(body, encoding=None):
+    if encoding is None:
+        encoding = chardet.detect(body)["encoding"] or "utf-8"
+    try:
+        return str(body, encoding, errors="replace")
+    except LookupError:
+        return str(body, "utf-8", errors="replace")
+
+
+class BodyReader:
+    """Collects chunks of a body until it is complete enough.
+
+    Reading stops after limit bytes (the body is cut at the limit) or right after the last of the end markers,
+    markers are searched in order (e.g. class of the container, then its closing tag) so a closing tag of an
+    element before the container doesn't end the body. Markers are matched on the raw bytes, use ascii markers.
+
+    Attributes:
+        limit -- max bytes of the body, None is unlimited
+        markers -- end markers not seen yet
+        body -- bytes read so far
+    """
+
+    def __init__(self, limit=None, until=None):
+        self.limit = limit
+        self.markers = [marker.encode("utf-8") for marker in end_markers(until)]
+        self.body = bytearray()
+        self.done = False
+        # position the next marker is searched from (markers split between chunks are found as well)
+        self.start = 0
+
+    def feed(self, chunk):
+        """ Adds chunk to the body, returns true when the rest of the body is not needed """
+        if self.done:
+            return True
+        self.body += chunk
+        while self.markers:
+            position = self.body.find(self.markers[0], self.start)
+            if position < 0:
+                self.start = max(self.start, len(self.body) - len(self.markers[0]) + 1)
+                break
+            self.start = position + len(self.markers.pop(0))
+            if not self.markers:
+                del self.body[self.start:]
+                self.done = True
+
+        if self.limit is not None and len(self.body) >= self.limit:
+            del self.body[self.limit:]
+            self.done = True
+        return self.done
+
+
+class Suspended(BaseException):
+    """Raised by a served fetch (see Fetcher.serve) when the response is not downloaded yet.
+
+    Not an Exception, so parsing functions catching Exception can't swallow it.
+
+    Attributes:
+        key -- response_key() of the request
+        link, method, data, timeout, mobile, limit, until -- fetch arguments
+    """
+
+    def __init__(self, key, link, method, data, timeout, mobile, limit=None, until=None):
+        self.key = key
+        self.link = link
+        self.method = method
+        self.data = data
+        self.timeout = timeout
+        self.mobile = mobile
+        self.limit = limit
+        self.until = until
 
 
 class FetchError(Exception):
@@ -36,3 +420,7 @@ class FetchError(Exception):
     def __init__(self, url, message):
         self.url = url
         self.message = message
+
+
+class DeadlineExceeded(FetchError):
+    """Exception raised when fetch is attempted after the deadline of the run."""
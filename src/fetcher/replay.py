@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import urlencode
+
+from src.fetcher.cache import freeze
+from src.fetcher.fetcher import Fetcher
+from src.fetcher.fetcher import FetchError
+from src.fetcher.fetcher import end_markers
+
+# Modes of ReplayFetcher
+RECORD = "record"  # fetch live and save responses to the corpus
+REPLAY = "replay"  # serve responses from the corpus only (offline)
+
+
+class ReplayFetcher(Fetcher):
+    """Fetcher backed by a fixture corpus of raw responses.
+
+    The corpus is a directory with index.json (request -> response file or fetch error) and one
+    file per response body. In record mode every request is fetched live and saved, in replay
+    mode requests are served from the corpus. A request whose params are not recorded (e.g. date
+    of today) is served by the only recorded request of the same method & link. A partly read page
+    (limit / until of the fetch) is recorded apart from the whole page.
+    """
+
+    def __init__(self, directory, mode=REPLAY, session=None):
+        Fetcher.__init__(self, session)
+        if mode not in (RECORD, REPLAY):
+            raise ValueError("unknown replay mode '" + str(mode) + "'")
+
+        self.directory = directory
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.index = self.load_index()
+
+    def index_path(self):
+        return os.path.join(self.directory, "index.json")
+
+    def load_index(self):
+        try:
+            with open(self.index_path()) as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return {}
+
+    def save_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self.index_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.index_path())
+
+    def fetch_versioned(self, link, method="GET", data=None, timeout=10, mobile=False, limit=None, until=None):
+        key = request_key(link, method, data, mobile, limit, until)
+        if self.mode == RECORD:
+            return self.record(key, link, method, data, timeout, mobile, limit, until), None
+
+        entry = self.lookup(key, link, method, mobile, limit, until)
+        if entry is None:
+            raise FetchError(link, "not recorded: " + key)
+        if "error" in entry:
+            raise FetchError(link, entry["error"])
+
+        with open(os.path.join(self.directory, entry["file"]), "rb") as f:
+            body = f.read()
+        # GET bodies are text, POST bodies raw bytes (as returned by Fetcher)
+        return (body.decode("utf-8") if entry["text"] else body), None
+
+    def record(self, key, link, method, data, timeout, mobile, limit=None, until=None):
+        entry = {"link": link, "method": method, "mobile": mobile}
+        if limit is not None:
+            entry["limit"] = limit
+        if until is not None:
+            entry["until"] = list(end_markers(until))
+        try:
+            body = Fetcher.fetch_versioned(self, link, method, data, timeout, mobile, limit=limit, until=until)[0]
+        except FetchError as e:
+            entry["error"] = e.message
+            self.save(key, entry)
+            raise
+
+        entry["text"] = not isinstance(body, bytes)
+        entry["file"] = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".body"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, entry["file"]), "wb") as f:
+            f.write(body.encode("utf-8") if entry["text"] else body)
+        self.save(key, entry)
+        return body
+
+    def save(self, key, entry):
+        with self.lock:
+            self.index[key] = entry
+            self.save_index()
+
+    def lookup(self, key, link, method, mobile, limit=None, until=None):
+        entry = self.index.get(key)
+        if entry is not None:
+            return entry
+
+        until = list(end_markers(until)) if until is not None else None
+        similar = [e for e in self.index.values()
+                   if e["link"] == link and e["method"] == method and e["mobile"] == mobile and
+                   e.get("limit") == limit and e.get("until") == until]
+        return similar[0] if len(similar) == 1 else None
+
+
+# request_key() identifies request in the corpus index
+def request_key(link, method="GET", data=None, mobile=False, limit=None, until=None):
+    key = method + " " + link
+    if data:
+        key += "?" + urlencode(freeze(data))
+    if mobile:
+        key += " mobile"
+    if limit is not None:
+        key += " limit=" + str(limit)
+    if until is not None:
+        key += " until=" + "|".join(end_markers(until))
+    return key
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+import unittest
+
+from src.fetcher import FetchError
+from src.fetcher.aio import HAS_AIOHTTP
+from src.fetcher.aio import AsyncFetcher
+from src.fetcher.cache import MemoryHttpCache
+from src.fetcher.fetcher import DeadlineExceeded
+from src.fetcher.test_fetcher import Handler
+from src.fetcher.test_fetcher import LocalServerTestCase
+
+
+class FakeContent:
+    """ Body stream of FakeResponse, counts chunks read """
+
+    def __init__(self, body):
+        self.body = body
+        self.chunks = 0
+
+    async def iter_chunked(self, size):
+        for start in range(0, len(self.body), size):
+            self.chunks += 1
+            yield self.body[start:start + size]
+
+
+class FakeResponse:
+    """ Stands in for aiohttp.ClientResponse """
+
+    def __init__(self, status, body=b"", headers=None, charset=None):
+        self.status = status
+        self.headers = headers or {}
+        self.charset = charset
+        self.content = FakeContent(body)
+
+    async def read(self):
+        return self.content.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeSession:
+    """ Stands in for aiohttp.ClientSession, serves pages by url: (body, headers, charset).
+    A page with ETag is answered with 304 when the request has the same If-None-Match.
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+        self.responses = []
+        self.closed = False
+
+    def get(self, link, params=None, headers=None, ssl=None):
+        self.requests.append(("GET", link, headers))
+        body, page_headers, charset = self.pages[link]
+        if "ETag" in page_headers and (headers or {}).get("If-None-Match") == page_headers["ETag"]:
+            return self.respond(FakeResponse(304))
+        return self.respond(FakeResponse(200, body, page_headers, charset))
+
+    def post(self, link, data=None, ssl=None):
+        self.requests.append(("POST", link, data))
+        body, page_headers, charset = self.pages[link]
+        return self.respond(FakeResponse(200, body, page_headers, charset))
+
+    def respond(self, response):
+        self.responses.append(response)
+        return response
+
+    async def close(self):
+        self.closed = True
+
+
+class TestAsyncFetcherPaths(unittest.TestCase):
+    """ Cache, decoding & streaming of AsyncFetcher on a fake session (runs without aiohttp) """
+
+    page = b"<html><table class=\"rate-tb\"><tr><td>USD</td></tr></table>" + b"<p>footer</p>" * 10000 + b"</html>"
+
+    def setUp(self):
+        self.session = FakeSession({
+            "http://bank/weekly.xml": (Handler.body, {"ETag": '"v1"', "Last-Modified": "Sat, 17 Oct 2026"}, "utf-8"),
+            "http://bank/cp1251": (u"Доллар США 87,5".encode("cp1251"), {}, "windows-1251"),
+            "http://bank/detected": (u"Доллар США 87,5".encode("utf-8"), {}, None),
+            "http://bank/page.html": (self.page, {}, "utf-8"),
+        })
+
+    def run_async(self, func, http_cache=None):
+        async def run():
+            fetcher = AsyncFetcher(session=self.session, http_cache=http_cache)
+            try:
+                return await func(fetcher)
+            finally:
+                await fetcher.close()
+        return asyncio.run(run())
+
+    def test_conditional_get(self):
+        async def fetch(fetcher):
+            first = await fetcher.fetch_versioned("http://bank/weekly.xml")
+            second = await fetcher.fetch_versioned("http://bank/weekly.xml")
+            return first, second, fetcher.stats()
+
+        first, second, stats = self.run_async(fetch, http_cache=MemoryHttpCache())
+        self.assertEqual(first, second)
+        self.assertEqual(first[1], '"v1"|Sat, 17 Oct 2026')
+        self.assertEqual(self.session.requests[1][2]["If-None-Match"], '"v1"')
+        self.assertEqual(self.session.requests[1][2]["If-Modified-Since"], "Sat, 17 Oct 2026")
+        self.assertEqual(stats, {"requests": 2, "bytes": len(Handler.body), "not_modified": 1})
+        self.assertTrue(self.session.closed)
+
+    def test_charset(self):
+        async def fetch(fetcher):
+            return await fetcher.fetch("http://bank/cp1251"), await fetcher.fetch("http://bank/detected")
+
+        self.assertEqual(self.run_async(fetch), (u"Доллар США 87,5", u"Доллар США 87,5"))
+
+    def test_stream(self):
+        async def fetch(fetcher):
+            return await fetcher.fetch("http://bank/page.html", until=('class="rate-tb', "</table>")), \
+                   await fetcher.fetch("http://bank/page.html", limit=100), fetcher.stats()
+
+        until, limit, stats = self.run_async(fetch)
+        self.assertTrue(until.endswith("<td>USD</td></tr></table>"))
+        self.assertEqual(limit, self.page[:100].decode())
+        self.assertEqual(stats["bytes"], len(until) + 100)
+        # reading stopped with the first chunk, the rest of the page is not read
+        self.assertEqual([response.content.chunks for response in self.session.responses], [1, 1])
+
+    def test_post(self):
+        async def fetch(fetcher):
+            return await fetcher.fetch("http://bank/page.html", method="POST", data={"a": 1}), \
+                   await fetcher.fetch("http://bank/page.html", method="POST", limit=10)
+
+        whole, part = self.run_async(fetch)
+        self.assertEqual(whole, self.page)
+        self.assertEqual(part, self.page[:10])
+        self.assertEqual(self.session.requests[0], ("POST", "http://bank/page.html", {"a": 1}))
+
+
+@unittest.skipUnless(HAS_AIOHTTP, "requires aiohttp")
+class TestAsyncFetcher(LocalServerTestCase):
+
+    def run_async(self, func, http_cache=None):
+        async def run():
+            fetcher = AsyncFetcher(http_cache=http_cache)
+            try:
+                return await func(fetcher)
+            finally:
+                await fetcher.close()
+        return asyncio.run(run())
+
+    def test_fetch(self):
+        async def fetch(fetcher):
+            return await asyncio.gather(*[fetcher.fetch(self.url) for _ in range(5)]), fetcher.stats()
+
+        bodies, stats = self.run_async(fetch)
+        self.assertEqual(len(bodies), 5)
+        self.assertIn("87,5", bodies[0])
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["bytes"], 5 * len(Handler.body))
+
+    def test_errors(self):
+        async def fetch(fetcher):
+            with self.assertRaises(DeadlineExceeded):
+                await fetcher.fetch(self.url, deadline=time.time() - 1)
+            with self.assertRaises(FetchError):
+                await fetcher.fetch(self.url, method="PUT")
+            with self.assertRaises(FetchError):
+                await fetcher.fetch("http://127.0.0.1:1/")
+
+        self.run_async(fetch)
+
+    def test_conditional_get(self):
+        async def fetch(fetcher):
+            first = await fetcher.fetch_versioned(self.host + "/weekly.xml")
+            second = await fetcher.fetch_versioned(self.host + "/weekly.xml")
+            return first, second, fetcher.stats()
+
+        first, second, stats = self.run_async(fetch, http_cache=MemoryHttpCache())
+        self.assertEqual(first, second)
+        self.assertIsNotNone(first[1])
+        self.assertEqual(stats["not_modified"], 1)
+        self.assertEqual(Handler.full_responses, 1)
+
+
+class TestWithoutAiohttp(unittest.TestCase):
+
+    @unittest.skipIf(HAS_AIOHTTP, "aiohttp is installed")
+    def test_missing_package(self):
+        with self.assertRaises(FetchError):
+            AsyncFetcher()
+
+
+if __name__ == "__main__":
+    unittest.main()
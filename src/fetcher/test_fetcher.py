@@ -0,0 +1,264 @@
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+
+from src.fetcher import Fetcher
+from src.fetcher import FetchError
+from src.fetcher.fetcher import BodyReader
+from src.fetcher.fetcher import DeadlineExceeded
+from src.fetcher.fetcher import Suspended
+from src.fetcher.fetcher import response_key
+from src.fetcher.cache import FileHttpCache
+from src.fetcher.cache import KeyValueHttpCache
+from src.fetcher.cache import LocalKeyValueClient
+from src.fetcher.cache import MemoryHttpCache
+from src.fetcher.fetcher import new_session
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body = b"<rates><currency isocode=\"USD\"><value>87,5</value></currency></rates>"
+    page = b"<html><table class=\"menu\"></table><table class=\"rate-tb\"><tr><td>USD</td></tr></table>" + \
+        b"<p>footer</p>" * 100000 + b"</html>"
+    etag = '"v1"'
+    full_responses = 0
+
+    def do_GET(self):
+        if self.path.startswith("/page.html"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(self.page)))
+            self.end_headers()
+            try:
+                self.wfile.write(self.page)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            return
+
+        if self.path.startswith("/weekly.xml") and self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        Handler.full_responses += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml; charset=utf-8")
+        if self.path.startswith("/weekly.xml"):
+            self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.host = "http://127.0.0.1:" + str(self.server.server_port)
+        self.url = self.host + "/daily.xml"
+        Handler.full_responses = 0
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+        self.fetcher = Fetcher(new_session())
+
+    def tearDown(self):
+        self.fetcher.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestFetcher(LocalServerTestCase):
+
+    def test_fetch(self):
+        self.assertIn("87,5", self.fetcher.fetch(self.url))
+
+    def test_keep_alive(self):
+        for _ in range(5):
+            self.fetcher.fetch(self.url)
+
+        stats = self.fetcher.session_stats()
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["new"], 1)
+        self.assertEqual(stats["reused"], 4)
+
+        # counters of the fetcher only, another fetcher of the session counts its own requests
+        other = Fetcher(self.fetcher.session)
+        other.fetch(self.url)
+        self.assertEqual(self.fetcher.stats(), {"requests": 5, "bytes": 5 * len(Handler.body), "not_modified": 0})
+        self.assertEqual(other.stats()["requests"], 1)
+        self.assertEqual(other.session_stats()["requests"], 6)
+
+    def test_shared_session(self):
+        self.assertIs(Fetcher().session, Fetcher().session)
+
+    def test_time_limit(self):
+        with self.fetcher.time_limit(time.time() - 1):
+            with self.assertRaises(DeadlineExceeded):
+                self.fetcher.fetch(self.url)
+
+        with self.fetcher.time_limit(time.time() + 5):
+            self.assertIn("87,5", self.fetcher.fetch(self.url))
+
+    def test_usage(self):
+        with self.fetcher.usage() as usage:
+            self.fetcher.fetch(self.url)
+            self.fetcher.fetch(self.url)
+        self.fetcher.fetch(self.url)
+
+        self.assertEqual(usage["requests"], 2)
+        self.assertEqual(usage["bytes"], 2 * len(Handler.body))
+        self.assertGreater(usage["seconds"], 0)
+
+    def test_serve(self):
+        def parse():
+            try:
+                return self.fetcher.fetch_document(self.url, str.upper)
+            except Exception:
+                return "swallowed"
+
+        responses = {}
+        with self.fetcher.run_scope(), self.fetcher.serve(responses):
+            # nothing downloaded yet: parsing is suspended even by a function catching Exception
+            with self.assertRaises(Suspended) as suspended:
+                parse()
+            self.assertEqual(suspended.exception.key, response_key(self.url))
+
+            responses[suspended.exception.key] = ("rates", None)
+            self.assertEqual(parse(), "RATES")
+
+            responses[response_key(self.host + "/weekly.xml")] = FetchError(self.url, "refused")
+            with self.assertRaises(FetchError):
+                self.fetcher.fetch(self.host + "/weekly.xml")
+
+        self.assertEqual(Handler.full_responses, 0)
+        self.assertIn("87,5", self.fetcher.fetch(self.url))
+
+    def test_run_scope_deadline(self):
+        with self.fetcher.run_scope():
+            # expired time slice of one job is not kept for the other jobs of the run
+            with self.fetcher.time_limit(time.time() - 1):
+                with self.assertRaises(DeadlineExceeded):
+                    self.fetcher.fetch_document(self.url, str.upper)
+            self.assertIn("87,5", self.fetcher.fetch_document(self.url, str.upper))
+        self.assertEqual(Handler.full_responses, 1)
+
+    def test_stream_until(self):
+        with self.fetcher.usage() as usage:
+            body = self.fetcher.fetch(self.host + "/page.html", until=("rate-tb", "</table>"))
+
+        self.assertTrue(body.endswith("<td>USD</td></tr></table>"))
+        self.assertNotIn("footer", body)
+        self.assertEqual(usage["bytes"], len(body))
+
+    def test_stream_limit(self):
+        self.assertEqual(self.fetcher.fetch(self.host + "/page.html", limit=100), Handler.page[:100].decode())
+        # marker never seen: the whole body is read
+        body = self.fetcher.fetch(self.host + "/page.html", until="</body>")
+        self.assertEqual(len(body), len(Handler.page))
+
+    def test_stream_http_cache(self):
+        self.fetcher.http_cache = MemoryHttpCache()
+        body = self.fetcher.fetch(self.host + "/weekly.xml", until="<value>")
+        self.assertEqual(body, Handler.body[:Handler.body.index(b"<value>") + 7].decode())
+        self.assertIn("87,5", self.fetcher.fetch(self.host + "/weekly.xml"))
+        self.assertEqual(Handler.full_responses, 2)
+
+    def test_unknown_method(self):
+        with self.assertRaises(FetchError):
+            self.fetcher.fetch(self.url, method="PUT")
+
+
+class TestBodyReader(unittest.TestCase):
+
+    def test_markers_between_chunks(self):
+        page = b"<table></table><div class='rates'><table><tr></tr></table></div>"
+        reader = BodyReader(until=("rates", "</table>"))
+        done = [reader.feed(page[i:i + 3]) for i in range(0, len(page), 3)]
+
+        self.assertEqual(bytes(reader.body), page[:page.rindex(b"</table>") + 8])
+        self.assertEqual(done.index(True), (len(reader.body) - 1) // 3)
+
+    def test_limit(self):
+        reader = BodyReader(limit=5)
+        self.assertFalse(reader.feed(b"abc"))
+        self.assertTrue(reader.feed(b"def"))
+        self.assertEqual(reader.body, b"abcde")
+
+
+class TestHttpCache(unittest.TestCase):
+
+    def test_parsed_limit(self):
+        cache = MemoryHttpCache()
+        cache.parsed_limit = 2
+        cache.keep_parsed_document("a", "v1", "A")
+        cache.keep_parsed_document("b", "v1", "B")
+        self.assertEqual(cache.parsed_document("a", "v1"), "A")
+        cache.keep_parsed_document("c", "v1", "C")
+
+        # least recently used is evicted, a changed validator replaces the document
+        self.assertIsNone(cache.parsed_document("b", "v1"))
+        cache.keep_parsed_document("a", "v2", "A2")
+        self.assertIsNone(cache.parsed_document("a", "v1"))
+        self.assertEqual(cache.parsed_document("a", "v2"), "A2")
+        self.assertEqual(len(cache.parsed), 2)
+
+    def test_entries_limit(self):
+        cache = MemoryHttpCache(limit=2)
+        for key in ["a", "b", "c"]:
+            cache.store(key, {"body": key})
+        self.assertIsNone(cache.load("a"))
+        self.assertEqual(cache.load("c"), {"body": "c"})
+
+
+class TestConditionalGet(LocalServerTestCase):
+
+    def test_memory_cache(self):
+        self.assert_conditional_get(MemoryHttpCache())
+
+    def test_file_cache(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.assert_conditional_get(FileHttpCache(directory))
+
+        # validators survive a new process (new cache instance on the same directory)
+        self.fetcher.http_cache = FileHttpCache(directory)
+        self.fetcher.fetch(self.host + "/weekly.xml")
+        self.assertEqual(Handler.full_responses, 1)
+
+    def test_key_value_cache(self):
+        self.assert_conditional_get(KeyValueHttpCache(LocalKeyValueClient()))
+
+    def test_without_validators(self):
+        self.fetcher.http_cache = MemoryHttpCache()
+        self.fetcher.fetch(self.url)
+        self.fetcher.fetch(self.url)
+        self.assertEqual(Handler.full_responses, 2)
+
+    def assert_conditional_get(self, http_cache):
+        self.fetcher.http_cache = http_cache
+        parsed = []
+
+        def parse(body):
+            parsed.append(body)
+            return body.upper()
+
+        first = self.fetcher.fetch_document(self.host + "/weekly.xml", parse)
+        second = self.fetcher.fetch_document(self.host + "/weekly.xml", parse)
+
+        self.assertEqual(first, second)
+        self.assertIn("87,5", second)
+        self.assertEqual(Handler.full_responses, 1)
+        self.assertEqual(self.fetcher.stats()["not_modified"], 1)
+        self.assertEqual(len(parsed), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
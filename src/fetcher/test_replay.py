@@ -0,0 +1,55 @@
+import shutil
+import tempfile
+
+from src.fetcher import FetchError
+from src.fetcher.replay import RECORD
+from src.fetcher.replay import ReplayFetcher
+from src.fetcher.test_fetcher import Handler
+from src.fetcher.test_fetcher import LocalServerTestCase
+
+
+class TestReplayFetcher(LocalServerTestCase):
+
+    def setUp(self):
+        LocalServerTestCase.setUp(self)
+        self.corpus = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.corpus)
+
+    def test_record_replay(self):
+        recorder = ReplayFetcher(self.corpus, RECORD, self.fetcher.session)
+        body = recorder.fetch(self.url, data={"date": "18.10.2026"})
+        with self.assertRaises(FetchError):
+            recorder.fetch(self.host + "/daily.xml", method="PUT")
+
+        replay = ReplayFetcher(self.corpus)
+        self.assertEqual(replay.fetch(self.url, data={"date": "18.10.2026"}), body)
+        self.assertEqual(replay.fetch(self.url, data={"date": "18.10.2026"}), body)
+        with self.assertRaises(FetchError):
+            replay.fetch(self.host + "/daily.xml", method="PUT")
+
+        # replay is offline
+        self.assertEqual(Handler.full_responses, 1)
+
+    def test_params_of_another_day(self):
+        body = ReplayFetcher(self.corpus, RECORD, self.fetcher.session).fetch(self.url, data={"date": "18.10.2026"})
+
+        # served by the only recording of the link
+        replay = ReplayFetcher(self.corpus)
+        self.assertEqual(replay.fetch(self.url, data={"date": "19.10.2026"}), body)
+
+        with self.assertRaises(FetchError) as e:
+            replay.fetch(self.host + "/weekly.xml")
+        self.assertIn("not recorded", e.exception.message)
+
+    def test_partly_read_page(self):
+        link = self.host + "/page.html"
+        recorder = ReplayFetcher(self.corpus, RECORD, self.fetcher.session)
+        part = recorder.fetch(link, until=('class="rate-tb', "</table>"))
+        whole = recorder.fetch(link)
+        self.assertLess(len(part), len(whole))
+
+        replay = ReplayFetcher(self.corpus)
+        self.assertEqual(replay.fetch(link, until=('class="rate-tb', "</table>")), part)
+        self.assertEqual(replay.fetch(link), whole)
+        with self.assertRaises(FetchError):
+            replay.fetch(link, limit=100)
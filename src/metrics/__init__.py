@@ -0,0 +1,3 @@
+from .registry import Registry
+from .registry import emf
+from .registry import stdout_emitter
@@ -0,0 +1,99 @@
+import json
+import sys
+import threading
+import time
+
+# CloudWatch namespace of emitted metrics
+NAMESPACE = "CERP/RateCollector"
+
+# Metrics of a collected source: name -> CloudWatch unit
+METRICS = {
+    "wall_time": "Milliseconds",  # whole parsing function
+    "fetch_time": "Milliseconds",  # waiting for bank responses
+    "parse_cpu": "Milliseconds",  # CPU time of parsing (without CPU time of fetches)
+    "bytes": "Bytes",  # downloaded response bodies
+    "requests": "Count",
+    "rates": "Count",  # non zero rates extracted
+    "failed": "Count",  # 1 if outcome is not ok
+}
+
+
+class Registry:
+    """In-process metrics of collected sources: last run and totals of every (country, source).
+
+    Every recorded source is also passed to emit() as CloudWatch Embedded Metric Format document
+    (see emf), so per source metrics can be graphed without parsing log messages.
+    """
+
+    def __init__(self, emit=None, namespace=NAMESPACE):
+        self.emit = emit
+        self.namespace = namespace
+        self.lock = threading.Lock()
+        self.sources = {}
+
+    def record(self, country, source, outcome, values, timestamp=None):
+        """ Records metric values (see METRICS) and outcome of one collection of the source """
+        with self.lock:
+            entry = self.sources.setdefault((country, source), {
+                "runs": 0,
+                "outcomes": {},
+                "total": dict((name, 0) for name in METRICS),
+                "last": {},
+            })
+            entry["runs"] += 1
+            entry["outcomes"][outcome] = entry["outcomes"].get(outcome, 0) + 1
+            for name in values:
+                entry["total"][name] += values[name]
+            entry["last"] = dict(values, outcome=outcome)
+
+        if self.emit is not None:
+            self.emit(emf(country, source, outcome, values, self.namespace, timestamp))
+
+    def snapshot(self):
+        """ Copy of all metrics: country -> source -> runs, outcomes, total, last """
+        with self.lock:
+            result = {}
+            for (country, source), entry in self.sources.items():
+                result.setdefault(country, {})[source] = json.loads(json.dumps(entry))
+            return result
+
+    def top(self, metric="wall_time", n=10):
+        """ (country, source, total) of the n sources with the largest total of metric """
+        with self.lock:
+            totals = [(country, source, entry["total"][metric]) for (country, source), entry in self.sources.items()]
+        return sorted(totals, key=lambda item: -item[2])[:n]
+
+    def reset(self):
+        with self.lock:
+            self.sources = {}
+
+
+# emf() returns CloudWatch Embedded Metric Format document of a source collection
+def emf(country, source, outcome, values, namespace=NAMESPACE, timestamp=None):
+    document = {
+        "_aws": {
+            "Timestamp": int((time.time() if timestamp is None else timestamp) * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": namespace,
+                "Dimensions": [["country"], ["country", "source"]],
+                "Metrics": [{"Name": name, "Unit": METRICS[name]} for name in sorted(values) if name in METRICS],
+            }],
+        },
+        "country": country,
+        "source": source,
+        "outcome": outcome,
+    }
+    document.update(values)
+    return document
+
+
+# stdout_emitter() writes EMF documents as json lines to stdout (picked up from lambda logs by CloudWatch)
+def stdout_emitter(stream=None):
+    lock = threading.Lock()
+
+    def emit(document):
+        with lock:
+            out = stream if stream is not None else sys.stdout
+            out.write(json.dumps(document) + "\n")
+            out.flush()
+    return emit
@@ -0,0 +1,106 @@
+import io
+import json
+import logging
+import time
+import unittest
+
+from src.fetcher import Fetcher
+from src.metrics import Registry
+from src.metrics import emf
+from src.metrics import stdout_emitter
+from src.parser import base
+
+
+class PageFetcher(Fetcher):
+    body = "<table><tr><td>USD</td><td>87,5</td><td>88</td></tr></table>"
+
+    def get(self, link, data, timeout, mobile, limit=None, until=None):
+        time.sleep(0.05)
+        self.account(size=len(self.body))
+        return self.body, None
+
+
+class DecodingFetcher(PageFetcher):
+    """ Spends CPU time in the fetch (like tls & decoding of a large page) """
+
+    def get(self, link, data, timeout, mobile, limit=None, until=None):
+        end = time.thread_time() + 0.1
+        while time.thread_time() < end:
+            pass
+        return self.body, None
+
+
+class TestRegistry(unittest.TestCase):
+
+    def test_record(self):
+        registry = Registry()
+        registry.record("tj", "tj_a", "ok", {"wall_time": 100, "rates": 6, "failed": 0})
+        registry.record("tj", "tj_a", "error", {"wall_time": 50, "rates": 0, "failed": 1})
+        registry.record("tj", "tj_b", "ok", {"wall_time": 300, "rates": 6, "failed": 0})
+
+        source = registry.snapshot()["tj"]["tj_a"]
+        self.assertEqual(source["runs"], 2)
+        self.assertEqual(source["outcomes"], {"ok": 1, "error": 1})
+        self.assertEqual(source["total"]["wall_time"], 150)
+        self.assertEqual(source["last"]["outcome"], "error")
+        self.assertEqual(registry.top("wall_time", 1), [("tj", "tj_b", 300)])
+
+    def test_emf(self):
+        stream = io.StringIO()
+        Registry(emit=stdout_emitter(stream)).record("kg", "kg_bta", "ok", {"wall_time": 12.5, "bytes": 2048},
+                                                     timestamp=1760745600)
+        document = json.loads(stream.getvalue())
+
+        self.assertEqual(document["_aws"]["Timestamp"], 1760745600000)
+        directive = document["_aws"]["CloudWatchMetrics"][0]
+        self.assertIn(["country", "source"], directive["Dimensions"])
+        self.assertEqual(directive["Metrics"], [{"Name": "bytes", "Unit": "Bytes"},
+                                                {"Name": "wall_time", "Unit": "Milliseconds"}])
+        self.assertEqual((document["source"], document["bytes"], document["outcome"]), ("kg_bta", 2048, "ok"))
+
+    def test_unknown_metric_is_property(self):
+        document = emf("kg", "kg_bta", "ok", {"wall_time": 1, "engine": "scan"})
+        self.assertEqual(len(document["_aws"]["CloudWatchMetrics"][0]["Metrics"]), 1)
+        self.assertEqual(document["engine"], "scan")
+
+
+class TestSourceMetrics(unittest.TestCase):
+
+    def test_handle_execute(self):
+        registry = Registry()
+        fetcher = PageFetcher()
+        parser = base.Parser("tj", logging.getLogger(), fetcher, workers=4, metrics=registry)
+
+        def bank():
+            fetcher.fetch("http://bank")
+            return {"usd_buy": 875000, "usd_sale": 0}
+
+        def broken():
+            fetcher.fetch("http://broken")
+            raise base.ParseError("rates not found")
+
+        parser.handle_execute({"tj_a": bank, "tj_broken": broken}, lambda: {"USD": {"value": 1}})
+        sources = registry.snapshot()["tj"]
+
+        self.assertEqual(sorted(sources), ["all_rates", "tj_a", "tj_broken"])
+        broken_last = sources["tj_broken"]["last"]
+        self.assertEqual(broken_last["outcome"], "error")
+        self.assertEqual(broken_last["failed"], 1)
+        self.assertEqual(broken_last["requests"], 1)
+        self.assertEqual(broken_last["bytes"], len(PageFetcher.body))
+        self.assertGreaterEqual(broken_last["fetch_time"], 50)
+        self.assertEqual(sources["tj_a"]["last"]["rates"], 1)
+        self.assertEqual(sources["all_rates"]["last"]["rates"], 1)
+
+    def test_parse_cpu_without_fetch(self):
+        registry = Registry()
+        fetcher = DecodingFetcher()
+        parser = base.Parser("tj", logging.getLogger(), fetcher, workers=1, metrics=registry)
+
+        parser.handle_execute({"tj_a": lambda: fetcher.fetch("http://bank") and {"usd_buy": 1}}, None)
+        last = registry.snapshot()["tj"]["tj_a"]["last"]
+        self.assertLess(last["parse_cpu"], 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
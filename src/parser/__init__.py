@@ -1,5 +1,14 @@
-from .kg import ParserKG
-from .kz import ParserKZ
-from .tj import ParserTJ
-from .uz import ParserUZ
+# Country parsers are imported on first use, a function collecting one country doesn't load the others
+PARSER_MODULES = {
+    "ParserKG": "kg",
+    "ParserKZ": "kz",
+    "ParserTJ": "tj",
+    "ParserUZ": "uz",
+}
 
+
+def __getattr__(name):
+    if name in PARSER_MODULES:
+        from importlib import import_module
+        return getattr(import_module("." + PARSER_MODULES[name], __name__), name)
+    raise AttributeError("module " + __name__ + " has no attribute " + name)
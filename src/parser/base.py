@@ -1,36 +1,171 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures import wait
+from contextlib import contextmanager
+from functools import partial
+from math import ceil
+from time import thread_time
 from time import time
 
+from src.fetcher.fetcher import DeadlineExceeded
+from src.fetcher.fetcher import FetchError
+from src.fetcher.fetcher import Suspended
+from src.parser.internal import document
 from src.parser.internal import rate_helper as rate
+from src.parser.internal import scheduler as schedule
 from src.parser.internal import time_helper as custom_time
 
 
+# Key of the national bank (all rates) job inside a collection run
+ALL_RATES = "all_rates"
+
+# Default size of the thread pool used to collect banks concurrently
+DEFAULT_WORKERS = 16
+
+# Result of a job that ran out of time
+SKIPPED = object()
+
+
 class Parser:
-    def __init__(self, country, logger, fetcher):
+    # declarative table scrapers of the country: bank_id -> spec.TableSpec
+    specs = {}
+    # bank_id of the national bank
+    national_bank = None
+
+    def __init__(self, country, logger, fetcher, workers=DEFAULT_WORKERS, engine=document.DEFAULT_ENGINE,
+                 budget=None, scheduler=None, executor=None, metrics=None, profiler=None, parse_pool=None):
         self.country = country
         self.log = logger
         self.fetcher = fetcher
+        # workers <= 1 collects banks one after another
+        self.workers = workers
+        # parsing engine of bank pages (see document.ENGINES)
+        self.engine = engine
+        # max seconds of a run when no deadline is given (None is unlimited)
+        self.budget = budget
+        # orders sources by history and backs off failing ones (see scheduler.Scheduler)
+        self.scheduler = scheduler
+        # thread pool shared with other parsers of the process (None creates one per run)
+        self.executor = executor
+        # per source timing & outcome metrics (see src.metrics.Registry), disabled if None
+        self.metrics = metrics
+        # profiles every source (see src.profiling.Profiler), disabled if None
+        self.profiler = profiler
+        # worker processes parsing downloaded pages (see src.parser.pool.ParsePool), None parses in this process
+        self.parse_pool = parse_pool
+
+    def bank_rate_functions(self):
+        """ Rates collecting function of each bank (bank_id -> func), defined by country parsers """
+        raise NotImplementedError
+
+    def all_rates_function(self):
+        """ Function collecting all rates of the national bank, defined by country parsers """
+        raise NotImplementedError
+
+    def sources(self):
+        """ Ids of all collected sources: banks and ALL_RATES """
+        return sorted(self.bank_rate_functions()) + [ALL_RATES]
+
+    def parse_sources(self, sources, deadline=None):
+        """ Collect only given sources (bank ids and/or ALL_RATES), result has all_rates None if not given """
+        functions = self.bank_rate_functions()
+        return self.handle_execute(
+            dict((bank_id, functions[bank_id]) for bank_id in sources if bank_id in functions),
+            self.all_rates_function() if ALL_RATES in sources else None,
+            deadline=deadline
+        )
+
+    def spec_functions(self):
+        """ Rates collecting function of each active bank described by specs """
+        return dict((bank_id, partial(self.parse_spec, bank_id)) for bank_id in self.specs
+                    if self.specs[bank_id].active)
+
+    def parse_spec(self, bank_id):
+        return self.specs[bank_id].extract(self.fetcher, engine=self.engine)
+
+    def handle_execute(self, b_rate_functions, nb_rate_function, deadline=None):
+        """ Collect all rates, sources not finished by deadline (unix time) are listed in "skipped".
+
+        nb_rate_function None leaves all_rates out of the run (None in result).
+        """
+        self.debug("start parsing")
+
+        start = time()
+        if deadline is None and self.budget is not None:
+            deadline = start + self.budget
+
+        result = self.new_result()
+        jobs = self.plan(b_rate_functions, nb_rate_function)
+
+        outcomes = {}
+        with self.fetcher.run_scope():
+            collected, skipped = self.collect(jobs, deadline, outcomes)
+
+        return self.finish(result, b_rate_functions, collected, skipped, outcomes, start)
 
-    def handle_execute(self, b_rate_functions, nb_rate_function):
+    async def handle_execute_async(self, b_rate_functions, nb_rate_function, fetcher, deadline=None):
+        """ handle_execute on the event loop: pages of all sources are downloaded concurrently by fetcher
+        (see src.fetcher.aio.AsyncFetcher) while parsing runs in executor threads (self.executor or a pool
+        of self.workers threads), a thread is never blocked by a download.
+        """
         self.debug("start parsing")
 
         start = time()
-        result = {
+        if deadline is None and self.budget is not None:
+            deadline = start + self.budget
+
+        result = self.new_result()
+        jobs = self.plan(b_rate_functions, nb_rate_function)
+
+        outcomes = {}
+        with self.fetcher.run_scope():
+            collected, skipped = await self.collect_async(jobs, fetcher, deadline, outcomes)
+
+        return self.finish(result, b_rate_functions, collected, skipped, outcomes, start)
+
+    async def parse_all_async(self, fetcher, deadline=None):
+        """ Collect all sources with handle_execute_async """
+        return await self.handle_execute_async(self.bank_rate_functions(), self.all_rates_function(), fetcher,
+                                               deadline=deadline)
+
+    def new_result(self):
+        return {
             "country": self.country,
             "date_key": custom_time.now_date_key(self.country),
             "timestamp": custom_time.now_in_utc(),
             "bank_rates": {},
-            "all_rates": {}
+            "all_rates": {},
+            "skipped": [],
         }
 
-        # collect bank rates (USD, EUR, RUB)
+    def plan(self, b_rate_functions, nb_rate_function):
+        """ (bank_id, func) jobs of the run in order of the scheduler, backed off sources are left out """
+        # collect bank rates (USD, EUR, RUB) together with national bank rates (all rates)
+        jobs = list(b_rate_functions.items())
+        if nb_rate_function is not None:
+            jobs.append((ALL_RATES, nb_rate_function))
+
+        if self.scheduler is not None:
+            jobs, backed_off = self.scheduler.plan(self.country, jobs)
+            if backed_off:
+                self.info("backed off: " + ", ".join(sorted(backed_off)))
+        return jobs
+
+    def finish(self, result, b_rate_functions, collected, skipped, outcomes, start):
+        if self.scheduler is not None:
+            self.scheduler.record(self.country, outcomes)
+
+        result["skipped"] = sorted(skipped)
+        if skipped:
+            self.warn("out of time, skipped: " + ", ".join(result["skipped"]))
+
         for bank_id in b_rate_functions:
-            result["bank_rates"][bank_id] = self.safe_parsing(b_rate_functions[bank_id], bank_id)
+            result["bank_rates"][bank_id] = collected.get(bank_id)
 
         # remove failed and empty rates
         self.remove_nones(result["bank_rates"])
 
-        # collect national bank rates (all rates)
-        result["all_rates"] = self.safe_parsing(nb_rate_function, "all_rates")
+        result["all_rates"] = collected.get(ALL_RATES)
 
         # calculate execution time
         execution_time = time() - start
@@ -39,12 +174,266 @@ class Parser:
 
         return result
 
+    def html(self, result, name=None, attrs=None, **kwargs):
+        """ Parse bank page with parser's engine, keeps only SoupStrainer like target if given """
+        return document.parse(result, name, attrs, engine=self.engine, **kwargs)
+
+    def collect(self, jobs, deadline=None, outcomes=None):
+        """ Run (bank_id, func) jobs through safe_parsing, concurrently if workers > 1.
+
+        Every job gets a time slice of what is left until deadline, jobs not finished in time are
+        abandoned. Returns results by bank_id and list of skipped bank ids, (outcome, seconds) of
+        every job is put into outcomes.
+        """
+        start = time()
+        collected = {}
+        skipped = []
+        outcomes = {} if outcomes is None else outcomes
+
+        if self.workers <= 1 or len(jobs) <= 1:
+            for i, (bank_id, func) in enumerate(jobs):
+                time_slice = None if deadline is None else (deadline - time()) / (len(jobs) - i)
+                collected[bank_id] = self.limited_parsing(func, bank_id, deadline, time_slice, outcomes)
+            skipped = [bank_id for bank_id in collected if collected[bank_id] is SKIPPED]
+        else:
+            workers = min(self.workers, len(jobs))
+            time_slice = None if deadline is None else (deadline - time()) / ceil(len(jobs) / float(workers))
+
+            pool = self.executor if self.executor is not None else ThreadPoolExecutor(max_workers=workers)
+            futures = [(bank_id, pool.submit(self.limited_parsing, func, bank_id, deadline, time_slice, outcomes))
+                       for bank_id, func in jobs]
+            wait([future for _, future in futures], timeout=None if deadline is None else max(deadline - time(), 0))
+            # stragglers are left behind, their fetches are cut by the deadline
+            if pool is not self.executor:
+                pool.shutdown(wait=False)
+
+            for bank_id, future in futures:
+                if future.done() and not future.cancelled() and future.result() is not SKIPPED:
+                    collected[bank_id] = future.result()
+                else:
+                    future.cancel()
+                    skipped.append(bank_id)
+
+        for bank_id in skipped:
+            collected[bank_id] = None
+            if bank_id not in outcomes:
+                outcomes[bank_id] = (schedule.TIMEOUT, time() - start)
+        return collected, skipped
+
+    def limited_parsing(self, func, bank_id, deadline, time_slice, outcomes):
+        """ safe_parsing with fetches limited to the time slice, returns SKIPPED when out of time """
+        start = time()
+        if deadline is not None:
+            deadline = min(deadline, start + time_slice)
+            if deadline <= start:
+                outcomes[bank_id] = (schedule.TIMEOUT, 0)
+                return SKIPPED
+
+        cpu = thread_time()
+        worker_cpu = 0.0
+        with self.profiling(bank_id), self.fetcher.usage() as usage:
+            try:
+                with self.fetcher.time_limit(deadline):
+                    if self.parse_pool is not None:
+                        result, worker_cpu = self.pool_parsing(bank_id, deadline)
+                    else:
+                        result = self.safe_parsing(func, bank_id)
+            except DeadlineExceeded:
+                result = SKIPPED
+
+        elapsed = time() - start
+        outcome = self.outcome(result)
+        outcomes[bank_id] = (outcome, elapsed)
+
+        if self.metrics is not None:
+            self.metrics.record(self.country, bank_id, outcome, {
+                "wall_time": round(elapsed * 1000, 3),
+                "fetch_time": round(usage["seconds"] * 1000, 3),
+                "parse_cpu": round((thread_time() - cpu - usage["cpu"] + worker_cpu) * 1000, 3),
+                "bytes": usage["bytes"],
+                "requests": usage["requests"],
+                "rates": self.rates_count(result),
+                "failed": 0 if outcome == schedule.OK else 1,
+            })
+        return result
+
+    def pool_parsing(self, bank_id, deadline):
+        """ Parses source in the parse pool, pages it needs are downloaded by this thread and sent along.
+
+        Returns (result, cpu seconds of the worker), raises DeadlineExceeded when out of time.
+        """
+        responses = {}
+        cpu = 0.0
+        while True:
+            future = self.parse_pool.submit(self.country, bank_id, responses)
+            try:
+                result, request, used = future.result(timeout=None if deadline is None else max(deadline - time(), 0))
+            except FutureTimeout:
+                future.cancel()
+                raise DeadlineExceeded(bank_id, "parsing not finished before deadline")
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                self.log.error({"msg": "parse pool failed: " + str(e), "country": self.country, "bank_id": bank_id})
+                return None, cpu
+
+            cpu += used
+            if request is None:
+                return result, cpu
+
+            key, link, method, data, timeout, mobile, limit, until = request
+            responses[key] = self.download_page(key, link, method, data, timeout, mobile, limit, until)
+
+    def download_page(self, key, link, method, data, timeout, mobile, limit=None, until=None):
+        """ (body, version) or FetchError of a page, pages are downloaded once per run """
+        def load():
+            try:
+                return self.fetcher.fetch_versioned(link, method, data, timeout, mobile, limit=limit, until=until)
+            except DeadlineExceeded:
+                raise
+            except FetchError as e:
+                return e
+
+        if self.fetcher.documents is None:
+            return load()
+        return self.fetcher.documents.get(("page",) + key, load)
+
+    async def collect_async(self, jobs, fetcher, deadline=None, outcomes=None):
+        """ collect() on the event loop, all jobs run at the same time until deadline """
+        # asyncio is imported by async runs only (not at cold start of lambda & daemon)
+        import asyncio
+
+        start = time()
+        loop = asyncio.get_running_loop()
+        outcomes = {} if outcomes is None else outcomes
+        # responses of the run shared by all jobs (the same page is downloaded once)
+        responses = {}
+        downloads = {}
+
+        pool = self.executor if self.executor is not None else ThreadPoolExecutor(max_workers=max(self.workers, 1))
+        tasks = dict((loop.create_task(self.limited_parsing_async(func, bank_id, pool, fetcher, deadline, outcomes,
+                                                                  responses, downloads)), bank_id)
+                     for bank_id, func in jobs)
+        done = set()
+        if tasks:
+            done, pending = await asyncio.wait(list(tasks), timeout=None if deadline is None else
+                                               max(deadline - time(), 0))
+            for task in pending:
+                task.cancel()
+        # stragglers are left behind, they can't fetch anything after the deadline
+        if pool is not self.executor:
+            pool.shutdown(wait=False)
+
+        collected = {}
+        skipped = []
+        for task, bank_id in tasks.items():
+            if task in done and task.result() is not SKIPPED:
+                collected[bank_id] = task.result()
+            else:
+                skipped.append(bank_id)
+
+        for bank_id in skipped:
+            collected[bank_id] = None
+            if bank_id not in outcomes:
+                outcomes[bank_id] = (schedule.TIMEOUT, time() - start)
+        return collected, skipped
+
+    async def limited_parsing_async(self, func, bank_id, pool, fetcher, deadline, outcomes, responses, downloads):
+        """ limited_parsing of the event loop: func runs in pool with fetches served from responses,
+        when it needs a page not downloaded yet it is suspended, the page is downloaded and func runs again.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        start = time()
+        usage = {"requests": 0, "seconds": 0.0, "bytes": 0, "cpu": 0.0}
+
+        while True:
+            result, request = await loop.run_in_executor(pool, self.served_parsing, func, bank_id, responses, usage)
+            if request is None:
+                break
+            if request.key not in downloads:
+                downloads[request.key] = loop.create_task(self.download(fetcher, request, deadline, responses))
+            usage["requests"] += 1
+            fetch_start = time()
+            usage["bytes"] += await downloads[request.key]
+            usage["seconds"] += time() - fetch_start
+
+        elapsed = time() - start
+        outcome = self.outcome(result)
+        outcomes[bank_id] = (outcome, elapsed)
+
+        if self.metrics is not None:
+            self.metrics.record(self.country, bank_id, outcome, {
+                "wall_time": round(elapsed * 1000, 3),
+                "fetch_time": round(usage["seconds"] * 1000, 3),
+                "parse_cpu": round(usage["cpu"] * 1000, 3),
+                "bytes": usage["bytes"],
+                "requests": usage["requests"],
+                "rates": self.rates_count(result),
+                "failed": 0 if outcome == schedule.OK else 1,
+            })
+        return result
+
+    def served_parsing(self, func, bank_id, responses, usage):
+        """ safe_parsing with fetches served from responses, returns (result, None) or (None, Suspended) """
+        cpu = thread_time()
+        try:
+            with self.profiling(bank_id), self.fetcher.serve(responses):
+                return self.safe_parsing(func, bank_id), None
+        except Suspended as request:
+            return None, request
+        except DeadlineExceeded:
+            return SKIPPED, None
+        finally:
+            usage["cpu"] += thread_time() - cpu
+
+    @staticmethod
+    async def download(fetcher, request, deadline, responses):
+        """ Downloads suspended request into responses (failure is kept as well), returns size of the body """
+        try:
+            response = await fetcher.fetch_versioned(request.link, request.method, request.data, request.timeout,
+                                                     request.mobile, request.limit, request.until, deadline=deadline)
+        except FetchError as e:
+            responses[request.key] = e
+            return 0
+
+        responses[request.key] = response
+        return len(response[0] or "")
+
+    @contextmanager
+    def profiling(self, bank_id):
+        if self.profiler is None:
+            yield
+            return
+        with self.profiler.source(self.country + "/" + bank_id):
+            yield
+
+    @staticmethod
+    def outcome(result):
+        if result is SKIPPED:
+            return schedule.TIMEOUT
+        if result is None:
+            return schedule.ERROR
+        if rate.is_empty(result):
+            return schedule.EMPTY
+        return schedule.OK
+
+    @staticmethod
+    def rates_count(result):
+        """ Number of non zero rates of bank rates or currencies of all rates """
+        if not isinstance(result, dict):
+            return 0
+        return len([value for value in result.values() if value])
+
     def safe_parsing(self, func, bank_id):
         result = None
         try:
             result = func()
             if rate.is_empty(result):
                 raise ParseError("rates are empty")
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             self.log.error({
                 "msg": str(e),
@@ -56,7 +445,7 @@ class Parser:
     @staticmethod
     def remove_nones(rates):
         """ Remove empty rates """
-        for rate in rates:
+        for rate in list(rates):
             if rates[rate] is None:
                 del rates[rate]
         return rates
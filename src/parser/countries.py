@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+
+# Parser of every supported country: module & class name, imported by parser_class() on first use
+PARSERS = {
+    "tj": ("src.parser.tj", "ParserTJ"),
+    "uz": ("src.parser.uz", "ParserUZ"),
+    "kg": ("src.parser.kg", "ParserKG"),
+    "kz": ("src.parser.kz", "ParserKZ"),
+}
+
+# Setting value selecting all supported countries
+ALL = "all"
+
+
+# countries() returns countries of setting: single country, comma separated list (tj,uz) or "all".
+def countries(value):
+    if not value:
+        return []
+    if value.strip() == ALL:
+        return sorted(PARSERS)
+
+    selected = []
+    for country in value.split(","):
+        country = country.strip()
+        if country not in PARSERS:
+            raise ValueError("unknown country '" + country + "'")
+        if country not in selected:
+            selected.append(country)
+    return selected
+
+
+# parser_class() returns parser of country, only its module (and what it imports) is loaded.
+# __import__ (unlike importlib.import_module) is reported by python -X importtime.
+def parser_class(country):
+    module, name = PARSERS[country]
+    return getattr(__import__(module, fromlist=[name]), name)
+
+
+# parse_countries() collects rates of all parsers at the same time, returns results by country.
+# Parsers should share the fetcher session & executor, a failed country is logged and left out.
+# on_result(result) is called as soon as a country is collected (while others are still running).
+def parse_countries(parsers, deadline=None, on_result=None):
+    results = {}
+    if len(parsers) == 1:
+        results[parsers[0].country] = parsers[0].parse_all(deadline=deadline)
+        if on_result is not None:
+            on_result(results[parsers[0].country])
+        return results
+
+    # country runs only wait for their banks, banks are parsed by the shared executor
+    with ThreadPoolExecutor(max_workers=max(len(parsers), 1)) as pool:
+        futures = dict((pool.submit(p.parse_all, deadline=deadline), p) for p in parsers)
+        for future in as_completed(futures):
+            p = futures[future]
+            try:
+                results[p.country] = future.result()
+            except Exception as e:
+                p.error("collection failed: " + str(e))
+                continue
+            if on_result is not None:
+                on_result(results[p.country])
+    return results
+
+
+# parse_countries_async() is parse_countries() on the event loop: all countries share fetcher (AsyncFetcher)
+# downloads, parsing runs in the executor of every parser. on_result(result) is called as soon as a country is
+# collected, a failed country is logged and left out.
+async def parse_countries_async(parsers, fetcher, deadline=None, on_result=None):
+    # asyncio is imported by async runs only (not at cold start of lambda & daemon)
+    import asyncio
+
+    results = {}
+
+    async def parse(p):
+        try:
+            results[p.country] = await p.parse_all_async(fetcher, deadline=deadline)
+        except Exception as e:
+            p.error("collection failed: " + str(e))
+            return
+        if on_result is not None:
+            on_result(results[p.country])
+
+    await asyncio.gather(*[parse(p) for p in parsers])
+    return results
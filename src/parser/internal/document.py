@@ -0,0 +1,141 @@
+import json
+import os
+import re
+
+from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+
+try:
+    import lxml  # noqa: F401 (optional C-backed tree builder)
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# Parsing engines, all of them return BeautifulSoup tree
+HTML_PARSER = "html.parser"  # pure python tree builder (fallback)
+LXML = "lxml"  # C-backed tree builder, falls back to html.parser if lxml is not installed
+SCAN = "scan"  # scans raw html for the target elements and builds tree only for them
+
+ENGINES = (HTML_PARSER, LXML, SCAN)
+# lxml & scan are opt-in (CERP_PARSER_ENGINE or engine of a spec): lxml is not a requirement, so trees of the default
+# engine must not depend on the host, and a partial match of the raw html is not detected by scan
+DEFAULT_ENGINE = os.environ.get('CERP_PARSER_ENGINE', HTML_PARSER)
+
+# comments and scripts are skipped while looking for the end of the target element
+SKIPPED = r'(<!--.*?-->)|(<script\b.*?</script\s*>)'
+ATTRIBUTE = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))')
+
+
+# soup() parses whole document with html.parser (used for xml feeds)
+def soup(result):
+    return BeautifulSoup(result, 'html.parser')
+
+
+# from_json() parses json document
+def from_json(result):
+    return json.loads(result)
+
+
+# parse() builds tree of html page with chosen engine, takes SoupStrainer like target (name, attrs, id=, class_=)
+# when target is given only the matching elements are kept.
+def parse(result, name=None, attrs=None, engine=DEFAULT_ENGINE, **kwargs):
+    if engine not in ENGINES:
+        raise ValueError("unknown parsing engine '" + str(engine) + "'")
+
+    attrs = dict(attrs or {})
+    for key in kwargs:
+        attrs['class' if key == 'class_' else key] = kwargs[key]
+
+    if not name and not attrs:
+        return BeautifulSoup(result, builder(engine))
+
+    strainer = SoupStrainer(name, attrs)
+    if engine == SCAN and isinstance(result, str):
+        fragments = scan(result, name, attrs)
+        if fragments:
+            return BeautifulSoup(fragments, HTML_PARSER, parse_only=strainer)
+
+    return BeautifulSoup(result, builder(engine), parse_only=strainer)
+
+
+# builder() returns BeautifulSoup tree builder for engine
+def builder(engine):
+    if engine == LXML and HAS_LXML:
+        return LXML
+    return HTML_PARSER
+
+
+# scan() returns raw html of the elements matching target, scanning stops after the element with given id.
+def scan(result, name, attrs):
+    tag = re.escape(name) if name else r'[a-zA-Z][\w-]*'
+    opening = re.compile(SKIPPED + r'|<(' + tag + r')(?=[\s>/])[^>]*>', re.I | re.S)
+
+    unique = isinstance(attrs.get('id'), str)
+    needle = attrs['id'] if unique else None
+    if needle is not None and needle not in result:
+        return ""
+
+    fragments = []
+    pos = 0
+    while True:
+        match = opening.search(result, pos)
+        if match is None:
+            break
+
+        pos = match.end()
+        if match.group(1) or match.group(2):
+            continue
+        if needle is not None and needle not in match.group(0):
+            continue
+        if not matches(match.group(0), attrs):
+            continue
+
+        if not match.group(0).endswith('/>'):
+            pos = closing(result, match.group(3), pos)
+        fragments.append(result[match.start():pos])
+        if unique:
+            break
+
+    return "".join(fragments)
+
+
+# matches() checks attributes of the opening tag against the target attrs
+def matches(tag, attrs):
+    if not attrs:
+        return True
+
+    found = {}
+    for m in ATTRIBUTE.finditer(tag):
+        value = m.group(2) if m.group(2) is not None else m.group(3) if m.group(3) is not None else m.group(4)
+        found[m.group(1).lower()] = value
+
+    for key in attrs:
+        if key not in found:
+            return False
+        expected = attrs[key]
+        value = found[key]
+        values = value.split() if key == 'class' else []
+        if hasattr(expected, 'search'):
+            if not expected.search(value) and not any(expected.search(v) for v in values):
+                return False
+        elif expected is not True and expected != value and expected not in values:
+            return False
+
+    return True
+
+
+# closing() returns position right after the end tag of element opened at pos (end of document if not closed)
+def closing(result, name, pos):
+    tags = re.compile(SKIPPED + r'|<(/?)' + re.escape(name) + r'(?=[\s>/])[^>]*>', re.I | re.S)
+    depth = 1
+    for m in tags.finditer(result, pos):
+        if m.group(1) or m.group(2):
+            continue
+        if m.group(3):
+            depth -= 1
+            if depth == 0:
+                return m.end()
+        elif not m.group(0).endswith('/>'):
+            depth += 1
+
+    return len(result)
@@ -1,23 +1,58 @@
 from decimal import Decimal
 
+# Rates are stored as integers: value * SCALE
+SCALE = 10000
+
+# Zeros padding fraction of n digits to 4 digits (fixed point of SCALE)
+PADDING = ("0000", "000", "00", "0", "")
+
+# Digits Decimal keeps exactly (default context precision), longer products are rounded by Decimal first
+PRECISION = 28
+
 
 # from_string() transforms rate value from string
 def from_string(val):
     if isinstance(val, str):
         val = val.replace(" ", "").strip()
-        if ',' in val and '.' in val:
-            # if we have dot '.' and comma ',' -> comma used as thousand separation so ignore it
-            val = val.replace(",", "")
-        else:
-            val = val.replace(",", ".")
+        if ',' in val:
+            if '.' in val:
+                # if we have dot '.' and comma ',' -> comma used as thousand separation so ignore it
+                val = val.replace(",", "")
+            else:
+                val = val.replace(",", ".")
+
+        # plain number (ascii digits with optional fraction) is scaled with integer arithmetic
+        integer, _, fraction = val.partition(".")
+        digits = integer + fraction
+        if digits.isdigit() and digits.isascii() and len(digits) + 4 <= PRECISION:
+            if len(fraction) <= 4:
+                return int(digits + PADDING[len(fraction)])
+            return round_half_even(int(integer + fraction[:4]), fraction[4:])
 
     if val is None or val == "" or val == "–":
         return 0
 
-    val = round(Decimal(val) * 10000)
+    return from_decimal(val)
+
+
+# from_strings() transforms list of rate values, same as from_string() of every value
+def from_strings(values):
+    return list(map(from_string, values))
+
+
+# from_decimal() is the reference conversion: Decimal scaled & rounded half to even
+def from_decimal(val):
+    val = round(Decimal(val) * SCALE)
     return int(val)
 
 
+# round_half_even() rounds scaled value by the dropped fraction digits like round(Decimal)
+def round_half_even(value, rest):
+    if rest[0] > "5" or (rest[0] == "5" and (rest.rstrip("0") != "5" or value & 1)):
+        return value + 1
+    return value
+
+
 # is_empty returns true if bank rates value is empty
 def is_empty(bank_rates):
     for field in bank_rates:
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import re
+from functools import lru_cache
+
+from src.parser.internal import rate_helper as rate
+
+# Currency matchers: (rates key prefix, pattern found in the row text)
+USD_EUR_RUB = (("usd", r'USD'), ("eur", r'EUR'), ("rub", r'RUB'))
+USD_EUR_RUB_KZT = USD_EUR_RUB + (("kzt", r'KZT'),)
+
+# Local names used by banks instead of ISO codes
+RUR = (("usd", r'USD'), ("eur", r'EUR'), ("rub", r'RUR'), ("kzt", r'KZT'))
+RU_NAMES = (("usd", u'Доллар'), ("eur", u'Евро'), ("rub", u'рубль'), ("kzt", u'тенге'))
+
+
+class RowClassifier:
+    """Classifies rows of a rates table by currency.
+
+    All matchers are compiled into one alternation, so every row text is scanned once. Matchers keep
+    their priority: a row naming several currencies (e.g. "EUR/USD") belongs to the first matcher found.
+    """
+
+    def __init__(self, currencies):
+        self.currencies = currencies
+        self.pattern = re.compile("|".join("(?P<%s>%s)" % (key, pattern) for key, pattern in currencies))
+        self.priority = dict((key, index) for index, (key, _) in enumerate(currencies))
+
+    def classify(self, text):
+        """ Returns rates key prefix of the first currency (in matchers order) found in text or None """
+        best = None
+        for m in self.pattern.finditer(text):
+            if best is None or self.priority[m.lastgroup] < self.priority[best]:
+                best = m.lastgroup
+                if self.priority[best] == 0:
+                    break
+        return best
+
+    def rows(self, tags, cells='td', attrs=None):
+        """ Yields (prefix, cells) of currency rows, text & cells of a row are computed once """
+        for tag in tags:
+            prefix = self.classify(tag.text)
+            if prefix is not None:
+                yield prefix, tag.find_all(cells, attrs or {})
+
+    def rates(self, tags, buy, sale, cells='td', attrs=None):
+        """ Collects buy & sale rates of currency rows, later rows override earlier ones """
+        rates = {}
+        for prefix, row in self.rows(tags, cells, attrs):
+            rates[prefix + '_buy'] = rate.from_string(row[buy].getText())
+            rates[prefix + '_sale'] = rate.from_string(row[sale].getText())
+        return rates
+
+
+# classifier() returns shared classifier of currency matchers
+@lru_cache(maxsize=None)
+def classifier(currencies=USD_EUR_RUB):
+    return RowClassifier(currencies)
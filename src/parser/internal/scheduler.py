@@ -0,0 +1,91 @@
+import threading
+from time import time
+
+# Outcomes of a source in a collection run
+OK = "ok"
+EMPTY = "empty"
+ERROR = "error"
+TIMEOUT = "timeout"
+
+
+class Scheduler:
+    """Orders sources of a run by their history and backs off failing ones.
+
+    Per source it keeps the last latencies and the failure streak in a store (see src.store).
+    Slow sources (by p95 latency, unknown ones first) are started first. A source failing
+    `threshold` times in a row is skipped until its next probe, the probe interval doubles
+    with every further failure (from `backoff` up to `max_backoff` seconds).
+    """
+
+    def __init__(self, store, window=50, threshold=3, backoff=300, max_backoff=6 * 3600):
+        self.store = store
+        self.window = window
+        self.threshold = threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lock = threading.Lock()
+
+    def load(self, country):
+        return self.store.get("scheduler:" + country) or {}
+
+    def save(self, country, sources):
+        self.store.set("scheduler:" + country, sources)
+
+    def plan(self, country, jobs, now=None):
+        """ Returns (ordered jobs to run, ids of backed off sources) """
+        now = time() if now is None else now
+        sources = self.load(country)
+
+        run = []
+        backed_off = []
+        for bank_id, func in jobs:
+            source = sources.get(bank_id)
+            if source and source["failures"] >= self.threshold and now < source["next_probe"]:
+                backed_off.append(bank_id)
+            else:
+                run.append((bank_id, func))
+
+        # slowest first, never seen sources are treated as slowest
+        run.sort(key=lambda job: -self.percentile(sources.get(job[0]), 95, default=float("inf")))
+        return run, backed_off
+
+    def record(self, country, outcomes, now=None):
+        """ Updates history with {bank_id: (outcome, seconds)} of a run """
+        now = time() if now is None else now
+        with self.lock:
+            sources = self.load(country)
+            for bank_id in outcomes:
+                outcome, seconds = outcomes[bank_id]
+                source = sources.setdefault(bank_id, {"latencies": [], "failures": 0, "next_probe": 0})
+                source["latencies"] = (source["latencies"] + [round(seconds, 3)])[-self.window:]
+
+                # running out of run time says nothing about the source
+                if outcome == TIMEOUT:
+                    continue
+
+                if outcome == OK:
+                    source["failures"] = 0
+                    source["next_probe"] = 0
+                else:
+                    source["failures"] += 1
+                    if source["failures"] >= self.threshold:
+                        delay = self.backoff * 2 ** (source["failures"] - self.threshold)
+                        source["next_probe"] = now + min(delay, self.max_backoff)
+            self.save(country, sources)
+
+    def stats(self, country):
+        """ p50/p95 latency and failure streak of every known source """
+        sources = self.load(country)
+        return dict((bank_id, {
+            "p50": self.percentile(sources[bank_id], 50),
+            "p95": self.percentile(sources[bank_id], 95),
+            "failures": sources[bank_id]["failures"],
+            "next_probe": sources[bank_id]["next_probe"],
+        }) for bank_id in sources)
+
+    @staticmethod
+    def percentile(source, p, default=None):
+        if not source or not source["latencies"]:
+            return default
+        latencies = sorted(source["latencies"])
+        return latencies[min(len(latencies) - 1, int(round(p / 100.0 * (len(latencies) - 1))))]
@@ -0,0 +1,94 @@
+from src.parser import base
+from src.parser.internal import document
+from src.parser.internal import rows as row_helper
+from src.parser.internal.rows import USD_EUR_RUB
+
+
+# selector() normalizes SoupStrainer like selector: 'tag', {attrs} or ('tag', {attrs})
+def selector(value):
+    if value is None:
+        return None, {}
+    if isinstance(value, str):
+        return value, {}
+    if isinstance(value, dict):
+        return None, value
+    return value[0], value[1]
+
+
+class TableSpec:
+    """Declarative description of a bank page where every currency is a row.
+
+    Attributes:
+        url -- page with rates
+        container -- element holding the rates (None parses whole page)
+        within -- optional element inside container, the first match is used
+        rows -- row selector, one row per currency
+        cells -- cell selector inside a row
+        buy, sale -- indexes of buy & sale cells
+        currencies -- (key prefix, pattern) matchers of the row text
+        mobile -- fetch page with mobile user agent
+        engine -- parsing engine of the page (see document.ENGINES), None uses engine of the parser
+        limit -- max bytes of the page read (streamed fetch), None reads whole page
+        until -- end marker(s) of the container, reading stops right after them (see Fetcher.fetch_versioned),
+                 when no rates are found in the partly read page the whole page is fetched
+        active -- inactive banks are not collected by parse_all
+    """
+
+    def __init__(self, url, container=None, within=None, rows='tr', cells='td', buy=1, sale=2,
+                 currencies=USD_EUR_RUB, mobile=False, engine=None, limit=None, until=None, active=True):
+        self.url = url
+        self.container = selector(container)
+        self.within = selector(within) if within is not None else None
+        self.rows = selector(rows)
+        self.cells = selector(cells)
+        self.buy = buy
+        self.sale = sale
+        self.mobile = mobile
+        self.engine = engine
+        self.limit = limit
+        self.until = until
+        self.active = active
+        # parse functions of fetch_document by engine (see extractor)
+        self.extractors = {}
+
+        # one alternation for all currencies, the matched group name is the rates key prefix
+        self.classifier = row_helper.classifier(tuple(currencies))
+
+    def extract(self, fetcher, engine=document.DEFAULT_ENGINE):
+        """ Rates of the page, rates extracted from a page not modified since the last run are reused """
+        extract = self.extractor(engine)
+        if self.limit is None and self.until is None:
+            return dict(fetcher.fetch_document(self.url, extract, mobile=self.mobile))
+
+        try:
+            rates = fetcher.fetch_document(self.url, extract, mobile=self.mobile, limit=self.limit, until=self.until)
+        except base.ParseError:
+            rates = None
+        if rates:
+            return dict(rates)
+
+        # container is cut off the partly read page (markers matched elsewhere, limit too small): read whole page
+        return dict(fetcher.fetch_document(self.url, extract, mobile=self.mobile))
+
+    def extractor(self, engine):
+        """ Parse function extracting rates with engine, the same function for the same engine (cache key) """
+        extract = self.extractors.get(engine)
+        if extract is None:
+            extract = self.extractors[engine] = lambda result: self.rates(result, engine)
+        return extract
+
+    def rates(self, result, engine=document.DEFAULT_ENGINE):
+        """ Rates of the fetched page """
+        try:
+            context = document.parse(result, self.container[0], self.container[1], engine=self.engine or engine)
+            if self.within is not None:
+                context = context.find_all(self.within[0], self.within[1])[0]
+
+            tags = context.find_all(self.rows[0], self.rows[1])
+            if tags:
+                return self.classifier.rates(tags, self.buy, self.sale, self.cells[0], self.cells[1])
+
+            else:
+                raise base.ParseError("rates not found")
+        except Exception as e:
+            raise base.ParseError(getattr(e, 'message', str(e)))
@@ -4,26 +4,72 @@
 import json
 import re
 
-from bs4 import BeautifulSoup
-from bs4 import SoupStrainer
-
 from src.parser import base
 from src.parser.internal import currency
+from src.parser.internal import document
 from src.parser.internal import rate_helper as rate
+from src.parser.internal import rows
+from src.parser.internal.spec import TableSpec
 
 
 class ParserKG(base.Parser):
     country = "kg"
-
-    def __init__(self, logger, fetcher):
-        base.Parser.__init__(self, self.country, logger, fetcher)
+    national_bank = "kg_nbkr"
+
+    # banks with one row per currency
+    specs = {
+        "kg_bta": TableSpec(
+            "http://www.btabank.kg/ru/", container={'id': "cur_1"}, currencies=rows.USD_EUR_RUB_KZT
+        ),
+        "kg_baitushum": TableSpec(
+            "http://www.baitushum.kg/en/", container={'id': "rates-widget"},
+            within=('div', {'class': re.compile(r'rates')}), rows='li', cells='span', buy=0, sale=1,
+            currencies=rows.USD_EUR_RUB_KZT
+        ),
+        "kg_bankasia": TableSpec(
+            "http://www.bankasia.kg/", container={'id': "home"}, currencies=rows.USD_EUR_RUB_KZT
+        ),
+        "kg_ab": TableSpec(
+            "http://www.ab.kg/ru/", container=('div', {'class': re.compile(r'course')}),
+            within=('table', {'class': 'course__table'}), currencies=rows.USD_EUR_RUB_KZT
+        ),
+        "kg_capital": TableSpec(
+            "http://www.capitalbank.kg/", container={'id': "block-views-arhiv-kursov-valyut-block-1"},
+            buy=2, sale=4, currencies=rows.RUR
+        ),
+        "kg_doscredo": TableSpec(
+            "https://www.dcb.kg/en/", container={'id': "cash"}, rows=('div', {'class': 'grid-price'}),
+            cells=('div', {'class': 'grid-item'}), currencies=rows.USD_EUR_RUB_KZT, mobile=True
+        ),
+        "kg_rsk": TableSpec(
+            "http://www.rsk.kg/", container=('div', {'class': re.compile(r'course-item')}), within='div',
+            rows=('div', {'class': 'item'}), cells='div', currencies=rows.USD_EUR_RUB_KZT
+        ),
+        "kg_optimabank": TableSpec(
+            "https://www.optimabank.kg/en/currency-rates.html?view=default",
+            container=('table', {'class': 'currency_table'}), within=('table', {'class': 'currency_table'}),
+            currencies=rows.RU_NAMES
+        ),
+        "kg_rib": TableSpec(
+            "http://www.rib.kg/", container={'id': "rosin"}, currencies=rows.USD_EUR_RUB_KZT
+        ),
+        "kg_kkb": TableSpec(
+            "http://kkb.kg/", container={'id': "tab1"}, currencies=rows.USD_EUR_RUB_KZT
+        ),
+        # doesn't work
+        "kg_kompanion": TableSpec(
+            "http://www.kompanion.kg/", container={'id': "nal"}, currencies=rows.USD_EUR_RUB_KZT, active=False
+        ),
+    }
+
+    def __init__(self, logger, fetcher, **kwargs):
+        base.Parser.__init__(self, self.country, logger, fetcher, **kwargs)
 
     # 1. Parse National Bank of Kyrgystan (api)
     def parse_nbkr(self, for_all=False):
-        result = self.fetcher.fetch("http://www.nbkr.kg/XML/daily.xml")
+        context = self.fetcher.fetch_document("http://www.nbkr.kg/XML/daily.xml", document.soup)
 
         try:
-            context = BeautifulSoup(result, 'html.parser')
             tags = context.find_all('currency')
             if tags:
                 rates = {}
@@ -67,7 +113,7 @@ class ParserKG(base.Parser):
         )
 
         try:
-            context = BeautifulSoup(result, 'html.parser')
+            context = document.soup(result)
             tags = context.find_all('currency')
             if tags:
                 for i in range(len(tags)):
@@ -93,51 +139,14 @@ class ParserKG(base.Parser):
 
     # 2. Parse BTA Bank (web page)
     def parse_bta(self):
-        result = self.fetcher.fetch("http://www.btabank.kg/ru/")
-
-        try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id="cur_1"))
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'KZT', tag.text):
-                        rates['kzt_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['kzt_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kg_bta")
 
     # 3. Parse Demir Bank (web page)
     def parse_demir(self):
         result = self.fetcher.fetch("http://www.demirbank.kg/ru/retail/home")
 
         try:
-            context = BeautifulSoup(
-                result,
-                "html.parser",
-                parse_only=SoupStrainer('div', {'class': re.compile(r'pricing-table')})
-            )
+            context = self.html(result, 'div', {'class': re.compile(r'pricing-table')})
             script = context.find("script").text
             pattern = re.compile("var currencies = (.*);")
             m = pattern.search(script).groups()[0]
@@ -171,110 +180,21 @@ class ParserKG(base.Parser):
 
     # 4. Parse Baitushum Bank (web page)
     def parse_baitushum(self):
-        result = self.fetcher.fetch("http://www.baitushum.kg/en/")
-
-        try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id="rates-widget"))
-            tags = context.find_all('div', {'class': re.compile(r'rates')})[0]
-            tags = tags.find_all('li')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('span')[0].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('span')[1].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('span')[0].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('span')[1].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('span')[0].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('span')[1].getText())
-                        continue
-
-                    if re.search(r'KZT', tag.text):
-                        rates['kzt_buy'] = rate.from_string(tag.findChildren('span')[0].getText())
-                        rates['kzt_sale'] = rate.from_string(tag.findChildren('span')[1].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kg_baitushum")
 
     # 5. Parse Bank Asia (web page)
     def parse_bankasia(self):
-        result = self.fetcher.fetch("http://www.bankasia.kg/")
-
-        try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id="home"))
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'KZT', tag.text):
-                        rates['kzt_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['kzt_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kg_bankasia")
 
     # 6. Parse Bank Kicb (web page)
     def parse_kicb(self):
         result = self.fetcher.fetch("http://en.kicb.net/curency")
 
         try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id="head"))
+            context = self.html(result, id="head")
             tags = context.find_all('tr')[2].find_all('td')[0].find_all('table')
             if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'KZT', tag.text):
-                        rates['kzt_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['kzt_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                return rates
+                return rows.classifier(rows.USD_EUR_RUB_KZT).rates(tags, 1, 2)
 
             else:
                 raise base.ParseError("rates not found")
@@ -283,138 +203,22 @@ class ParserKG(base.Parser):
 
     # 7. Parse Ail Bank (web page)
     def parse_ab(self):
-        result = self.fetcher.fetch("http://www.ab.kg/ru/")
-
-        try:
-            context = BeautifulSoup(
-                result,
-                "html.parser",
-                parse_only=SoupStrainer('div', {'class': re.compile(r'course')})
-            )
-            context = context.find_all('table', class_='course__table')[0]
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'KZT', tag.text):
-                        rates['kzt_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['kzt_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kg_ab")
 
     # 8. Parse Capital bank (web page)
     def parse_capitalbank(self):
-        result = self.fetcher.fetch("http://www.capitalbank.kg/")
-
-        try:
-            context = BeautifulSoup(
-                result,
-                "html.parser",
-                parse_only=SoupStrainer(id="block-views-arhiv-kursov-valyut-block-1")
-            )
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[4].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[4].getText())
-                        continue
-
-                    if re.search(r'RUR', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[4].getText())
-                        continue
-
-                    if re.search(r'KZT', tag.text):
-                        rates['kzt_buy'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        rates['kzt_sale'] = rate.from_string(tag.findChildren('td')[4].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kg_capital")
 
     # 9. Parse Doscredobank (web page)
     def parse_doscredo(self):
-        result = self.fetcher.fetch("https://www.dcb.kg/en/", mobile=True)
-
-        try:
-            context = BeautifulSoup(
-                result,
-                "html.parser",
-                parse_only=SoupStrainer(id="cash")
-            )
-            tags = context.find_all('div', class_='grid-price')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        divs = tag.find_all('div', class_='grid-item')
-                        rates['usd_buy'] = rate.from_string(divs[1].getText())
-                        rates['usd_sale'] = rate.from_string(divs[2].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        divs = tag.find_all('div', class_='grid-item')
-                        rates['eur_buy'] = rate.from_string(divs[1].getText())
-                        rates['eur_sale'] = rate.from_string(divs[2].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        divs = tag.find_all('div', class_='grid-item')
-                        rates['rub_buy'] = rate.from_string(divs[1].getText())
-                        rates['rub_sale'] = rate.from_string(divs[2].getText())
-                        continue
-
-                    if re.search(r'KZT', tag.text):
-                        divs = tag.find_all('div', class_='grid-item')
-                        rates['kzt_buy'] = rate.from_string(divs[1].getText())
-                        rates['kzt_sale'] = rate.from_string(divs[2].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kg_doscredo")
 
     # 10. Parse Сbk bank (web page)
     def parse_cbk(self):
         result = self.fetcher.fetch("http://www.cbk.kg/")
 
         try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id="rates-table"))
+            context = self.html(result, id="rates-table")
             usd = context.find_all("tr", class_="usd")[0].findChildren('td')
             eur = context.find_all("tr", class_="euro")[0].findChildren('td')
             rub = context.find_all("tr", class_="rub")[0].findChildren('td')
@@ -436,218 +240,39 @@ class ParserKG(base.Parser):
 
     # 11. Parse Rsk bank (web page)
     def parse_rsk(self):
-        result = self.fetcher.fetch("http://www.rsk.kg/")
-
-        try:
-            context = BeautifulSoup(
-                result,
-                "html.parser",
-                parse_only=SoupStrainer('div', {'class': re.compile(r'course-item')})
-            )
-            tags = context.find_all('div')[0]
-            tags = tags.find_all("div", class_="item")
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('div')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('div')[2].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('div')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('div')[2].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('div')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('div')[2].getText())
-                        continue
-
-                    if re.search(r'KZT', tag.text):
-                        rates['kzt_buy'] = rate.from_string(tag.findChildren('div')[1].getText())
-                        rates['kzt_sale'] = rate.from_string(tag.findChildren('div')[2].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kg_rsk")
 
     # 12. Parse Optima bank (web page)
     def parse_optimabank(self):
-        result = self.fetcher.fetch("https://www.optimabank.kg/en/currency-rates.html?view=default")
-
-        try:
-            context = BeautifulSoup(
-                result,
-                "html.parser",
-                parse_only=SoupStrainer('table', {'class': 'currency_table'})
-            )
-            tags = context.find_all()
-            tags = tags[0].find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'Доллар', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'Евро', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'рубль', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'тенге', tag.text):
-                        rates['kzt_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['kzt_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kg_optimabank")
 
     # 13. Parse Rib (web page)
     def parse_rib(self):
-        result = self.fetcher.fetch("http://www.rib.kg/")
-
-        try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id="rosin"))
-            tags = context.find_all("tr")
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'KZT', tag.text):
-                        rates['kzt_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['kzt_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kg_rib")
 
     # 14. Parse Kkb bank (web page)
     def parse_kkb(self):
-        result = self.fetcher.fetch("http://kkb.kg/")
-
-        try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id="tab1"))
-            tags = context.find_all("tr")
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'KZT', tag.text):
-                        rates['kzt_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['kzt_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kg_kkb")
 
     # 15. Parse Kompanion bank (web page)
     def parse_kompanion(self):
-        result = self.fetcher.fetch("http://www.kompanion.kg/")
-
-        try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id="nal"))
-            tags = context.find_all("tr")
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'KZT', tag.text):
-                        rates['kzt_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['kzt_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kg_kompanion")
+
+    # bank_rate_functions returns rates collecting function of each bank
+    def bank_rate_functions(self):
+        functions = self.spec_functions()
+        functions.update({
+            "kg_nbkr": self.parse_nbkr,
+            "kg_demir": self.parse_demir,
+            "kg_kicb": self.parse_kicb,
+            "kg_cbk": self.parse_cbk,
+        })
+        return functions
+
+    # all_rates_function returns function collecting all rates of the national bank
+    def all_rates_function(self):
+        return self.parse_nbkr_all
 
     # parse_all collects all rates for Kyrgystan
-    def parse_all(self):
-        return self.handle_execute(
-            {
-                "kg_nbkr": self.parse_nbkr,
-                "kg_bta": self.parse_bta,
-                "kg_demir": self.parse_demir,
-                "kg_baitushum": self.parse_baitushum,
-                "kg_bankasia": self.parse_bankasia,
-                "kg_kicb": self.parse_kicb,
-                "kg_ab": self.parse_ab,
-                "kg_capital": self.parse_capitalbank,
-                "kg_doscredo": self.parse_doscredo,
-                "kg_cbk": self.parse_cbk,
-                "kg_rsk": self.parse_rsk,
-                "kg_optimabank": self.parse_optimabank,
-                "kg_rib": self.parse_rib,
-                "kg_kkb": self.parse_kkb,
-                # "kg_kompanion": self.parse_kompanion, - doesn't work
-            },
-            self.parse_nbkr_all
-        )
+    def parse_all(self, deadline=None):
+        return self.handle_execute(self.bank_rate_functions(), self.parse_nbkr_all, deadline=deadline)
@@ -3,28 +3,51 @@
 
 import re
 
-from bs4 import BeautifulSoup
-from bs4 import SoupStrainer
-
 from src.parser import base
 from src.parser.internal import currency
+from src.parser.internal import document
 from src.parser.internal import rate_helper as rate
+from src.parser.internal.spec import TableSpec
 
 
 class ParserKZ(base.Parser):
     country = "kz"
-
-    def __init__(self, logger, fetcher):
-        base.Parser.__init__(self, self.country, logger, fetcher)
+    national_bank = "kz_nbk"
+
+    # banks with one row per currency
+    specs = {
+        "kz_qazaqbanki": TableSpec("http://qazaqbanki.kz/rus/", container={'id': "currency-41"}),
+        "kz_atfbank": TableSpec(
+            "https://www.atfbank.kz/", container=('table', {'class': re.compile(r'rate-tb')}),
+            limit=1024 * 1024, until=('class="rate-tb', "</table>")
+        ),
+        "kz_bankrbk": TableSpec(
+            "https://www.bankrbk.kz/rus", container=('div', {'class': re.compile(r'exchange')}), sale=3
+        ),
+        # todo: is it alive ?
+        "kz_bcc": TableSpec(
+            "https://www.bcc.kz/about/kursy-valyut/", container=('div', {'class': re.compile(r'bcc_full')}),
+            buy=0, sale=1
+        ),
+        "kz_eubank": TableSpec(
+            "https://www.eubank.kz/", container=('div', {'class': re.compile(r'exchange')}), within='table'
+        ),
+        "kz_qazkom": TableSpec("http://www.qazkom.kz/", container={'id': "KAZKOM"}),
+        # todo: is it alive ?
+        "kz_expocredit": TableSpec("http://expocredit.kz/", container={'id': "quotes_tab_1"}),
+    }
+
+    def __init__(self, logger, fetcher, **kwargs):
+        base.Parser.__init__(self, self.country, logger, fetcher, **kwargs)
 
     # 1. Parse National Bank of Kazakhstan (api)
     def parse_nbk(self):
-        result = self.fetcher.fetch(
-            "http://www.nationalbank.kz/rss/rates_all.xml"
+        context = self.fetcher.fetch_document(
+            "http://www.nationalbank.kz/rss/rates_all.xml",
+            document.soup
         )
 
         try:
-            context = BeautifulSoup(result, 'html.parser')
             tags = context.find_all('item')
             if tags:
                 rates = {}
@@ -48,12 +71,12 @@ class ParserKZ(base.Parser):
             raise base.ParseError(e.message)
 
     def parse_nbk_all(self):
-        result = self.fetcher.fetch(
-            "http://www.nationalbank.kz/rss/rates_all.xml"
+        context = self.fetcher.fetch_document(
+            "http://www.nationalbank.kz/rss/rates_all.xml",
+            document.soup
         )
 
         try:
-            context = BeautifulSoup(result, 'html.parser')
             tags = context.find_all('item')
             if tags:
                 rates = {}
@@ -85,7 +108,7 @@ class ParserKZ(base.Parser):
         )
 
         try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id="exchange-11"))
+            context = self.html(result, id="exchange-11")
             tags = context.find_all('tr')
             if tags:
 
@@ -110,7 +133,7 @@ class ParserKZ(base.Parser):
         )
 
         try:
-            context = BeautifulSoup(result, "html.parser")
+            context = self.html(result)
             usd = context.find_all('usd')
             eur = context.find_all('eur')
             rub = context.find_all('rur')
@@ -129,113 +152,15 @@ class ParserKZ(base.Parser):
 
     # 4. Parse Qazaqbanki (web page)
     def parse_qazaqbanki(self):
-        result = self.fetcher.fetch(
-            "http://qazaqbanki.kz/rus/"
-        )
-
-        try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id="currency-41"))
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kz_qazaqbanki")
 
     # 5. Parse Atfbank (web page)
     def parse_atfbank(self):
-        result = self.fetcher.fetch(
-            "https://www.atfbank.kz/"
-        )
-
-        try:
-            context = BeautifulSoup(
-                result,
-                "html.parser",
-                parse_only=SoupStrainer('table', {'class': re.compile(r'rate-tb')})
-            )
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kz_atfbank")
 
     # 6. Parse RBK Bank (web page)
     def parse_bankrbk(self):
-        result = self.fetcher.fetch(
-            "https://www.bankrbk.kz/rus"
-        )
-
-        try:
-            context = BeautifulSoup(
-                result,
-                "html.parser",
-                parse_only=SoupStrainer('div', {'class': re.compile(r'exchange')})
-            )
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[3].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[3].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[3].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kz_bankrbk")
 
     # 7. Parse Bankastana (web page)
     def parse_bankastana(self):
@@ -244,7 +169,7 @@ class ParserKZ(base.Parser):
         )
 
         try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id="exchange_21"))
+            context = self.html(result, id="exchange_21")
             tags = context.find_all('tr')
             if tags:
                 rates = {}
@@ -274,147 +199,19 @@ class ParserKZ(base.Parser):
 
     # 8. Parse Bcc (web page) todo: is it alive ?
     def parse_bcc(self):
-        result = self.fetcher.fetch(
-            "https://www.bcc.kz/about/kursy-valyut/"
-        )
-
-        try:
-            context = BeautifulSoup(
-                result,
-                "html.parser",
-                parse_only=SoupStrainer('div', {'class': re.compile(r'bcc_full')})
-            )
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[0].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[0].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[0].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kz_bcc")
 
     # 9. Parse Expocredit Bank (web page) todo: is it alive ?
     def parse_expocredit(self):
-        result = self.fetcher.fetch(
-            "http://expocredit.kz/"
-        )
-
-        try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id="quotes_tab_1"))
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kz_expocredit")
 
     # 10. Parse Eubank (web page)
     def parse_eubank(self):
-        result = self.fetcher.fetch(
-            "https://www.eubank.kz/"
-        )
-
-        try:
-            context = BeautifulSoup(
-                result,
-                "html.parser",
-                parse_only=SoupStrainer('div', {'class': re.compile(r'exchange')})
-            )
-            tags = context.find_all('table')[0].find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kz_eubank")
 
     # 11. Parse Qazkom Bank (web page)
     def parse_qazkom(self):
-        result = self.fetcher.fetch(
-            "http://www.qazkom.kz/"
-        )
-
-        try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id="KAZKOM"))
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-
-                return rates
-
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("kz_qazkom")
 
     # 12. Parse Tsb Bank (web page)
     def parse_tsb(self):
@@ -423,7 +220,7 @@ class ParserKZ(base.Parser):
         )
 
         try:
-            context = BeautifulSoup(result, 'html.parser')
+            context = self.html(result)
 
             return {
                 'usd_buy': rate.from_string(context.find('usd_buy').text),
@@ -444,11 +241,7 @@ class ParserKZ(base.Parser):
         )
 
         try:
-            context = BeautifulSoup(
-                result,
-                "html.parser",
-                parse_only=SoupStrainer('div', {'class': re.compile(r'kursy_valyut')})
-            )
+            context = self.html(result, 'div', {'class': re.compile(r'kursy_valyut')})
             tags = context.find_all("div", class_="row")[1].find_all('ul')
             if tags:
                 rates = {}
@@ -484,23 +277,23 @@ class ParserKZ(base.Parser):
         except Exception as e:
             raise base.ParseError(e.message)
 
+    # bank_rate_functions returns rates collecting function of each bank
+    def bank_rate_functions(self):
+        functions = self.spec_functions()
+        functions.update({
+            "kz_nbk": self.parse_nbk,
+            "kz_asiacreditbank": self.parse_asiacreditbank,
+            "kz_deltabank": self.parse_deltabank,
+            "kz_bankastana": self.parse_bankastana,
+            "kz_tsb": self.parse_tsb,
+            "kz_capitalbank": self.parse_capitalbank,
+        })
+        return functions
+
+    # all_rates_function returns function collecting all rates of the national bank
+    def all_rates_function(self):
+        return self.parse_nbk_all
+
     # parse_all collects all rates for Tajikistan
-    def parse_all(self):
-        return self.handle_execute(
-            {
-                "kz_nbk": self.parse_nbk,
-                "kz_asiacreditbank": self.parse_asiacreditbank,
-                "kz_deltabank": self.parse_deltabank,
-                "kz_qazaqbanki": self.parse_qazaqbanki,
-                "kz_atfbank": self.parse_atfbank,
-                "kz_bankrbk": self.parse_bankrbk,
-                "kz_bankastana": self.parse_bankastana,
-                "kz_bcc": self.parse_bcc,
-                "kz_eubank": self.parse_eubank,
-                "kz_qazkom": self.parse_qazkom,
-                "kz_tsb": self.parse_tsb,
-                "kz_capitalbank": self.parse_capitalbank,
-                "kz_expocredit": self.parse_expocredit,
-            },
-            self.parse_nbk_all
-        )
+    def parse_all(self, deadline=None):
+        return self.handle_execute(self.bank_rate_functions(), self.parse_nbk_all, deadline=deadline)
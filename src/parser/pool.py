@@ -0,0 +1,77 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from time import thread_time
+
+from src.fetcher import Fetcher
+from src.fetcher.cache import MemoryHttpCache
+from src.fetcher.fetcher import Suspended
+from src.parser import base
+from src.parser.countries import parser_class
+from src.parser.internal import document
+
+# Parsers of the worker process by country (created by warm)
+_parsers = {}
+
+
+# warm() imports parser modules of countries and creates their parsers (initializer of worker processes).
+# Parsers keep documents parsed by the worker next to versions of the served pages: a page not modified since the
+# last run is not parsed again when the same worker gets its source.
+def warm(countries, engine=document.DEFAULT_ENGINE):
+    for country in countries:
+        if country not in _parsers:
+            _parsers[country] = parser_class(country)(logging.getLogger(), Fetcher(http_cache=MemoryHttpCache()),
+                                                      workers=1, engine=engine)
+    return os.getpid()
+
+
+# parse_source() runs parsing function of a source in the worker with fetches served from responses.
+# Returns (result, request, cpu seconds): request is (key, link, method, data, timeout, mobile, limit, until) of a page
+# missing in responses (result None), the caller downloads it and calls parse_source again.
+def parse_source(country, bank_id, responses):
+    parser = _parsers[country]
+    functions = parser.bank_rate_functions()
+    functions[base.ALL_RATES] = parser.all_rates_function()
+
+    cpu = thread_time()
+    try:
+        with parser.fetcher.serve(responses):
+            return parser.safe_parsing(functions[bank_id], bank_id), None, thread_time() - cpu
+    except Suspended as e:
+        return None, (e.key, e.link, e.method, e.data, e.timeout, e.mobile, e.limit, e.until), \
+            thread_time() - cpu
+
+
+class ParsePool:
+    """Process pool parsing bank pages on all cores.
+
+    Pages are downloaded by the collecting threads of the parser (see Parser.pool_parsing) and sent to a
+    worker, only the extracted rates come back. Workers import parser modules of the countries and create
+    their parsers when they start (start() waits for all of them). Sources are run by id, only functions
+    of bank_rate_functions() and all_rates_function() can be parsed by the pool. Parsed documents of
+    pages not modified since the last run are reused per worker (each worker keeps its own).
+
+    Attributes:
+        countries -- countries parsed by the pool
+        workers -- number of worker processes (default number of cores)
+        engine -- parsing engine of worker parsers (see document.ENGINES)
+    """
+
+    def __init__(self, countries, workers=None, engine=document.DEFAULT_ENGINE):
+        self.countries = list(countries)
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warm,
+                                            initargs=(self.countries, engine))
+
+    def start(self):
+        """ Starts workers ahead of the first run (they warm up on start), returns pids of workers that answered """
+        futures = [self.executor.submit(os.getpid) for _ in range(self.workers)]
+        wait(futures)
+        return sorted(set(future.result() for future in futures))
+
+    def submit(self, country, bank_id, responses):
+        return self.executor.submit(parse_source, country, bank_id, responses)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,59 @@
+import json
+import os
+
+from src.fetcher.replay import REPLAY
+from src.fetcher.replay import ReplayFetcher
+from src.parser import base
+from src.parser.countries import parser_class
+
+# Fixture corpus of every country: fixtures/<country>/ (recorded responses & golden outputs)
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "fixtures")
+
+
+# corpus() returns fixture directory of the country
+def corpus(country, fixtures=FIXTURES):
+    return os.path.join(fixtures, country)
+
+
+# replay_parser() returns parser of the country fetching from its fixture corpus
+def replay_parser(country, logger, mode=REPLAY, fixtures=FIXTURES, **kwargs):
+    return parser_class(country)(logger, ReplayFetcher(corpus(country, fixtures), mode), **kwargs)
+
+
+# outputs() returns result (or error) of every bank function and all rates of the parser
+def outputs(parser):
+    functions = parser.bank_rate_functions()
+    functions[base.ALL_RATES] = parser.all_rates_function()
+
+    results = {}
+    for bank_id in sorted(functions):
+        try:
+            results[bank_id] = functions[bank_id]()
+        except Exception as e:
+            results[bank_id] = {"error": str(getattr(e, 'message', e))}
+    # same form as loaded from golden file
+    return json.loads(json.dumps(results))
+
+
+def golden_path(country, fixtures=FIXTURES):
+    return os.path.join(corpus(country, fixtures), "golden.json")
+
+
+# load_golden() returns golden outputs of the country or None if not recorded
+def load_golden(country, fixtures=FIXTURES):
+    try:
+        with open(golden_path(country, fixtures)) as f:
+            return json.load(f)
+    except IOError:
+        return None
+
+
+def save_golden(country, results, fixtures=FIXTURES):
+    os.makedirs(corpus(country, fixtures), exist_ok=True)
+    with open(golden_path(country, fixtures), "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+# changed() returns ids of sources whose output differs from golden
+def changed(golden, results):
+    return sorted(bank_id for bank_id in set(golden) | set(results) if golden.get(bank_id) != results.get(bank_id))
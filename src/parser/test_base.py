@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.fetcher import Fetcher
+from src.fetcher import FetchError
+from src.parser import ParserKZ
+from src.parser import base
+
+
+class FakeParser(base.Parser):
+    country = "tj"
+
+    def __init__(self, **kwargs):
+        base.Parser.__init__(self, self.country, logging.getLogger(), Fetcher(), **kwargs)
+
+    @staticmethod
+    def slow(value, delay=0.2):
+        def func():
+            time.sleep(delay)
+            return {"usd_buy": value, "usd_sale": value}
+        return func
+
+    @staticmethod
+    def broken():
+        raise base.ParseError("rates not found")
+
+    def parse_all(self):
+        return self.handle_execute(
+            {
+                "tj_a": self.slow(1),
+                "tj_b": self.slow(2),
+                "tj_c": self.slow(3),
+                "tj_broken": self.broken,
+                "tj_empty": lambda: None,
+            },
+            lambda: {"USD": {"code": "USD", "nominal": 1, "value": 4}}
+        )
+
+
+class CountingFetcher(Fetcher):
+    body = """<rss><channel>
+        <item><title>USD</title><description>470.5</description><quant>1</quant></item>
+        <item><title>EUR</title><description>510.25</description><quant>1</quant></item>
+        <item><title>RUB</title><description>6.1</description><quant>1</quant></item>
+    </channel></rss>"""
+
+    def __init__(self):
+        Fetcher.__init__(self)
+        self.calls = 0
+
+    def fetch_versioned(self, link, method="GET", data=None, timeout=10, mobile=False, limit=None, until=None):
+        self.calls += 1
+        time.sleep(0.1)
+        return self.body, None
+
+
+class TestHandleExecute(unittest.TestCase):
+
+    def test_concurrent_run(self):
+        start = time.time()
+        result = FakeParser(workers=8).parse_all()
+        elapsed = time.time() - start
+
+        # close to the slowest bank, not the sum of all banks
+        self.assertLess(elapsed, 0.5)
+        self.assert_result(result)
+
+    def test_sequential_run(self):
+        start = time.time()
+        result = FakeParser(workers=1).parse_all()
+        elapsed = time.time() - start
+
+        self.assertGreaterEqual(elapsed, 0.6)
+        self.assert_result(result)
+
+    def test_national_bank_fetched_once(self):
+        fetcher = CountingFetcher()
+        parser = ParserKZ(logging.getLogger(), fetcher)
+        result = parser.handle_execute({"kz_nbk": parser.parse_nbk}, parser.parse_nbk_all)
+
+        self.assertEqual(fetcher.calls, 1)
+        self.assertEqual(result["bank_rates"]["kz_nbk"]["usd_buy"], 4705000)
+        self.assertEqual(result["all_rates"]["EUR"]["value"], 5102500)
+
+        # no caching outside of a run
+        parser.parse_nbk()
+        parser.parse_nbk()
+        self.assertEqual(fetcher.calls, 3)
+
+    def test_deadline(self):
+        parser = FakeParser(workers=8)
+        start = time.time()
+        result = parser.handle_execute(
+            {"tj_a": parser.slow(1), "tj_slow": parser.slow(2, delay=3)},
+            parser.slow(3),
+            deadline=start + 0.5
+        )
+
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(result["skipped"], ["tj_slow"])
+        self.assertEqual(list(result["bank_rates"]), ["tj_a"])
+        self.assertEqual(result["all_rates"]["usd_buy"], 3)
+
+    def test_sequential_budget(self):
+        parser = FakeParser(workers=1, budget=0.3)
+        result = parser.handle_execute(
+            {"tj_a": parser.slow(1, delay=0.4), "tj_b": parser.slow(2, delay=0.1)},
+            parser.slow(3, delay=0.1)
+        )
+
+        self.assertEqual(result["skipped"], ["all_rates", "tj_b"])
+        self.assertEqual(list(result["bank_rates"]), ["tj_a"])
+        self.assertIsNone(result["all_rates"])
+
+    def assert_result(self, result):
+        self.assertEqual(sorted(result["bank_rates"]), ["tj_a", "tj_b", "tj_c"])
+        self.assertEqual(result["bank_rates"]["tj_b"]["usd_buy"], 2)
+        self.assertEqual(result["all_rates"]["USD"]["value"], 4)
+        self.assertEqual(result["skipped"], [])
+
+
+class SleepingAsyncFetcher:
+    """ Stand in of AsyncFetcher, every download takes delay seconds on the event loop """
+
+    def __init__(self, body, delay=0.2):
+        self.body = body
+        self.delay = delay
+        self.links = []
+
+    async def fetch_versioned(self, link, method="GET", data=None, timeout=10, mobile=False, limit=None, until=None,
+                              deadline=None):
+        self.links.append(link)
+        await asyncio.sleep(self.delay)
+        if "broken" in link:
+            raise FetchError(link, "connection refused")
+        return self.body, None
+
+
+class PageParser(FakeParser):
+
+    def page(self, link):
+        def func():
+            value = float(self.fetcher.fetch(link))
+            threads.add(threading.current_thread().name)
+            return {"usd_buy": value, "usd_sale": value}
+        return func
+
+
+threads = set()
+
+
+class TestHandleExecuteAsync(unittest.TestCase):
+
+    def test_downloads_overlap(self):
+        threads.clear()
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="parsing")
+        self.addCleanup(executor.shutdown)
+        parser = PageParser(executor=executor)
+        fetcher = SleepingAsyncFetcher("5")
+        functions = dict(("tj_" + str(i), parser.page("http://bank" + str(i))) for i in range(40))
+
+        start = time.time()
+        result = asyncio.run(parser.handle_execute_async(functions, None, fetcher))
+        elapsed = time.time() - start
+
+        # 40 downloads of 0.2 sec with 2 parsing threads: close to one download, not 40 / 2
+        self.assertLess(elapsed, 1)
+        self.assertEqual(len(result["bank_rates"]), 40)
+        self.assertEqual(result["bank_rates"]["tj_7"]["usd_buy"], 5)
+        self.assertLessEqual(len(threads), 2)
+
+    def test_same_as_sync(self):
+        fetcher = SleepingAsyncFetcher(CountingFetcher.body, delay=0.01)
+        parser = ParserKZ(logging.getLogger(), Fetcher())
+        result = asyncio.run(parser.handle_execute_async({"kz_nbk": parser.parse_nbk}, parser.parse_nbk_all, fetcher))
+
+        sync = ParserKZ(logging.getLogger(), CountingFetcher())
+        expected = sync.handle_execute({"kz_nbk": sync.parse_nbk}, sync.parse_nbk_all)
+        self.assertEqual(result["bank_rates"], expected["bank_rates"])
+        self.assertEqual(result["all_rates"], expected["all_rates"])
+
+        # national bank page is downloaded once for bank rates and all rates
+        self.assertEqual(len(fetcher.links), 1)
+
+    def test_failures_and_deadline(self):
+        parser = PageParser()
+        fetcher = SleepingAsyncFetcher("5", delay=0.1)
+        start = time.time()
+        result = asyncio.run(parser.handle_execute_async(
+            {
+                "tj_a": parser.page("http://a"),
+                "tj_broken": parser.page("http://broken"),
+                "tj_slow": parser.slow(2, delay=3),
+            },
+            None, fetcher, deadline=start + 0.5))
+
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(list(result["bank_rates"]), ["tj_a"])
+        self.assertEqual(result["skipped"], ["tj_slow"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import logging
+import os
+import subprocess
+import sys
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.fetcher import Fetcher
+from src.parser import base
+from src.parser.countries import countries
+from src.parser.countries import parse_countries
+from src.parser.countries import parser_class
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class SlowParser(base.Parser):
+
+    def __init__(self, country, executor):
+        base.Parser.__init__(self, country, logging.getLogger(), Fetcher(), workers=4, executor=executor)
+
+    def parse_all(self, deadline=None):
+        def slow():
+            time.sleep(0.2)
+            return {"usd_buy": 1, "usd_sale": 2}
+
+        functions = dict((self.country + "_" + str(i), slow) for i in range(3))
+        return self.handle_execute(functions, slow, deadline=deadline)
+
+
+class BrokenParser(SlowParser):
+
+    def parse_all(self, deadline=None):
+        raise RuntimeError("broken")
+
+
+class TestCountries(unittest.TestCase):
+
+    def test_parser_class(self):
+        self.assertEqual(parser_class("kz").country, "kz")
+
+        # a fresh interpreter loads only the module of the selected country
+        code = ("import sys; from src.parser.countries import parser_class; parser_class('uz'); "
+                "print(sorted(m for m in ('src.parser.kg', 'src.parser.kz', 'src.parser.tj', 'src.parser.uz') "
+                "if m in sys.modules))")
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT)
+        self.assertEqual(output.decode().strip(), "['src.parser.uz']")
+
+    def test_countries(self):
+        self.assertEqual(countries("tj"), ["tj"])
+        self.assertEqual(countries("tj, uz,tj"), ["tj", "uz"])
+        self.assertEqual(countries("all"), ["kg", "kz", "tj", "uz"])
+        self.assertEqual(countries(None), [])
+
+        with self.assertRaises(ValueError):
+            countries("tj,ru")
+
+    def test_parse_countries(self):
+        executor = ThreadPoolExecutor(max_workers=16)
+        self.addCleanup(executor.shutdown)
+        parsers = [SlowParser(country, executor) for country in ("tj", "uz", "kg", "kz")]
+
+        start = time.time()
+        results = parse_countries(parsers)
+
+        # 16 banks on 16 shared workers take as long as one bank
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(sorted(results), ["kg", "kz", "tj", "uz"])
+        self.assertEqual(sorted(results["uz"]["bank_rates"]), ["uz_0", "uz_1", "uz_2"])
+
+    def test_failed_country(self):
+        executor = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(executor.shutdown)
+
+        results = parse_countries([SlowParser("tj", executor), BrokenParser("uz", executor)])
+        self.assertEqual(list(results), ["tj"])
+
+
+if __name__ == "__main__":
+    unittest.main()
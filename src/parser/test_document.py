@@ -0,0 +1,58 @@
+import re
+import unittest
+
+from src.parser.internal import document
+
+PAGE = """<html><head><script>var tpl = '<div id="cur_1"><table>';</script></head><body>
+<div class="menu"><a href="/">Home</a></div>
+<!-- <div id="cur_1"> old block </div> -->
+<div id="cur_1" class="rates">
+  <div class="inner"><table>
+    <tr><td>USD</td><td>87,50</td><td>87,90</td></tr>
+    <tr><td>EUR</td><td>95,10</td><td>96,00</td></tr>
+  </table></div>
+</div>
+<div class="exchange small"><table><tr><td>RUB</td><td>1,10</td><td>1,20</td></tr></table></div>
+<div class="footer exchange-widget"><table><tr><td>KZT</td><td>0,17</td><td>0,19</td></tr></table></div>
+</body></html>"""
+
+
+class TestDocument(unittest.TestCase):
+
+    def test_id_target(self):
+        for engine in document.ENGINES:
+            context = document.parse(PAGE, id="cur_1", engine=engine)
+            self.assertEqual(self.rows(context), [
+                ["USD", "87,50", "87,90"],
+                ["EUR", "95,10", "96,00"],
+            ], engine)
+
+    def test_class_target(self):
+        for engine in document.ENGINES:
+            context = document.parse(PAGE, 'div', {'class': re.compile(r'exchange')}, engine=engine)
+            self.assertEqual(self.rows(context), [
+                ["RUB", "1,10", "1,20"],
+                ["KZT", "0,17", "0,19"],
+            ], engine)
+
+    def test_scan_stops_after_id(self):
+        fragment = document.scan(PAGE, None, {'id': 'cur_1'})
+        self.assertTrue(fragment.startswith('<div id="cur_1" class="rates">'))
+        self.assertTrue(fragment.endswith('</table></div>\n</div>'))
+
+    def test_missing_target(self):
+        for engine in document.ENGINES:
+            context = document.parse(PAGE, id="absent", engine=engine)
+            self.assertEqual(context.find_all('tr'), [])
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            document.parse(PAGE, engine="regex")
+
+    @staticmethod
+    def rows(context):
+        return [[td.getText() for td in tr.find_all('td')] for tr in context.find_all('tr')]
+
+
+if __name__ == "__main__":
+    unittest.main()
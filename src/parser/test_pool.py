@@ -0,0 +1,79 @@
+import logging
+import os
+import unittest
+
+from src.fetcher import FetchError
+from src.metrics import Registry
+from src.parser import ParserKZ
+from src.parser import base
+from src.parser import pool
+from src.parser.pool import ParsePool
+from src.parser.test_base import CountingFetcher
+
+
+class FailingFetcher(CountingFetcher):
+
+    def fetch_versioned(self, link, method="GET", data=None, timeout=10, mobile=False, limit=None, until=None):
+        self.calls += 1
+        raise FetchError(link, "connection refused")
+
+
+class TestParsePool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ParsePool(["kz"], workers=2)
+        cls.pids = cls.pool.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def test_workers(self):
+        self.assertTrue(self.pids)
+        self.assertNotIn(os.getpid(), self.pids)
+
+    def test_same_as_in_process(self):
+        fetcher = CountingFetcher()
+        metrics = Registry()
+        parser = ParserKZ(logging.getLogger(), fetcher, workers=4, parse_pool=self.pool, metrics=metrics)
+        result = parser.parse_sources(["kz_nbk", base.ALL_RATES])
+
+        expected = ParserKZ(logging.getLogger(), CountingFetcher()).parse_sources(["kz_nbk", base.ALL_RATES])
+        self.assertEqual(result["bank_rates"], expected["bank_rates"])
+        self.assertEqual(result["all_rates"], expected["all_rates"])
+        self.assertEqual(result["bank_rates"]["kz_nbk"]["usd_buy"], 4705000)
+
+        # the page is downloaded once by this process, parsed by the workers
+        self.assertEqual(fetcher.calls, 1)
+        sources = metrics.snapshot()["kz"]
+        self.assertGreater(sources["kz_nbk"]["total"]["parse_cpu"], 0)
+
+    def test_download_failure(self):
+        parser = ParserKZ(logging.getLogger(), FailingFetcher(), parse_pool=self.pool)
+        result = parser.parse_sources(["kz_nbk"])
+
+        self.assertEqual(result["bank_rates"], {})
+        self.assertEqual(result["skipped"], [])
+
+    def test_worker_reuses_parsed_documents(self):
+        # parse_source as run by a worker: a page served with the same version is parsed once
+        pool.warm(["kz"])
+        cache = pool._parsers["kz"].fetcher.http_cache
+        responses = {}
+        result, request, _ = pool.parse_source("kz", "kz_nbk", responses)
+        self.assertIsNone(result)
+
+        responses[request[0]] = (CountingFetcher.body, '"v1"|')
+        first = pool.parse_source("kz", "kz_nbk", responses)[0]
+        parsed = list(cache.parsed.values())
+        second = pool.parse_source("kz", "kz_nbk", responses)[0]
+
+        self.assertEqual(first, second)
+        self.assertEqual(first["usd_buy"], 4705000)
+        self.assertEqual(len(parsed), 1)
+        self.assertIs(list(cache.parsed.values())[0][1], parsed[0][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import random
+import unittest
+from decimal import Decimal
+
+from src.parser.internal import rate_helper as rate
+
+
+# reference() is from_string() as implemented with Decimal only
+def reference(val):
+    if isinstance(val, str):
+        val = val.replace(" ", "").strip()
+        if ',' in val and '.' in val:
+            val = val.replace(",", "")
+        else:
+            val = val.replace(",", ".")
+
+    if val is None or val == "" or val == "–":
+        return 0
+
+    val = round(Decimal(val) * 10000)
+    return int(val)
+
+
+# outcome() returns value or type of the raised exception
+def outcome(func, val):
+    try:
+        return func(val)
+    except Exception as e:
+        return type(e)
+
+
+def digits(rnd, low, high):
+    return "".join(rnd.choice("0123456789") for _ in range(rnd.randint(low, high)))
+
+
+# number() generates rate like strings: signs, separators, spaces, long fractions, ties, junk
+def number(rnd):
+    integer = digits(rnd, 0, 8)
+    if len(integer) > 3 and rnd.random() < 0.3:
+        separator = rnd.choice([" ", ","])
+        integer = integer[:-3] + separator + integer[-3:]
+
+    text = integer
+    kind = rnd.random()
+    if kind < 0.8:
+        fraction = digits(rnd, 0, 10)
+        if rnd.random() < 0.2:
+            # exact ties and near ties of the 5th fraction digit
+            fraction = digits(rnd, 4, 4) + "5" + rnd.choice(["", "0", "00", "01"])
+        text += rnd.choice([".", ","]) + fraction
+    elif kind < 0.85:
+        text += "." + digits(rnd, 20, 30)
+
+    if rnd.random() < 0.1:
+        text = rnd.choice(["-", "+"]) + text
+    if rnd.random() < 0.1:
+        text = rnd.choice([" ", "\t", "\n"]) + text + rnd.choice([" ", "\n"])
+    if rnd.random() < 0.03:
+        text = rnd.choice(["–", "", " ", ".", "-", "1e3", "NaN", "abc", "1_000", "١٢", "1.2.3", "Inf"])
+    return text
+
+
+class TestFromString(unittest.TestCase):
+
+    def test_examples(self):
+        self.assertEqual(rate.from_string("87,5"), 875000)
+        self.assertEqual(rate.from_string("1,234.56"), 12345600)
+        self.assertEqual(rate.from_string("1 234,56"), 12345600)
+        self.assertEqual(rate.from_string(" 10.00005 "), 100000)
+        self.assertEqual(rate.from_string("10.00015"), 100002)
+        self.assertEqual(rate.from_string("10.000051"), 100001)
+        self.assertEqual(rate.from_string(".5"), 5000)
+        self.assertEqual(rate.from_string("5."), 50000)
+        self.assertEqual(rate.from_string("-0.00001"), 0)
+        self.assertEqual(rate.from_string("–"), 0)
+        self.assertEqual(rate.from_string(""), 0)
+        self.assertEqual(rate.from_string(None), 0)
+        self.assertEqual(rate.from_string(12), 120000)
+
+    def test_same_as_decimal(self):
+        rnd = random.Random(20)
+        for _ in range(50000):
+            val = number(rnd)
+            self.assertEqual(outcome(rate.from_string, val), outcome(reference, val), repr(val))
+
+    def test_non_strings(self):
+        for val in [0, 7, 1.5, 0.00005, 0.00015, Decimal("2.00025"), Decimal("-3.5")]:
+            self.assertEqual(rate.from_string(val), reference(val), repr(val))
+
+    def test_from_strings(self):
+        values = ["87,5", "1,234.56", "–", "", "12.34567"]
+        self.assertEqual(rate.from_strings(values), [reference(val) for val in values])
+        self.assertEqual(rate.from_strings([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
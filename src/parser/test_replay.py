@@ -0,0 +1,35 @@
+import logging
+import unittest
+
+from src.parser import replay
+from src.parser.countries import PARSERS
+from src.parser.internal import document
+
+
+class TestGoldenOutputs(unittest.TestCase):
+    """ Parsers against recorded bank pages (python -m benchmark.replay --record) """
+
+    def recorded(self):
+        countries = [country for country in sorted(PARSERS) if replay.load_golden(country) is not None]
+        if not countries:
+            self.skipTest("no fixture corpus in " + replay.FIXTURES)
+        return countries
+
+    def test_countries(self):
+        for country in self.recorded():
+            with self.subTest(country=country):
+                parser = replay.replay_parser(country, logging.getLogger())
+                self.assertEqual(replay.changed(replay.load_golden(country), replay.outputs(parser)), [])
+
+    def test_engines(self):
+        # opt-in engines give the same outputs as the default one
+        engines = [engine for engine in document.ENGINES if engine != document.LXML or document.HAS_LXML]
+        for country in self.recorded():
+            for engine in engines:
+                with self.subTest(country=country, engine=engine):
+                    parser = replay.replay_parser(country, logging.getLogger(), engine=engine)
+                    self.assertEqual(replay.changed(replay.load_golden(country), replay.outputs(parser)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
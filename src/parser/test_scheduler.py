@@ -0,0 +1,93 @@
+import logging
+import shutil
+import tempfile
+import unittest
+
+from src.fetcher import Fetcher
+from src.parser import base
+from src.parser.internal import scheduler as schedule
+from src.parser.internal.scheduler import Scheduler
+from src.store import FileStore
+from src.store import MemoryStore
+
+
+def job(bank_id):
+    return bank_id, lambda: {"usd_buy": 1, "usd_sale": 1}
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = Scheduler(MemoryStore(), threshold=3, backoff=300, max_backoff=1000)
+
+    def test_slowest_first(self):
+        self.scheduler.record("tj", {
+            "tj_fast": (schedule.OK, 0.1),
+            "tj_slow": (schedule.OK, 2.5),
+        })
+        jobs, backed_off = self.scheduler.plan("tj", [job("tj_fast"), job("tj_slow"), job("tj_new")])
+
+        # never seen sources go first
+        self.assertEqual([bank_id for bank_id, _ in jobs], ["tj_new", "tj_slow", "tj_fast"])
+        self.assertEqual(backed_off, [])
+
+    def test_back_off(self):
+        for now in (0, 10, 20):
+            jobs, backed_off = self.scheduler.plan("tj", [job("tj_down")], now=now)
+            self.assertEqual(backed_off, [])
+            self.scheduler.record("tj", {"tj_down": (schedule.ERROR, 10)}, now=now)
+
+        jobs, backed_off = self.scheduler.plan("tj", [job("tj_down")], now=100)
+        self.assertEqual(jobs, [])
+        self.assertEqual(backed_off, ["tj_down"])
+
+        # probe after back off, the next interval is doubled and capped
+        jobs, backed_off = self.scheduler.plan("tj", [job("tj_down")], now=20 + 300)
+        self.assertEqual(len(jobs), 1)
+        self.scheduler.record("tj", {"tj_down": (schedule.EMPTY, 1)}, now=320)
+        self.assertEqual(self.scheduler.stats("tj")["tj_down"]["next_probe"], 320 + 600)
+        self.scheduler.record("tj", {"tj_down": (schedule.ERROR, 1)}, now=920)
+        self.assertEqual(self.scheduler.stats("tj")["tj_down"]["next_probe"], 920 + 1000)
+
+        # recovered source runs again
+        self.scheduler.record("tj", {"tj_down": (schedule.OK, 1)}, now=1920)
+        self.assertEqual(self.scheduler.plan("tj", [job("tj_down")], now=1921)[1], [])
+
+    def test_timeout_keeps_streak(self):
+        self.scheduler.record("tj", {"tj_a": (schedule.ERROR, 1)})
+        self.scheduler.record("tj", {"tj_a": (schedule.TIMEOUT, 5)})
+        self.assertEqual(self.scheduler.stats("tj")["tj_a"]["failures"], 1)
+
+    def test_file_store(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        Scheduler(FileStore(directory)).record("kg", {"kg_bta": (schedule.OK, 0.75)})
+        stats = Scheduler(FileStore(directory)).stats("kg")
+        self.assertEqual(stats["kg_bta"]["p95"], 0.75)
+
+
+class TestScheduledRun(unittest.TestCase):
+
+    def test_handle_execute(self):
+        scheduler = Scheduler(MemoryStore(), threshold=1)
+        parser = base.Parser("tj", logging.getLogger(), Fetcher(), workers=4, scheduler=scheduler)
+
+        def broken():
+            raise base.ParseError("rates not found")
+
+        functions = {"tj_ok": job("tj_ok")[1], "tj_broken": broken}
+        parser.handle_execute(functions, job("all_rates")[1])
+        stats = scheduler.stats("tj")
+        self.assertEqual(sorted(stats), ["all_rates", "tj_broken", "tj_ok"])
+        self.assertEqual(stats["tj_broken"]["failures"], 1)
+
+        # broken source is not even started while backed off
+        functions["tj_broken"] = lambda: self.fail("backed off source started")
+        result = parser.handle_execute(functions, job("all_rates")[1])
+        self.assertEqual(list(result["bank_rates"]), ["tj_ok"])
+        self.assertEqual(result["skipped"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import logging
+import re
+import unittest
+
+from src.fetcher import Fetcher
+from src.fetcher.cache import MemoryHttpCache
+from src.fetcher.fetcher import BodyReader
+from src.parser import ParserKG
+from src.parser import ParserKZ
+from src.parser import ParserTJ
+from src.parser import ParserUZ
+from src.parser import base
+from src.parser.internal import document
+from src.parser.internal import rows
+from src.parser.internal.document import soup
+from src.parser.internal.spec import TableSpec
+
+PAGE = u"""<html><body>
+<table id="cur_1">
+  <tr><th>Currency</th><th>Buy</th><th>Sell</th></tr>
+  <tr><td>USD</td><td>87,50</td><td>87,90</td></tr>
+  <tr><td>EUR</td><td>95,10</td><td>96,00</td></tr>
+  <tr><td>RUR</td><td>1,10</td><td>1,20</td></tr>
+  <tr><td>KZT</td><td>0,17</td><td>0,19</td></tr>
+</table>
+<div class="course"><ul>
+  <li>Доллар США <span>87.6</span><span>87.8</span></li>
+  <li>Евро <span>95.2</span><span>95.9</span></li>
+</ul></div>
+</body></html>"""
+
+
+class StaticFetcher(Fetcher):
+    def fetch_versioned(self, link, method="GET", data=None, timeout=10, mobile=False, limit=None, until=None):
+        return PAGE, None
+
+
+class VersionedFetcher(Fetcher):
+    """ Serves PAGE with the same http validator (not modified) """
+
+    def fetch_versioned(self, link, method="GET", data=None, timeout=10, mobile=False, limit=None, until=None):
+        return PAGE, "v1"
+
+
+class StreamingFetcher(Fetcher):
+    """ Reads PAGE like a streamed fetch (cut at limit / after end markers) """
+
+    def __init__(self):
+        Fetcher.__init__(self)
+        self.reads = []
+
+    def fetch_versioned(self, link, method="GET", data=None, timeout=10, mobile=False, limit=None, until=None):
+        self.reads.append((limit, until))
+        reader = BodyReader(limit, until)
+        reader.feed(PAGE.encode("utf-8"))
+        return bytes(reader.body).decode("utf-8", errors="replace"), None
+
+
+class TestTableSpec(unittest.TestCase):
+
+    def test_rows(self):
+        rates = TableSpec("http://bank", container={'id': "cur_1"}, currencies=rows.USD_EUR_RUB_KZT) \
+            .extract(StaticFetcher())
+        self.assertEqual(rates, {
+            "usd_buy": 875000, "usd_sale": 879000,
+            "eur_buy": 951000, "eur_sale": 960000,
+            "kzt_buy": 1700, "kzt_sale": 1900,
+        })
+
+    def test_aliases(self):
+        rates = TableSpec(
+            "http://bank", container=('div', {'class': re.compile(r'course')}), within='ul', rows='li',
+            cells='span', buy=0, sale=1, currencies=((u"usd", u'Доллар'), (u"eur", u'Евро'))
+        ).extract(StaticFetcher())
+        self.assertEqual(rates, {"usd_buy": 876000, "usd_sale": 878000, "eur_buy": 952000, "eur_sale": 959000})
+
+    def test_not_modified_page(self):
+        fetcher = VersionedFetcher(http_cache=MemoryHttpCache())
+        spec = TableSpec("http://bank", container={'id': "cur_1"})
+        calls = []
+        rates = spec.rates
+        spec.rates = lambda result, engine: calls.append(engine) or rates(result, engine)
+
+        first = spec.extract(fetcher)
+        second = spec.extract(fetcher)
+        # rates extracted for the validator are reused, callers get their own copy
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+    def test_partly_read_page(self):
+        expected = TableSpec("http://bank", container={'id': "cur_1"}).extract(StaticFetcher())
+
+        fetcher = StreamingFetcher()
+        until = ('id="cur_1"', "</table>")
+        self.assertEqual(TableSpec("http://bank", container={'id': "cur_1"}, until=until).extract(fetcher), expected)
+        self.assertEqual(fetcher.reads, [(None, until)])
+
+        # markers matched before the rates (or limit too small): whole page is fetched
+        for spec in [TableSpec("http://bank", container={'id': "cur_1"}, until=("cur_1", "</tr>")),
+                     TableSpec("http://bank", container={'id': "cur_1"}, limit=40)]:
+            fetcher = StreamingFetcher()
+            self.assertEqual(spec.extract(fetcher), expected)
+            self.assertEqual(fetcher.reads, [(spec.limit, spec.until), (None, None)])
+
+    def test_engine(self):
+        spec = TableSpec("http://bank", container={'id': "cur_1"}, engine=document.SCAN)
+        self.assertEqual(spec.extract(StaticFetcher(), engine=document.HTML_PARSER),
+                         TableSpec("http://bank", container={'id': "cur_1"}).extract(StaticFetcher()))
+
+        with self.assertRaises(base.ParseError):
+            TableSpec("http://bank", container={'id': "cur_1"}, engine="unknown").extract(StaticFetcher())
+
+    def test_rates_not_found(self):
+        with self.assertRaises(base.ParseError):
+            TableSpec("http://bank", container={'id': "absent"}).extract(StaticFetcher())
+
+    def test_bank_rate_functions(self):
+        logger = logging.getLogger()
+        expected = {
+            ParserKG: 14,
+            ParserKZ: 13,
+            ParserTJ: 11,
+            ParserUZ: 10,
+        }
+        for parser, count in expected.items():
+            functions = parser(logger, StaticFetcher()).bank_rate_functions()
+            self.assertEqual(len(functions), count, parser.country)
+
+        self.assertNotIn("kg_kompanion", ParserKG(logger, StaticFetcher()).bank_rate_functions())
+
+
+class TestRowClassifier(unittest.TestCase):
+
+    def test_classify(self):
+        classifier = rows.classifier(rows.RU_NAMES)
+        self.assertEqual(classifier.classify(u"Российский рубль"), "rub")
+        self.assertEqual(classifier.classify(u"Казахский тенге"), "kzt")
+        self.assertIsNone(classifier.classify(u"Юань"))
+        self.assertIs(classifier, rows.classifier(rows.RU_NAMES))
+
+    def test_priority(self):
+        classifier = rows.classifier(rows.USD_EUR_RUB_KZT)
+        self.assertEqual(classifier.classify("EUR/USD cross"), "usd")
+        self.assertEqual(classifier.classify("RUB (USD)"), "usd")
+        self.assertEqual(classifier.classify("KZT/RUB"), "rub")
+        self.assertEqual(classifier.classify("EUR"), "eur")
+
+    def test_rates(self):
+        tags = soup(PAGE).find(id="cur_1").find_all('tr')
+        self.assertEqual(rows.classifier(rows.RUR).rates(tags, 1, 2)["rub_sale"], 12000)
+        self.assertNotIn("rub_buy", rows.classifier(rows.USD_EUR_RUB).rates(tags, 1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,20 +5,39 @@ import json
 import re
 from datetime import date
 
-from bs4 import BeautifulSoup
-from bs4 import SoupStrainer
-
 from src.parser import base
 from src.parser.internal import currency
+from src.parser.internal import document
 from src.parser.internal import rate_helper as rate
+from src.parser.internal import rows
+from src.parser.internal.spec import TableSpec
 from src.parser.internal import time_helper as time
 
 
 class ParserTJ(base.Parser):
     country = "tj"
-
-    def __init__(self, logger, fetcher):
-        base.Parser.__init__(self, self.country, logger, fetcher)
+    national_bank = "tj_nbt"
+
+    # banks with one row per currency
+    specs = {
+        "tj_halykbank": TableSpec(
+            "https://halykbank.tj/en/exchange-rates", within=('div', {'class': 'exchange_rates'}),
+            rows=('div', {'class': 'currency__columns'}), cells=('div', {'class': 'currency__value'}), buy=0, sale=1,
+            limit=512 * 1024
+        ),
+        "tj_ibt": TableSpec("http://ibt.tj/", container={'id': "ibt"}, buy=0, sale=1),
+        "tj_humo": TableSpec(
+            "https://www.humo.tj/ru/", container=('div', {'class': re.compile('kursHUMO')}),
+            rows=('div', {'class': 'kursBody'}), cells='div'
+        ),
+        "tj_finca": TableSpec(
+            "https://www.finca.tj/en/", container=('table', {'class': re.compile('exchange_rate_table')}),
+            buy=2, sale=3
+        ),
+    }
+
+    def __init__(self, logger, fetcher, **kwargs):
+        base.Parser.__init__(self, self.country, logger, fetcher, **kwargs)
 
     # Parse Amonatbank (web page)
     def parse_amonat(self):
@@ -41,7 +60,7 @@ class ParserTJ(base.Parser):
     def parse_eskhata(self):
         result = self.fetcher.fetch("http://www.eskhata.com/mobile/?nomobile=0")
         try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id='currency'))
+            context = self.html(result, id='currency')
             tags = context.find_all('tr')
             if tags:
                 usd = tags[6].find_all('td')
@@ -64,7 +83,7 @@ class ParserTJ(base.Parser):
     def parse_fmfb(self):
         result = self.fetcher.fetch("https://fmfb.tj/en/")
         try:
-            context = BeautifulSoup(result, "html.parser")
+            context = self.html(result)
             context = context.findAll("div", {"class": "new-currency-last"})
             tags = context[0].find_all("div")
             if tags:
@@ -85,7 +104,7 @@ class ParserTJ(base.Parser):
     def parse_tejaratbank(self):
         result = self.fetcher.fetch("http://tejaratbank.tj/en/#exchange")
         try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id='currency'))
+            context = self.html(result, id='currency')
             buys = context.find(id='text-3').get_text(separator='\n', strip=True).split()
             sales = context.find(id='text-4').get_text(separator='\n', strip=True).split()
             if buys and sales:
@@ -104,64 +123,17 @@ class ParserTJ(base.Parser):
 
     # Parse Halykbank (web page)
     def parse_halykbank(self):
-        result = self.fetcher.fetch("https://halykbank.tj/en/exchange-rates")
-        try:
-            context = BeautifulSoup(result, "html.parser")
-            context = context.findAll("div", {"class": "exchange_rates"})[0]
-            tags = context.find_all('div', {"class": "currency__columns"})
-            if tags:
-                rates = {}
-                for tag in tags:
-                    values = tag.find_all('div', {"class": "currency__value"})
-
-                    if re.search(r'USD', tag.text):
-                        rates["usd_buy"] = rate.from_string(values[0].getText())
-                        rates["usd_sale"] = rate.from_string(values[1].getText())
-                        continue
-
-                    if re.search(r'EUR', tag.text):
-                        rates["eur_buy"] = rate.from_string(values[0].getText())
-                        rates["eur_sale"] = rate.from_string(values[1].getText())
-                        continue
-
-                    if re.search(r'RUB', tag.text):
-                        rates["rub_buy"] = rate.from_string(values[0].getText())
-                        rates["rub_sale"] = rate.from_string(values[1].getText())
-                        continue
-
-                return rates
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("tj_halykbank")
 
     # Parse Spitamen Bank (web page)
     def parse_spitamen(self):
         result = self.fetcher.fetch("https://www.spitamenbank.tj/")
         try:
-            context = BeautifulSoup(
-                result,
-                "html.parser",
-                parse_only=SoupStrainer('ul', {'class': re.compile(r'conversation__list')})
-            )
+            context = self.html(result, 'ul', {'class': re.compile(r'conversation__list')})
             tags = context.findChildren('li')[1]
             tags = tags.find_all('div', {"class": "conversation__row"})
             if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates["usd_buy"] = rate.from_string(tag.find_all('div')[1].getText())
-                        rates["usd_sale"] = rate.from_string(tag.find_all('div')[2].getText())
-                        continue
-                    if re.search(r'EUR', tag.text):
-                        rates["eur_buy"] = rate.from_string(tag.find_all('div')[1].getText())
-                        rates["eur_sale"] = rate.from_string(tag.find_all('div')[2].getText())
-                        continue
-                    if re.search(r'RUB', tag.text):
-                        rates["rub_buy"] = rate.from_string(tag.find_all('div')[1].getText())
-                        rates["rub_sale"] = rate.from_string(tag.find_all('div')[2].getText())
-                        continue
-                return rates
+                return rows.classifier(rows.USD_EUR_RUB).rates(tags, 1, 2, 'div')
             else:
                 raise base.ParseError("rates not found")
         except Exception as e:
@@ -169,30 +141,7 @@ class ParserTJ(base.Parser):
 
     # Parse International Bank of Tajikistan (web page)
     def parse_ibt(self):
-        result = self.fetcher.fetch("http://ibt.tj/")
-        try:
-            context = BeautifulSoup(result, "html.parser", parse_only=SoupStrainer(id="ibt"))
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates["usd_buy"] = rate.from_string(tag.findChildren('td')[0].getText())
-                        rates["usd_sale"] = rate.from_string(tag.findChildren('td')[1].getText())
-                        continue
-                    if re.search(r'EUR', tag.text):
-                        rates["eur_buy"] = rate.from_string(tag.findChildren('td')[0].getText())
-                        rates["eur_sale"] = rate.from_string(tag.findChildren('td')[1].getText())
-                        continue
-                    if re.search(r'RUB', tag.text):
-                        rates["rub_buy"] = rate.from_string(tag.findChildren('td')[0].getText())
-                        rates["rub_sale"] = rate.from_string(tag.findChildren('td')[1].getText())
-                        continue
-                return rates
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("tj_ibt")
 
     # Parse Alif Bank (api)
     def parse_alif(self):
@@ -212,9 +161,11 @@ class ParserTJ(base.Parser):
 
     # Parse National Bank of Tajikistan (api)
     def parse_nb(self):
-        result = self.fetcher.fetch("http://nbt.tj/ru/kurs/export_xml.php?date=" + str(date.today()) + "&export=xmlout")
+        context = self.fetcher.fetch_document(
+            "http://nbt.tj/ru/kurs/export_xml.php?date=" + str(date.today()) + "&export=xmlout",
+            document.soup
+        )
         try:
-            context = BeautifulSoup(result, 'html.parser')
             tags = context.find_all('valute')
             if tags:
                 rates = {}
@@ -236,9 +187,11 @@ class ParserTJ(base.Parser):
 
     # Parse National Bank of Tajikistan all rates (api)
     def parse_nb_all(self):
-        result = self.fetcher.fetch("http://nbt.tj/ru/kurs/export_xml.php?date=" + str(date.today()) + "&export=xmlout")
+        context = self.fetcher.fetch_document(
+            "http://nbt.tj/ru/kurs/export_xml.php?date=" + str(date.today()) + "&export=xmlout",
+            document.soup
+        )
         try:
-            context = BeautifulSoup(result, 'html.parser')
             tags = context.find_all('valute')
             if tags:
                 rates = {}
@@ -263,81 +216,30 @@ class ParserTJ(base.Parser):
 
     # Parse Humo (web page)
     def parse_humo(self):
-        result = self.fetcher.fetch("https://www.humo.tj/ru/")
-        try:
-            context = BeautifulSoup(
-                result,
-                "html.parser",
-                parse_only=SoupStrainer('div', {'class': re.compile('kursHUMO')})
-            )
-            tags = context.find_all('div', {"class": "kursBody"})
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates["usd_buy"] = rate.from_string(tag.find_all('div')[1].getText())
-                        rates["usd_sale"] = rate.from_string(tag.find_all('div')[2].getText())
-                        continue
-                    if re.search(r'EUR', tag.text):
-                        rates["eur_buy"] = rate.from_string(tag.find_all('div')[1].getText())
-                        rates["eur_sale"] = rate.from_string(tag.find_all('div')[2].getText())
-                        continue
-                    if re.search(r'RUB', tag.text):
-                        rates["rub_buy"] = rate.from_string(tag.find_all('div')[1].getText())
-                        rates["rub_sale"] = rate.from_string(tag.find_all('div')[2].getText())
-                        continue
-                return rates
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("tj_humo")
 
     # Parse Finca (web page)
     def parse_finca(self):
-        result = self.fetcher.fetch("https://www.finca.tj/en/")
-        try:
-            context = BeautifulSoup(
-                result,
-                "html.parser",
-                parse_only=SoupStrainer('table', {'class': re.compile('exchange_rate_table')})
-            )
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates["usd_buy"] = rate.from_string(tag.find_all('td')[2].getText())
-                        rates["usd_sale"] = rate.from_string(tag.find_all('td')[3].getText())
-                        continue
-                    if re.search(r'EUR', tag.text):
-                        rates["eur_buy"] = rate.from_string(tag.find_all('td')[2].getText())
-                        rates["eur_sale"] = rate.from_string(tag.find_all('td')[3].getText())
-                        continue
-                    if re.search(r'RUB', tag.text):
-                        rates["rub_buy"] = rate.from_string(tag.find_all('td')[2].getText())
-                        rates["rub_sale"] = rate.from_string(tag.find_all('td')[3].getText())
-                        continue
-                return rates
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("tj_finca")
+
+    # bank_rate_functions returns rates collecting function of each bank
+    def bank_rate_functions(self):
+        functions = self.spec_functions()
+        functions.update({
+            "tj_amonat": self.parse_amonat,
+            "tj_eskhata": self.parse_eskhata,
+            "tj_fmfb": self.parse_fmfb,
+            "tj_tejaratbank": self.parse_tejaratbank,
+            "tj_spitamen": self.parse_spitamen,
+            "tj_alif": self.parse_alif,
+            "tj_nbt": self.parse_nb,
+        })
+        return functions
+
+    # all_rates_function returns function collecting all rates of the national bank
+    def all_rates_function(self):
+        return self.parse_nb_all
 
     # parse_all collects all rates for Tajikistan
-    def parse_all(self):
-        return self.handle_execute(
-            {
-                "tj_amonat": self.parse_amonat,
-                "tj_eskhata": self.parse_eskhata,
-                "tj_fmfb": self.parse_fmfb,
-                "tj_tejaratbank": self.parse_tejaratbank,
-                "tj_halykbank": self.parse_halykbank,
-                "tj_spitamen": self.parse_spitamen,
-                "tj_ibt": self.parse_ibt,
-                "tj_alif": self.parse_alif,
-                "tj_nbt": self.parse_nb,
-                "tj_humo": self.parse_humo,
-                "tj_finca": self.parse_finca,
-            },
-            self.parse_nb_all
-        )
+    def parse_all(self, deadline=None):
+        return self.handle_execute(self.bank_rate_functions(), self.parse_nb_all, deadline=deadline)
@@ -1,31 +1,45 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import json
 import re
 
-from bs4 import BeautifulSoup
-from bs4 import SoupStrainer
-
 from src.parser import base
 from src.parser.internal import currency
+from src.parser.internal import document
 from src.parser.internal import rate_helper as rate
+from src.parser.internal.spec import TableSpec
 from src.parser.internal import time_helper as time
 
 
 class ParserUZ(base.Parser):
     country = "uz"
+    national_bank = "uz_cbu"
+
+    # banks with one row per currency
+    specs = {
+        "uz_nbu": TableSpec(
+            "https://nbu.uz/en/exchange-rates/", container=('div', {'class': re.compile(r'kursdata')}), buy=2, sale=3
+        ),
+        "uz_mikrokreditbank": TableSpec(
+            "https://mikrokreditbank.uz/ru/", container=('div', {'class': 'curs_block'}), active=False
+        ),
+        "uz_ipakyulibank": TableSpec("https://wi.ipakyulibank.uz/kurs/kurs4.php"),
+    }
 
-    def __init__(self, logger, fetcher):
-        base.Parser.__init__(self, self.country, logger, fetcher)
+    def __init__(self, logger, fetcher, **kwargs):
+        base.Parser.__init__(self, self.country, logger, fetcher, **kwargs)
 
     # 1. Parse Central Bank of Uzbekistan (web page)
     def parse_cbu(self):
+        now = time.now_date_key(self.country).split("-")
+        param_date = now[2] + "." + now[1] + "." + now[0]
+        tags = self.fetcher.fetch_document(
+            "http://www.cbu.uz/common/json/",
+            document.from_json,
+            data={"date": param_date}
+        )
+
         try:
-            now = time.now_date_key(self.country).split("-")
-            param_date = now[2] + "." + now[1] + "." + now[0]
-            result = self.fetcher.fetch("http://www.cbu.uz/common/json/", data={"date": param_date})
-            tags = json.loads(result)
             if tags:
                 rates = {}
                 for i in range(len(tags)):
@@ -46,11 +60,15 @@ class ParserUZ(base.Parser):
 
     # Parse Central Bank of Uzbekistan all rates (web page)
     def parse_cbu_all(self):
+        now = time.now_date_key(self.country).split("-")
+        param_date = now[2] + "." + now[1] + "." + now[0]
+        tags = self.fetcher.fetch_document(
+            "http://www.cbu.uz/common/json/",
+            document.from_json,
+            data={"date": param_date}
+        )
+
         try:
-            now = time.now_date_key(self.country).split("-")
-            param_date = now[2] + "." + now[1] + "." + now[0]
-            result = self.fetcher.fetch("http://www.cbu.uz/common/json/", data={"date": param_date})
-            tags = json.loads(result)
             if tags:
                 rates = {}
                 for i in range(len(tags)):
@@ -70,44 +88,13 @@ class ParserUZ(base.Parser):
 
     # 2. Parse National Bank of Uzbekistan (web page)
     def parse_nbu(self):
-        result = self.fetcher.fetch("https://nbu.uz/en/exchange-rates/")
-        try:
-            context = BeautifulSoup(
-                result,
-                'html.parser',
-                parse_only=SoupStrainer('div', {'class': re.compile(r'kursdata')})
-            )
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates["usd_buy"] = rate.from_string(tag.find_all('td')[2].getText())
-                        rates["usd_sale"] = rate.from_string(tag.find_all('td')[3].getText())
-                        continue
-                    if re.search(r'EUR', tag.text):
-                        rates["eur_buy"] = rate.from_string(tag.find_all('td')[2].getText())
-                        rates["eur_sale"] = rate.from_string(tag.find_all('td')[3].getText())
-                        continue
-                    if re.search(r'RUB', tag.text):
-                        rates["rub_buy"] = rate.from_string(tag.find_all('td')[2].getText())
-                        rates["rub_sale"] = rate.from_string(tag.find_all('td')[3].getText())
-                        continue
-                return rates
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("uz_nbu")
 
     # 3. Parse KDB (web page)
     def parse_kdb(self):
         result = self.fetcher.fetch("https://kdb.uz/ru/interactive-services/exchange-rates")
         try:
-            context = BeautifulSoup(
-                result,
-                'html.parser',
-                parse_only=SoupStrainer(id="kdb")
-            )
+            context = self.html(result, id="kdb")
             tags = context.find_all('td')
             if tags and len(tags) > 2:
                 usd = tags[0].text.strip().split("/")
@@ -131,11 +118,7 @@ class ParserUZ(base.Parser):
     def parse_xb(self):
         result = self.fetcher.fetch("http://www.xb.uz/ru")
         try:
-            context = BeautifulSoup(
-                result,
-                'html.parser',
-                parse_only=SoupStrainer('div', {'class': re.compile(r'currency__table')})
-            )
+            context = self.html(result, 'div', {'class': re.compile(r'currency__table')})
             tags = context.find_all('div', class_='currency__amount')
             if tags:
                 buy = tags[0].find_all('div')
@@ -155,44 +138,13 @@ class ParserUZ(base.Parser):
 
     # 5. INACTIVE: Parse Mikrokreditbank (web page)
     def parse_mikrokreditbank(self):
-        result = self.fetcher.fetch("https://mikrokreditbank.uz/ru/")
-        try:
-            context = BeautifulSoup(
-                result,
-                'html.parser',
-                parse_only=SoupStrainer('div', {'class': 'curs_block'})
-            )
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-                return rates
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("uz_mikrokreditbank")
 
     # 6. Parse Turonbank (web page)
     def parse_turonbank(self):
         result = self.fetcher.fetch("http://www.turonbank.uz/ru/")
         try:
-            context = BeautifulSoup(
-                result,
-                'html.parser',
-                parse_only=SoupStrainer('table', {'class': 'currency__rate_table'})
-            )
+            context = self.html(result, 'table', {'class': 'currency__rate_table'})
             tags = context.find_all('tr')
             if tags:
                 buy = tags[1].find_all('td')
@@ -214,11 +166,7 @@ class ParserUZ(base.Parser):
     def parse_aloqabank(self):
         result = self.fetcher.fetch("http://www.aloqabank.uz/ru/page/interactive/rates")
         try:
-            context = BeautifulSoup(
-                result,
-                'html.parser',
-                parse_only=SoupStrainer(id="currencies-table")
-            )
+            context = self.html(result, id="currencies-table")
             tags = context.find_all('tr')
             if tags:
                 usd = tags[2].find_all('td')
@@ -238,11 +186,7 @@ class ParserUZ(base.Parser):
     def parse_aab(self):
         result = self.fetcher.fetch("http://www.aab.uz/ru/")
         try:
-            context = BeautifulSoup(
-                result,
-                'html.parser',
-                parse_only=SoupStrainer('div', {'class': 'rates-list'})
-            )
+            context = self.html(result, 'div', {'class': 'rates-list'})
             tags = context.find_all('div', class_='col-xs-3')
             if tags:
                 buy = tags[0].find_all('div', class_='item')
@@ -264,7 +208,7 @@ class ParserUZ(base.Parser):
     def parse_trustbank(self):
         result = self.fetcher.fetch("http://trustbank.uz/ru/services/exchange-rates/")
         try:
-            context = BeautifulSoup(result, 'html.parser', parse_only=SoupStrainer(id='currency-archive'))
+            context = self.html(result, id='currency-archive')
             tags = context.find_all('div', class_='col-xs-1')
             if tags:
                 buy = tags[2].find_all('div', class_='item')
@@ -284,36 +228,13 @@ class ParserUZ(base.Parser):
 
     # 10. Parse Ipakyulibank (web page)
     def parse_ipakyulibank(self):
-        result = self.fetcher.fetch("https://wi.ipakyulibank.uz/kurs/kurs4.php")
-        try:
-            context = BeautifulSoup(result, 'html.parser')
-            tags = context.find_all('tr')
-            if tags:
-                rates = {}
-                for tag in tags:
-                    if re.search(r'USD', tag.text):
-                        rates['usd_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['usd_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-                    if re.search(r'EUR', tag.text):
-                        rates['eur_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['eur_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-                    if re.search(r'RUB', tag.text):
-                        rates['rub_buy'] = rate.from_string(tag.findChildren('td')[1].getText())
-                        rates['rub_sale'] = rate.from_string(tag.findChildren('td')[2].getText())
-                        continue
-                return rates
-            else:
-                raise base.ParseError("rates not found")
-        except Exception as e:
-            raise base.ParseError(e.message)
+        return self.parse_spec("uz_ipakyulibank")
 
     # 11. Parse Savdogarbank (web page)
     def parse_savdogarbank(self):
         result = self.fetcher.fetch("http://www.savdogarbank.uz/ru/")
         try:
-            context = BeautifulSoup(result, 'html.parser', parse_only=SoupStrainer('div', {'class': 'b-rates'}))
+            context = self.html(result, 'div', {'class': 'b-rates'})
             tags = context.find_all('tr')
             if tags:
                 buy = tags[2].find_all('td')
@@ -332,21 +253,25 @@ class ParserUZ(base.Parser):
         except Exception as e:
             raise base.ParseError(e.message)
 
+    # bank_rate_functions returns rates collecting function of each bank
+    def bank_rate_functions(self):
+        functions = self.spec_functions()
+        functions.update({
+            "uz_cbu": self.parse_cbu,
+            "uz_kdb": self.parse_kdb,
+            "uz_xb": self.parse_xb,
+            "uz_turonbank": self.parse_turonbank,
+            "uz_aloqabank": self.parse_aloqabank,
+            "uz_aab": self.parse_aab,
+            "uz_trustbank": self.parse_trustbank,
+            "uz_savdogarbank": self.parse_savdogarbank,
+        })
+        return functions
+
+    # all_rates_function returns function collecting all rates of the national bank
+    def all_rates_function(self):
+        return self.parse_cbu_all
+
     # parse_all collects all rates for Uzbekistan
-    def parse_all(self):
-        return self.handle_execute(
-            {
-                "uz_cbu": self.parse_cbu,
-                "uz_nbu": self.parse_nbu,
-                "uz_kdb": self.parse_kdb,
-                "uz_xb": self.parse_xb,
-                # "uz_mikrokreditbank": self.parse_mikrokreditbank,
-                "uz_turonbank": self.parse_turonbank,
-                "uz_aloqabank": self.parse_aloqabank,
-                "uz_aab": self.parse_aab,
-                "uz_trustbank": self.parse_trustbank,
-                "uz_ipakyulibank": self.parse_ipakyulibank,
-                "uz_savdogarbank": self.parse_savdogarbank,
-            },
-            self.parse_cbu_all
-        )
+    def parse_all(self, deadline=None):
+        return self.handle_execute(self.bank_rate_functions(), self.parse_cbu_all, deadline=deadline)
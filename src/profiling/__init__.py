@@ -0,0 +1,15 @@
+# profiler_from_env() builds profiler from setting: output directory (empty -> None, profiling disabled).
+# The profiler (cProfile, pstats, tracemalloc) is imported only when profiling is enabled.
+def profiler_from_env(value, **kwargs):
+    if not value:
+        return None
+    from .profiler import Profiler
+    return Profiler(value, **kwargs)
+
+
+# Profiler is imported on first use (see profiler_from_env)
+def __getattr__(name):
+    if name == "Profiler":
+        from .profiler import Profiler
+        return Profiler
+    raise AttributeError("module " + __name__ + " has no attribute " + name)
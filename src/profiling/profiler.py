@@ -0,0 +1,166 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Default number of hot functions reported per source
+TOP = 15
+
+# Seconds between two stack samples of the flamegraph
+SAMPLE_INTERVAL = 0.005
+
+
+class Profiler:
+    """Opt-in profiler of collection runs.
+
+    run() wraps a whole run: tracemalloc measures peak memory and a sampler thread collects stacks of
+    all threads (collapsed stack flamegraph, rooted at the source a thread is parsing or at the thread
+    name, e.g. publisher encoding). source() wraps one parsing function with its own cProfile (profiles
+    are per thread, so concurrent sources don't mix). Python 3.12+ allows one active cProfile per
+    process, a source parsed while another one is profiled is only timed (reported as not profiled).
+    After a run that parsed anything a report with the top hot functions of every source and the
+    flamegraph file are written into directory.
+    """
+
+    # profiler of a source (see source)
+    profile_class = cProfile.Profile
+
+    def __init__(self, directory, top=TOP, interval=SAMPLE_INTERVAL):
+        self.directory = directory
+        self.top = top
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.profiles = {}
+        self.times = {}
+        self.active = {}
+        self.stacks = {}
+        self.running = None
+
+    @contextmanager
+    def run(self, name):
+        """ Profiles a run, yields paths of report & flamegraph written when the run is over """
+        with self.lock:
+            self.profiles, self.times, self.stacks = {}, {}, {}
+        paths = {}
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.clear_traces()
+
+        self.running = threading.Event()
+        sampler = threading.Thread(target=self.sample, args=(self.running,), name="profiler")
+        sampler.daemon = True
+        sampler.start()
+
+        start = time.time()
+        try:
+            yield paths
+        finally:
+            elapsed = time.time() - start
+            self.running.set()
+            sampler.join()
+            peak = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+            if self.profiles:
+                paths.update(self.write(name, elapsed, peak))
+
+    @contextmanager
+    def source(self, source):
+        """ Profiles parsing function of a source running in the current thread """
+        profile = self.profile_class()
+        thread = threading.get_ident()
+        with self.lock:
+            self.active[thread] = source
+
+        start = time.time()
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiler is active (python 3.12+: sources of other threads), the source is only timed
+            profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            with self.lock:
+                self.active.pop(thread, None)
+                self.profiles[source] = profile
+                self.times[source] = time.time() - start
+
+    def sample(self, stopped):
+        me = threading.get_ident()
+        while not stopped.wait(self.interval):
+            names = dict((t.ident, "thread:" + t.name) for t in threading.enumerate())
+            with self.lock:
+                active = dict(self.active)
+            for thread, frame in sys._current_frames().items():
+                if thread == me:
+                    continue
+                root = active.get(thread) or names.get(thread, "thread:" + str(thread))
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(code.co_name + " (" + os.path.basename(code.co_filename) + ":" +
+                                 str(code.co_firstlineno) + ")")
+                    frame = frame.f_back
+                key = ";".join([root] + stack[::-1])
+                with self.lock:
+                    self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def report(self, name, elapsed, peak):
+        """ Text report: run time, peak memory, then top functions of every source (slowest first) """
+        lines = [
+            "run: " + name,
+            "time: %.3f s" % elapsed,
+            "peak memory: %.1f KiB" % (peak / 1024.0),
+            "",
+        ]
+        with self.lock:
+            sources = sorted(self.profiles, key=lambda s: -self.times[s])
+            for source in sources:
+                if self.profiles[source] is None:
+                    lines.append("== %s %.3f s (not profiled, another profiler was active)" %
+                                 (source, self.times[source]))
+                    lines.append("")
+                    continue
+
+                out = io.StringIO()
+                stats = pstats.Stats(self.profiles[source], stream=out)
+                stats.sort_stats("tottime").print_stats(self.top)
+                lines.append("== %s %.3f s" % (source, self.times[source]))
+                lines.extend(line for line in hot_functions(out.getvalue()))
+                lines.append("")
+        return "\n".join(lines)
+
+    def flamegraph(self):
+        """ Collapsed stacks ("source;frame;frame count"), input of flamegraph.pl / speedscope """
+        with self.lock:
+            return "".join(key + " " + str(count) + "\n" for key, count in sorted(self.stacks.items()))
+
+    def write(self, name, elapsed, peak):
+        os.makedirs(self.directory, exist_ok=True)
+        prefix = os.path.join(self.directory, time.strftime("%Y%m%d-%H%M%S") + "-" + name)
+        paths = {"report": prefix + ".txt", "flamegraph": prefix + ".collapsed"}
+        with open(paths["report"], "w") as f:
+            f.write(self.report(name, elapsed, peak))
+        with open(paths["flamegraph"], "w") as f:
+            f.write(self.flamegraph())
+        return paths
+
+
+# hot_functions() keeps only the table of pstats output
+def hot_functions(text):
+    table = False
+    for line in text.splitlines():
+        if line.strip().startswith("ncalls"):
+            table = True
+        if table and line.strip():
+            yield line
+
@@ -0,0 +1,102 @@
+import cProfile
+import logging
+import shutil
+import tempfile
+import time
+import unittest
+
+from src.fetcher import Fetcher
+from src.parser import base
+from src.profiling import Profiler
+from src.profiling import profiler_from_env
+
+
+def busy(seconds):
+    end = time.time() + seconds
+    total = 0
+    while time.time() < end:
+        total += sum(range(100))
+    return total
+
+
+class FakeParser(base.Parser):
+
+    def __init__(self, **kwargs):
+        base.Parser.__init__(self, "tj", logging.getLogger(), Fetcher(), **kwargs)
+
+    @staticmethod
+    def bank_a():
+        busy(0.05)
+        return {"usd_buy": 1, "usd_sale": 1}
+
+    @staticmethod
+    def bank_b():
+        time.sleep(0.05)
+        return {"usd_buy": 2, "usd_sale": 2}
+
+    def parse_all(self):
+        return self.handle_execute({"tj_a": self.bank_a, "tj_b": self.bank_b}, None)
+
+
+class ActiveProfile(cProfile.Profile):
+    """ Profile failing as on python 3.12+ when another profile is enabled """
+
+    def enable(self, *args, **kwargs):
+        raise ValueError("Another profiling tool is already active")
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.profiler = Profiler(self.directory, top=5, interval=0.001)
+
+    def test_run(self):
+        parser = FakeParser(workers=4, profiler=self.profiler)
+        with self.profiler.run("tj") as paths:
+            result = parser.parse_all()
+
+        self.assertEqual(sorted(result["bank_rates"]), ["tj_a", "tj_b"])
+
+        with open(paths["report"]) as f:
+            report = f.read()
+        self.assertIn("peak memory:", report)
+        self.assertIn("== tj/tj_a", report)
+        self.assertIn("== tj/tj_b", report)
+        self.assertIn("busy", report)
+
+        with open(paths["flamegraph"]) as f:
+            stacks = f.read().splitlines()
+        self.assertTrue(stacks)
+        self.assertTrue(any(line.startswith("tj/tj_a;") and "busy" in line for line in stacks))
+        for line in stacks:
+            self.assertGreater(int(line.rsplit(" ", 1)[1]), 0)
+
+    def test_another_profiler_active(self):
+        self.profiler.profile_class = ActiveProfile
+        parser = FakeParser(workers=4, profiler=self.profiler)
+        with self.profiler.run("tj") as paths:
+            result = parser.parse_all()
+
+        self.assertEqual(sorted(result["bank_rates"]), ["tj_a", "tj_b"])
+        with open(paths["report"]) as f:
+            report = f.read()
+        self.assertIn("== tj/tj_a", report)
+        self.assertIn("not profiled", report)
+        with open(paths["flamegraph"]) as f:
+            self.assertIn("busy", f.read())
+
+    def test_nothing_parsed(self):
+        with self.profiler.run("tick") as paths:
+            pass
+        self.assertEqual(paths, {})
+
+    def test_from_env(self):
+        self.assertIsNone(profiler_from_env(""))
+        self.assertIsNone(profiler_from_env(None))
+        self.assertEqual(profiler_from_env(self.directory, top=3).top, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
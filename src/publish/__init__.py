@@ -0,0 +1,25 @@
+from .codec import CodecError
+from .codec import codec_from_env
+from .codec import decode
+from .codec import train_dictionary
+from .delta import DELTA
+from .delta import FULL
+from .delta import KEYFRAME
+from .delta import Snapshots
+from .delta import apply
+from .publisher import PublishError
+from .publisher import Publisher
+from .sink import FileSink
+from .sink import Sink
+from .sink import SinkError
+from .sink import SnsSink
+from .sink import StdoutSink
+from .sink import sink_from_env
+
+
+# AmqpSink is imported on first use (pika is only needed by amqp sink)
+def __getattr__(name):
+    if name == "AmqpSink":
+        from .amqp import AmqpSink
+        return AmqpSink
+    raise AttributeError("module " + __name__ + " has no attribute " + name)
@@ -0,0 +1,69 @@
+import threading
+
+import pika
+from pika import exceptions as amqp
+
+from src.publish.sink import Sink
+from src.publish.sink import SinkError
+
+
+class AmqpSink(Sink):
+    """Publishes encoded message to AMQP (RabbitMQ) exchange with publisher confirms.
+
+    Connection & channel are opened on the first message and kept open (warm invocations, daemon),
+    a broken connection is opened again once per message. Messages are persistent and mandatory,
+    a message nacked or not routed to any queue raises SinkError.
+    """
+
+    def __init__(self, url, exchange, routing_key, encode, connect=None):
+        self.url = url
+        self.exchange = exchange
+        self.routing_key = routing_key
+        self.encode = encode
+        # connect(url) returns blocking connection, replaced in tests
+        self.connect = connect if connect is not None else lambda u: pika.BlockingConnection(pika.URLParameters(u))
+        self.lock = threading.Lock()
+        self.connection = None
+        self.channel = None
+
+    def open(self):
+        if self.channel is None or not self.channel.is_open:
+            if self.connection is None or not self.connection.is_open:
+                self.connection = self.connect(self.url)
+            self.channel = self.connection.channel()
+            self.channel.confirm_delivery()
+        return self.channel
+
+    def send(self, message):
+        body = self.encode(message)
+        with self.lock:
+            try:
+                self.publish(body)
+            except (amqp.ConnectionClosed, amqp.ChannelClosed, amqp.AMQPConnectionError):
+                self.reset()
+                self.publish(body)
+
+    def publish(self, body):
+        try:
+            self.open().publish(
+                self.exchange,
+                self.routing_key,
+                body,
+                properties=pika.BasicProperties(delivery_mode=2, content_type="text/plain"),
+                mandatory=True,
+            )
+        except (amqp.NackError, amqp.UnroutableError) as e:
+            raise SinkError("message not confirmed by broker: " + e.__class__.__name__)
+
+    def reset(self):
+        connection = self.connection
+        self.connection = self.channel = None
+        if connection is not None and connection.is_open:
+            try:
+                connection.close()
+            except amqp.AMQPError:
+                pass
+
+    def close(self):
+        with self.lock:
+            self.reset()
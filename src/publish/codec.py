@@ -0,0 +1,199 @@
+import base64
+import json
+import threading
+import zlib
+from importlib.util import find_spec
+
+from src.publish import wire
+
+# zstandard is imported by zstd codec on first use (not at cold start when CERP_CODEC is not zstd)
+HAS_ZSTD = find_spec("zstandard") is not None
+
+# Codecs, the name is the header of encoded message ("<name>:<base64 body>")
+NONE = "none"
+ZLIB = "zlib"
+ZSTD = "zstd"
+WIRE = "wire"
+
+# Default size of trained zstd dictionary in bytes
+DICTIONARY_SIZE = 16 * 1024
+
+
+class Codec:
+    """Turns message into text with header naming the codec: "<header>:<body>"."""
+
+    name = None
+
+    def header(self):
+        return self.name
+
+    def compress(self, data):
+        raise NotImplementedError
+
+    def decompress(self, data):
+        raise NotImplementedError
+
+    def encode(self, message):
+        body = self.compress(json.dumps(message, separators=(',', ':')).encode('utf-8'))
+        return self.header() + ":" + base64.b64encode(body).decode('ascii')
+
+    def decode(self, text):
+        return json.loads(self.decompress(base64.b64decode(text.partition(":")[2])).decode('utf-8'))
+
+
+class NoneCodec(Codec):
+    name = NONE
+
+    def compress(self, data):
+        return data
+
+    def decompress(self, data):
+        return data
+
+
+class ZlibCodec(Codec):
+    name = ZLIB
+
+    def __init__(self, level=zlib.Z_DEFAULT_COMPRESSION):
+        self.level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class WireCodec(Codec):
+    """ Binary wire format (see wire), rates must be fixed-point integers """
+
+    name = WIRE
+
+    def encode(self, message):
+        try:
+            body = wire.encode(message)
+        except wire.WireError as e:
+            raise CodecError(e.message)
+        return self.header() + ":" + base64.b64encode(body).decode('ascii')
+
+    def decode(self, text):
+        return wire.decode(base64.b64decode(text.partition(":")[2]))
+
+
+class ZstdCodec(Codec):
+    """ zstd with optional dictionary, the header names the dictionary id (zstd.<id>) """
+
+    name = ZSTD
+
+    def __init__(self, level=3, dictionary=None):
+        if not HAS_ZSTD:
+            raise CodecError("zstd codec requires zstandard package")
+        import zstandard
+
+        self.zstandard = zstandard
+        self.level = level
+        self.dictionary = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        # zstd contexts are not thread safe, every thread keeps its own (loading dictionary is costly)
+        self.contexts = threading.local()
+
+    def header(self):
+        if self.dictionary is None:
+            return self.name
+        return self.name + "." + str(self.dictionary.dict_id())
+
+    def compress(self, data):
+        compressor = getattr(self.contexts, "compressor", None)
+        if compressor is None:
+            compressor = self.contexts.compressor = self.zstandard.ZstdCompressor(level=self.level,
+                                                                                  dict_data=self.dictionary)
+        return compressor.compress(data)
+
+    def decompress(self, data):
+        decompressor = getattr(self.contexts, "decompressor", None)
+        if decompressor is None:
+            decompressor = self.contexts.decompressor = self.zstandard.ZstdDecompressor(dict_data=self.dictionary)
+        return decompressor.decompress(data)
+
+
+# decode() decodes text of any codec by its header, dictionaries: zstd dictionary bytes by header (zstd.<id>).
+# Text without header is the legacy format (base64 of zlib compressed json).
+def decode(text, dictionaries=None):
+    header, separator, _ = text.partition(":")
+    if not separator:
+        return json.loads(zlib.decompress(base64.b64decode(text)).decode('utf-8'))
+    return decoder(header, dictionaries).decode(text)
+
+
+# Decoding codecs by header, zstd contexts are reused between messages (dictionary id is part of header)
+_decoders = {}
+
+
+# decoder() returns codec decoding messages with header
+def decoder(header, dictionaries=None):
+    codec = _decoders.get(header)
+    if codec is not None:
+        return codec
+
+    if header == NONE:
+        codec = NoneCodec()
+    elif header == ZLIB:
+        codec = ZlibCodec()
+    elif header == WIRE:
+        codec = WireCodec()
+    elif header == ZSTD:
+        codec = ZstdCodec()
+    elif header.startswith(ZSTD + "."):
+        dictionary = (dictionaries or {}).get(header)
+        if dictionary is None:
+            raise CodecError("unknown zstd dictionary '" + header + "'")
+        codec = ZstdCodec(dictionary=dictionary)
+    else:
+        raise CodecError("unknown codec '" + header + "'")
+
+    _decoders[header] = codec
+    return codec
+
+
+# train_dictionary() returns zstd dictionary (bytes) trained on past messages
+def train_dictionary(messages, size=DICTIONARY_SIZE):
+    if not HAS_ZSTD:
+        raise CodecError("zstd dictionary requires zstandard package")
+    import zstandard
+
+    samples = [json.dumps(message, separators=(',', ':')).encode('utf-8') for message in messages]
+    return zstandard.train_dictionary(size, samples).as_bytes()
+
+
+# codec_from_env() builds codec from setting: none, zlib[:level], zstd[:level], wire (empty -> None, legacy format).
+# dictionary_path is file of zstd dictionary trained with train_dictionary() (benchmark.codecs -o).
+def codec_from_env(value, dictionary_path=None):
+    if not value:
+        return None
+
+    dictionary = None
+    if dictionary_path:
+        with open(dictionary_path, 'rb') as f:
+            dictionary = f.read()
+
+    name, _, level = value.partition(":")
+    if name == NONE:
+        return NoneCodec()
+    if name == ZLIB:
+        return ZlibCodec(int(level)) if level else ZlibCodec()
+    if name == ZSTD:
+        return ZstdCodec(int(level) if level else 3, dictionary)
+    if name == WIRE:
+        return WireCodec()
+
+    raise ValueError("unknown codec '" + value + "'")
+
+
+class CodecError(Exception):
+    """Exception raised when message can not be encoded or decoded.
+
+    Attributes:
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
@@ -0,0 +1,103 @@
+import copy
+import threading
+from time import time
+
+# Publishing modes
+FULL = "full"  # every run publishes the whole result
+DELTA = "delta"  # only changed rates are published, with periodic keyframes
+
+# Message types of delta mode
+KEYFRAME = "keyframe"
+CHANGES = "delta"
+
+# Default max seconds between two keyframes
+KEYFRAME_INTERVAL = 3600
+
+
+class Snapshots:
+    """Last published state of every country, turns collected results into delta messages.
+
+    The state is cached in the container and written to an optional durable store (see src.store),
+    so a cold container continues the same sequence. A keyframe (whole result) is published on the
+    first run, on a new date_key and at least every `keyframe_interval` seconds, other runs publish
+    only banks whose rates changed and all_rates if changed. Banks missing from a result (failed or
+    skipped) keep their last published rates.
+    """
+
+    def __init__(self, store=None, keyframe_interval=KEYFRAME_INTERVAL):
+        self.store = store
+        self.keyframe_interval = keyframe_interval
+        self.lock = threading.Lock()
+        self.snapshots = {}
+
+    def load(self, country):
+        with self.lock:
+            snapshot = self.snapshots.get(country)
+        if snapshot is None and self.store is not None:
+            snapshot = self.store.get("snapshot:" + country)
+        return snapshot
+
+    def save(self, country, snapshot):
+        with self.lock:
+            self.snapshots[country] = snapshot
+        if self.store is not None:
+            self.store.set("snapshot:" + country, snapshot)
+
+    def changes(self, result, now=None):
+        """ Message to publish for the collected result, None when nothing changed """
+        now = time() if now is None else now
+        snapshot = self.load(result["country"])
+
+        message = dict(result)
+        message["sequence"] = 1 if snapshot is None else snapshot["sequence"] + 1
+
+        if snapshot is None or snapshot["date_key"] != result["date_key"] or \
+                now - snapshot["keyframe_at"] >= self.keyframe_interval:
+            message["type"] = KEYFRAME
+            message["keyframe_at"] = now
+            return message
+
+        message["type"] = CHANGES
+        message["bank_rates"] = dict((bank_id, rates) for bank_id, rates in result["bank_rates"].items()
+                                     if snapshot["bank_rates"].get(bank_id) != rates)
+        if result["all_rates"] is None or result["all_rates"] == snapshot["all_rates"]:
+            del message["all_rates"]
+
+        if not message["bank_rates"] and "all_rates" not in message:
+            return None
+        return message
+
+    def forget(self, country):
+        """ Drops state of the country (message lost), next message is a keyframe """
+        with self.lock:
+            self.snapshots.pop(country, None)
+        if self.store is not None:
+            self.store.set("snapshot:" + country, None)
+
+    def published(self, message):
+        """ Remembers message as delivered, next changes are computed against it """
+        country = message["country"]
+        self.save(country, apply(self.load(country), message))
+
+
+# apply() returns state after message (keyframe or delta) is applied to the previous state (None if unknown).
+# Consumers of delta mode rebuild full results the same way.
+def apply(snapshot, message):
+    if message["type"] == KEYFRAME or snapshot is None:
+        snapshot = {
+            "bank_rates": {},
+            "all_rates": None,
+            "keyframe_at": message.get("keyframe_at", 0),
+        }
+    else:
+        snapshot = copy.deepcopy(snapshot)
+
+    snapshot["bank_rates"].update(copy.deepcopy(message["bank_rates"]))
+    if message.get("all_rates") is not None:
+        snapshot["all_rates"] = copy.deepcopy(message["all_rates"])
+
+    snapshot["country"] = message["country"]
+    snapshot["date_key"] = message["date_key"]
+    snapshot["timestamp"] = message["timestamp"]
+    snapshot["sequence"] = message["sequence"]
+    return snapshot
@@ -0,0 +1,161 @@
+import queue
+import random
+import threading
+import time
+
+# Default max messages waiting for the sink (producers block when full)
+QUEUE_LIMIT = 1000
+
+# Default seconds to wait for more messages of a batch
+LINGER = 0.05
+
+
+class Publisher:
+    """Sends messages to a sink in batches from a background thread.
+
+    submit() returns as soon as the message is queued, so collection continues while messages are
+    being sent. Up to sink.batch_size queued messages are sent together, failed sends are retried
+    with full jitter exponential backoff (`backoff` doubled every attempt, up to `max_backoff`
+    seconds). Messages still failing after `retries` attempts are dropped and reported to on_failed.
+    The queue holds at most `queue_limit` messages, submit() blocks while it is full. flush() reports
+    messages that were not delivered, so the caller can fail the run.
+    """
+
+    def __init__(self, sink, logger, queue_limit=QUEUE_LIMIT, retries=5, backoff=0.2, max_backoff=5,
+                 linger=LINGER, sleep=time.sleep):
+        self.sink = sink
+        self.log = logger
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.linger = linger
+        self.sleep = sleep
+        self.queue = queue.Queue(maxsize=queue_limit)
+        self.sent = 0
+        self.dropped = 0
+        # dropped messages already reported by flush()
+        self.reported = 0
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, message, on_sent=None, on_failed=None, timeout=None):
+        """ Queues message, on_sent(message) or on_failed(message) is called by the worker """
+        self.start()
+        try:
+            self.queue.put((message, on_sent, on_failed), timeout=timeout)
+        except queue.Full:
+            raise PublishError("publish queue is full")
+
+    def flush(self, timeout=None):
+        """ Waits until every queued message is sent or dropped, at most timeout seconds (None is unlimited).
+        Returns number of messages not delivered: dropped since the previous flush and still queued at timeout.
+        """
+        waiting = 0
+        if self.thread is not None:
+            end = None if timeout is None else time.time() + timeout
+            with self.queue.all_tasks_done:
+                while self.queue.unfinished_tasks:
+                    left = None if end is None else end - time.time()
+                    if left is not None and left <= 0:
+                        waiting = self.queue.unfinished_tasks
+                        break
+                    self.queue.all_tasks_done.wait(left)
+
+        with self.lock:
+            dropped = self.dropped - self.reported
+            self.reported += dropped
+        return dropped + waiting
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            if self.thread is not None:
+                self.queue.put(None)
+                self.thread.join()
+                self.thread = None
+        self.sink.close()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.work, name="publisher")
+                self.thread.daemon = True
+                self.thread.start()
+
+    def work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+
+            batch = [item]
+            stop = False
+            linger_end = time.time() + self.linger
+            while len(batch) < self.sink.batch_size:
+                try:
+                    item = self.queue.get(timeout=max(linger_end - time.time(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self.deliver(batch)
+            for _ in batch:
+                self.queue.task_done()
+            if stop:
+                self.queue.task_done()
+                return
+
+    def deliver(self, batch):
+        """ Sends batch of (message, on_sent, on_failed) with retries """
+        pending = batch
+        attempt = 0
+        while True:
+            try:
+                unsent = self.sink.send_batch([message for message, _, _ in pending])
+                error = "not accepted by sink"
+            except Exception as e:
+                unsent = [message for message, _, _ in pending]
+                error = getattr(e, 'message', str(e))
+
+            unsent_ids = set(id(message) for message in unsent)
+            for item in pending:
+                if id(item[0]) not in unsent_ids:
+                    self.sent += 1
+                    self.callback(item[1], item[0])
+            pending = [item for item in pending if id(item[0]) in unsent_ids]
+
+            if not pending:
+                return
+
+            attempt += 1
+            if attempt > self.retries:
+                break
+            self.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1))))
+
+        self.log.error({"msg": "publish failed: " + error, "dropped": len(pending)})
+        for message, _, on_failed in pending:
+            self.dropped += 1
+            self.callback(on_failed, message)
+
+    def callback(self, func, message):
+        if func is None:
+            return
+        try:
+            func(message)
+        except Exception as e:
+            self.log.error({"msg": "publish callback failed: " + str(e)})
+
+
+class PublishError(Exception):
+    """Exception raised when message can not be queued for publishing or queued messages were not delivered.
+
+    Attributes:
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
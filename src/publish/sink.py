@@ -0,0 +1,133 @@
+import json
+import sys
+import threading
+
+
+# Max messages of one SNS publish_batch call
+SNS_BATCH_SIZE = 10
+
+
+class Sink:
+    """Destination of published messages (collected results or deltas)."""
+
+    # max messages of one send_batch call
+    batch_size = SNS_BATCH_SIZE
+
+    def send(self, message):
+        raise NotImplementedError
+
+    def send_batch(self, messages):
+        """ Sends messages, returns the ones not accepted (raises if none was sent) """
+        for i, message in enumerate(messages):
+            try:
+                self.send(message)
+            except Exception:
+                if i == 0:
+                    raise
+                return messages[i:]
+        return []
+
+    def close(self):
+        pass
+
+
+class SnsSink(Sink):
+    """Publishes encoded message to SNS topic.
+
+    client None is created by connect() on the first message (keeps boto3 out of cold start).
+    """
+
+    def __init__(self, client, topic, encode, connect=None):
+        self.client = client
+        self.topic = topic
+        self.encode = encode
+        self.connect = connect
+        self.lock = threading.Lock()
+
+    def open(self):
+        with self.lock:
+            if self.client is None:
+                self.client = self.connect()
+        return self.client
+
+    def send(self, message):
+        self.open().publish(
+            TopicArn=self.topic,
+            Message=self.encode(message),
+        )
+
+    def send_batch(self, messages):
+        # publish_batch is missing in older botocore
+        client = self.open()
+        if len(messages) == 1 or not hasattr(client, "publish_batch"):
+            return Sink.send_batch(self, messages)
+
+        response = client.publish_batch(
+            TopicArn=self.topic,
+            PublishBatchRequestEntries=[
+                {"Id": str(i), "Message": self.encode(message)} for i, message in enumerate(messages)
+            ],
+        )
+        failed = [messages[int(entry["Id"])] for entry in response.get("Failed", [])]
+        if len(failed) == len(messages):
+            raise SinkError("batch not published: " + str(response["Failed"][0].get("Message")))
+        return failed
+
+
+class FileSink(Sink):
+    """ Appends message as json line to local file """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def send(self, message):
+        line = json.dumps(message) + "\n"
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+
+
+class StdoutSink(Sink):
+    """ Writes message as json line to stdout (local runs) """
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+        self.lock = threading.Lock()
+
+    def send(self, message):
+        with self.lock:
+            self.stream.write(json.dumps(message) + "\n")
+            self.stream.flush()
+
+
+# sink_from_env() builds sink from setting: sns, amqp, file:<path>, stdout. encode turns message into body.
+def sink_from_env(value, encode, sns_topic=None, amqp_url=None, amqp_exchange="", amqp_routing_key=""):
+    if value == "sns":
+        return SnsSink(None, sns_topic, encode, connect=sns_client)
+    if value == "amqp":
+        from src.publish.amqp import AmqpSink
+        return AmqpSink(amqp_url, amqp_exchange, amqp_routing_key, encode)
+    if value.startswith("file:"):
+        return FileSink(value[len("file:"):])
+    if value == "stdout":
+        return StdoutSink()
+
+    raise ValueError("unknown sink '" + str(value) + "'")
+
+
+# sns_client() creates boto3 SNS client (boto3 is imported on first use)
+def sns_client():
+    import boto3
+    return boto3.client('sns')
+
+
+class SinkError(Exception):
+    """Exception raised when message was not accepted by the sink.
+
+    Attributes:
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
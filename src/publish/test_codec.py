@@ -0,0 +1,72 @@
+import base64
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+
+from src.publish import codec
+
+MESSAGE = {
+    "country": "kg",
+    "date_key": "2026-10-18",
+    "timestamp": 1760745600,
+    "bank_rates": dict(("kg_bank" + str(i), {"usd_buy": 870000 + i, "usd_sale": 875000 + i}) for i in range(20)),
+    "all_rates": {"USD": {"code": "USD", "nominal": 1, "value": 874500}},
+    "skipped": [],
+}
+
+
+class TestCodecs(unittest.TestCase):
+
+    def test_round_trip(self):
+        for c in (codec.NoneCodec(), codec.ZlibCodec(), codec.ZlibCodec(9)):
+            text = c.encode(MESSAGE)
+            self.assertTrue(text.startswith(c.name + ":"))
+            self.assertEqual(codec.decode(text), MESSAGE)
+
+    def test_legacy_format(self):
+        legacy = base64.b64encode(zlib.compress(json.dumps(MESSAGE).encode('utf-8'))).decode('ascii')
+        self.assertEqual(codec.decode(legacy), MESSAGE)
+
+    def test_unknown_codec(self):
+        with self.assertRaises(codec.CodecError):
+            codec.decode("lz4:AAAA")
+
+    def test_codec_from_env(self):
+        self.assertIsNone(codec.codec_from_env(None))
+        self.assertEqual(codec.codec_from_env("zlib:9").level, 9)
+        self.assertIsInstance(codec.codec_from_env("none"), codec.NoneCodec)
+
+        with self.assertRaises(ValueError):
+            codec.codec_from_env("brotli")
+
+    @unittest.skipUnless(codec.HAS_ZSTD, "zstandard is not installed")
+    def test_zstd_dictionary(self):
+        corpus = [dict(MESSAGE, timestamp=MESSAGE["timestamp"] + i * 300, bank_rates=dict(
+            (bank_id, {"usd_buy": rates["usd_buy"] + i % 7, "usd_sale": rates["usd_sale"] + i % 5})
+            for bank_id, rates in MESSAGE["bank_rates"].items())) for i in range(200)]
+        dictionary = codec.train_dictionary(corpus, size=4096)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "rates.dict")
+        with open(path, 'wb') as f:
+            f.write(dictionary)
+
+        plain = codec.codec_from_env("zstd")
+        trained = codec.codec_from_env("zstd:3", path)
+        self.assertTrue(trained.header().startswith("zstd."))
+
+        text = trained.encode(MESSAGE)
+        self.assertLess(len(text), len(plain.encode(MESSAGE)))
+        self.assertEqual(codec.decode(text, {trained.header(): dictionary}), MESSAGE)
+        self.assertEqual(codec.decode(plain.encode(MESSAGE)), MESSAGE)
+
+        with self.assertRaises(codec.CodecError):
+            codec.decode(text.replace(trained.header(), "zstd.1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+import unittest
+
+from src.publish import KEYFRAME
+from src.publish import Snapshots
+from src.publish import apply
+from src.store import FileStore
+
+
+def result(bank_rates, all_rates=None, date_key="2026-10-18"):
+    return {
+        "country": "tj",
+        "date_key": date_key,
+        "timestamp": 1760745600,
+        "bank_rates": bank_rates,
+        "all_rates": all_rates,
+        "skipped": [],
+    }
+
+
+NB = {"USD": {"code": "USD", "nominal": 1, "value": 109000}}
+
+
+class TestSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.snapshots = Snapshots(keyframe_interval=3600)
+
+    def publish(self, collected, now):
+        message = self.snapshots.changes(collected, now=now)
+        if message is not None:
+            self.snapshots.published(message)
+        return message
+
+    def test_first_run_is_keyframe(self):
+        message = self.publish(result({"tj_a": {"usd_buy": 1}}, NB), now=0)
+        self.assertEqual(message["type"], KEYFRAME)
+        self.assertEqual(message["sequence"], 1)
+        self.assertEqual(message["bank_rates"], {"tj_a": {"usd_buy": 1}})
+
+    def test_only_changes(self):
+        self.publish(result({"tj_a": {"usd_buy": 1}, "tj_b": {"usd_buy": 2}}, NB), now=0)
+
+        self.assertIsNone(self.publish(result({"tj_a": {"usd_buy": 1}, "tj_b": {"usd_buy": 2}}, NB), now=60))
+
+        message = self.publish(result({"tj_a": {"usd_buy": 1}, "tj_b": {"usd_buy": 3}}, NB), now=120)
+        self.assertEqual(message["type"], "delta")
+        self.assertEqual(message["sequence"], 2)
+        self.assertEqual(message["bank_rates"], {"tj_b": {"usd_buy": 3}})
+        self.assertNotIn("all_rates", message)
+
+    def test_failed_bank_keeps_last_rates(self):
+        self.publish(result({"tj_a": {"usd_buy": 1}, "tj_b": {"usd_buy": 2}}, NB), now=0)
+        self.assertIsNone(self.publish(result({"tj_a": {"usd_buy": 1}}, None), now=60))
+
+        state = self.snapshots.load("tj")
+        self.assertEqual(state["bank_rates"]["tj_b"], {"usd_buy": 2})
+        self.assertEqual(state["all_rates"], NB)
+
+    def test_keyframes(self):
+        self.publish(result({"tj_a": {"usd_buy": 1}}, NB), now=0)
+        self.assertEqual(self.publish(result({"tj_a": {"usd_buy": 1}}, NB), now=3600)["type"], KEYFRAME)
+
+        # new day starts with keyframe
+        message = self.publish(result({"tj_a": {"usd_buy": 1}}, NB, date_key="2026-10-19"), now=3700)
+        self.assertEqual(message["type"], KEYFRAME)
+
+    def test_consumer_rebuilds_result(self):
+        consumer = None
+        runs = [
+            result({"tj_a": {"usd_buy": 1}, "tj_b": {"usd_buy": 2}}, NB),
+            result({"tj_a": {"usd_buy": 5}}, None),
+            result({"tj_a": {"usd_buy": 5}, "tj_b": {"usd_buy": 6}}, {"USD": {"code": "USD", "nominal": 1, "value": 1}}),
+        ]
+        for i, collected in enumerate(runs):
+            message = self.publish(collected, now=i * 60)
+            consumer = apply(consumer, message)
+
+        self.assertEqual(consumer["bank_rates"], {"tj_a": {"usd_buy": 5}, "tj_b": {"usd_buy": 6}})
+        self.assertEqual(consumer["all_rates"]["USD"]["value"], 1)
+        self.assertEqual(consumer["bank_rates"], self.snapshots.load("tj")["bank_rates"])
+
+    def test_forget(self):
+        self.publish(result({"tj_a": {"usd_buy": 1}}, NB), now=0)
+        self.snapshots.forget("tj")
+        self.assertEqual(self.publish(result({"tj_a": {"usd_buy": 1}}, NB), now=60)["type"], KEYFRAME)
+
+    def test_durable_store(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        self.snapshots = Snapshots(FileStore(directory))
+        self.publish(result({"tj_a": {"usd_buy": 1}}, NB), now=0)
+
+        # cold container continues the sequence
+        self.snapshots = Snapshots(FileStore(directory))
+        message = self.publish(result({"tj_a": {"usd_buy": 2}}, NB), now=60)
+        self.assertEqual(message["type"], "delta")
+        self.assertEqual(message["sequence"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
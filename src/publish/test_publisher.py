@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+import unittest
+
+from src.publish import PublishError
+from src.publish import Publisher
+from src.publish import Sink
+from src.publish import SnsSink
+
+
+class StubSns:
+    """ Stub of SNS endpoint, fails the first `failures` entries it receives """
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+
+    def publish_batch(self, TopicArn, PublishBatchRequestEntries):
+        successful, failed = [], []
+        for entry in PublishBatchRequestEntries:
+            if self.failures > 0:
+                self.failures -= 1
+                failed.append({"Id": entry["Id"], "Code": "InternalError", "Message": "try again"})
+            else:
+                successful.append({"Id": entry["Id"], "MessageId": entry["Message"]})
+        self.batches.append([entry["Message"] for entry in PublishBatchRequestEntries])
+        return {"Successful": successful, "Failed": failed}
+
+
+class BlockingSink(Sink):
+    batch_size = 1
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.messages = []
+
+    def send(self, message):
+        self.release.wait(2)
+        self.messages.append(message)
+
+
+class TestPublisher(unittest.TestCase):
+
+    def publisher(self, sink, **kwargs):
+        self.sleeps = []
+        kwargs.setdefault("linger", 0.2)
+        publisher = Publisher(sink, logging.getLogger(), sleep=self.sleeps.append, **kwargs)
+        self.addCleanup(publisher.close)
+        return publisher
+
+    def test_batches(self):
+        sns = StubSns()
+        publisher = self.publisher(SnsSink(sns, "topic", str))
+        sent = []
+        for i in range(25):
+            publisher.submit(i, on_sent=sent.append)
+        publisher.flush()
+
+        self.assertEqual([len(batch) for batch in sns.batches], [10, 10, 5])
+        self.assertEqual(sorted(sent), list(range(25)))
+        self.assertEqual(publisher.sent, 25)
+
+    def test_retry_failed_entries(self):
+        sns = StubSns(failures=3)
+        publisher = self.publisher(SnsSink(sns, "topic", str), backoff=0.5, max_backoff=1)
+        for i in range(5):
+            publisher.submit(i)
+        publisher.flush()
+
+        # only failed entries are sent again, after jittered backoff
+        self.assertEqual(sns.batches, [["0", "1", "2", "3", "4"], ["0", "1", "2"]])
+        self.assertEqual(len(self.sleeps), 1)
+        self.assertTrue(0 <= self.sleeps[0] <= 0.5)
+        self.assertEqual(publisher.sent, 5)
+
+    def test_dropped_after_retries(self):
+        sns = StubSns(failures=100)
+        publisher = self.publisher(SnsSink(sns, "topic", str), retries=3, backoff=1, max_backoff=2)
+        failed = []
+        publisher.submit("a", on_failed=failed.append)
+        publisher.submit("b", on_failed=failed.append)
+        self.assertEqual(publisher.flush(), 2)
+        self.assertEqual(publisher.flush(), 0)
+
+        self.assertEqual(sorted(failed), ["a", "b"])
+        self.assertEqual(len(sns.batches), 4)
+        self.assertEqual(publisher.dropped, 2)
+        self.assertTrue(all(delay <= 2 for delay in self.sleeps))
+
+    def test_queue_limit(self):
+        sink = BlockingSink()
+        publisher = self.publisher(sink, queue_limit=2, linger=0)
+        publisher.submit(1)
+        time.sleep(0.1)
+        publisher.submit(2)
+        publisher.submit(3)
+
+        # worker is stuck with message 1, the queue holds 2 & 3
+        with self.assertRaises(PublishError):
+            publisher.submit(4, timeout=0.1)
+
+        sink.release.set()
+        self.assertEqual(publisher.flush(), 0)
+        self.assertEqual(sink.messages, [1, 2, 3])
+
+    def test_flush_timeout(self):
+        sink = BlockingSink()
+        publisher = self.publisher(sink, linger=0)
+        publisher.submit(1)
+        publisher.submit(2)
+
+        start = time.time()
+        self.assertEqual(publisher.flush(timeout=0.2), 2)
+        self.assertLess(time.time() - start, 1)
+
+        sink.release.set()
+        self.assertEqual(publisher.flush(timeout=5), 0)
+        self.assertEqual(sink.messages, [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pika import exceptions as amqp
+
+from src.publish import AmqpSink
+from src.publish import FileSink
+from src.publish import SinkError
+from src.publish import SnsSink
+from src.publish import StdoutSink
+from src.publish import sink_from_env
+
+
+class FakeChannel:
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.is_open = True
+        self.confirms = False
+
+    def confirm_delivery(self):
+        self.confirms = True
+
+    def publish(self, exchange, routing_key, body, properties=None, mandatory=False):
+        if self.broker.fail:
+            error = self.broker.fail.pop(0)
+            if isinstance(error, amqp.ConnectionClosed):
+                self.broker.connection.is_open = False
+            raise error
+        self.broker.messages.append((exchange, routing_key, body, properties.delivery_mode, self.confirms))
+
+
+class FakeConnection:
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.is_open = True
+
+    def channel(self):
+        return FakeChannel(self.broker)
+
+    def close(self):
+        self.is_open = False
+
+
+class FakeBroker:
+    """ In-memory stand in of RabbitMQ, counts opened connections """
+
+    def __init__(self):
+        self.connections = 0
+        self.connection = None
+        self.messages = []
+        self.fail = []
+
+    def connect(self, url):
+        self.connections += 1
+        self.connection = FakeConnection(self)
+        return self.connection
+
+
+class TestAmqpSink(unittest.TestCase):
+
+    def setUp(self):
+        self.broker = FakeBroker()
+        self.sink = AmqpSink("amqp://localhost", "cerp", "rates.tj", json.dumps, connect=self.broker.connect)
+
+    def test_persistent_connection(self):
+        for i in range(3):
+            self.sink.send({"country": "tj", "sequence": i})
+
+        self.assertEqual(self.broker.connections, 1)
+        self.assertEqual(len(self.broker.messages), 3)
+        exchange, routing_key, body, delivery_mode, confirms = self.broker.messages[0]
+        self.assertEqual((exchange, routing_key), ("cerp", "rates.tj"))
+        self.assertEqual(json.loads(body)["sequence"], 0)
+        self.assertEqual(delivery_mode, 2)
+        self.assertTrue(confirms)
+
+    def test_reconnect(self):
+        self.sink.send({"country": "tj"})
+        self.broker.fail.append(amqp.ConnectionClosed(320, "restart"))
+        self.sink.send({"country": "tj"})
+
+        self.assertEqual(self.broker.connections, 2)
+        self.assertEqual(len(self.broker.messages), 2)
+
+    def test_not_confirmed(self):
+        self.broker.fail.append(amqp.NackError([]))
+        with self.assertRaises(SinkError):
+            self.sink.send({"country": "tj"})
+
+    def test_close(self):
+        self.sink.send({"country": "tj"})
+        self.sink.close()
+        self.assertFalse(self.broker.connection.is_open)
+
+
+class TestSinks(unittest.TestCase):
+
+    def test_sns_client_on_first_message(self):
+        published, clients = [], []
+
+        class Client:
+            def publish(self, **kwargs):
+                published.append(kwargs["Message"])
+
+        def connect():
+            clients.append(Client())
+            return clients[-1]
+
+        sink = SnsSink(None, "topic", json.dumps, connect=connect)
+        self.assertEqual(clients, [])
+        sink.send({"country": "tj"})
+        sink.send({"country": "uz"})
+
+        self.assertEqual(len(clients), 1)
+        self.assertEqual([json.loads(m)["country"] for m in published], ["tj", "uz"])
+
+    def test_file_sink(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "rates.jsonl")
+
+        sink = FileSink(path)
+        sink.send({"country": "tj"})
+        sink.send({"country": "uz"})
+
+        with open(path) as f:
+            self.assertEqual([json.loads(line)["country"] for line in f], ["tj", "uz"])
+
+    def test_stdout_sink(self):
+        stream = io.StringIO()
+        StdoutSink(stream).send({"country": "kg"})
+        self.assertEqual(json.loads(stream.getvalue()), {"country": "kg"})
+
+    def test_sink_from_env(self):
+        self.assertIsInstance(sink_from_env("file:/tmp/rates.jsonl", json.dumps), FileSink)
+        self.assertIsInstance(sink_from_env("stdout", json.dumps), StdoutSink)
+        self.assertIsInstance(sink_from_env("amqp", json.dumps, amqp_url="amqp://localhost"), AmqpSink)
+
+        # SNS client (boto3) is only created by the first message
+        sns = sink_from_env("sns", json.dumps, sns_topic="topic")
+        self.assertIsInstance(sns, SnsSink)
+        self.assertIsNone(sns.client)
+
+        with self.assertRaises(ValueError):
+            sink_from_env("kafka", json.dumps)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import unittest
+
+from src.publish import codec
+from src.publish import wire
+
+RESULT = {
+    "country": "kz",
+    "date_key": "2026-10-18",
+    "timestamp": 1760745600,
+    "bank_rates": {
+        "kz_nbk": {"usd_buy": 4705000, "usd_sale": 4705000, "eur_buy": 5102500, "eur_sale": 5102500},
+        "kz_bcc": {"usd_buy": 4690000, "usd_sale": 4730000, "rub_buy": 58000, "rub_sale": 62000},
+        "kz_tsb": {"usd_buy": 4695000, "usd_sale": 4725000},
+    },
+    "all_rates": {
+        "USD": {"code": "USD", "nominal": 1, "value": 4705000},
+        "JPY": {"code": "JPY", "nominal": 100, "value": 3150000},
+    },
+    "skipped": ["kz_deltabank"],
+}
+
+
+class TestWire(unittest.TestCase):
+
+    def assert_round_trip(self, message):
+        # decoded message equals the json form of the message
+        self.assertEqual(wire.decode(wire.encode(message)), json.loads(json.dumps(message)))
+
+    def test_result(self):
+        self.assert_round_trip(RESULT)
+        self.assertLess(len(wire.encode(RESULT)), len(json.dumps(RESULT)))
+
+    def test_delta_message(self):
+        message = dict(RESULT, type="delta", sequence=42, bank_rates={"kz_tsb": RESULT["bank_rates"]["kz_tsb"]})
+        del message["all_rates"]
+        self.assert_round_trip(message)
+
+    def test_no_rates(self):
+        self.assert_round_trip(dict(RESULT, bank_rates={}, all_rates=None, skipped=[]))
+
+    def test_wide_rates(self):
+        # UZS per unit of gold does not fit in int32
+        message = dict(RESULT, all_rates={"XAU": {"code": "XAU", "nominal": 1, "value": 31000000000000}})
+        self.assert_round_trip(message)
+
+    def test_invalid(self):
+        with self.assertRaises(wire.WireError):
+            wire.encode(dict(RESULT, bank_rates={"kz_bcc": {"usd_buy": 469.5}}))
+        with self.assertRaises(wire.WireError):
+            wire.decode(wire.encode(RESULT)[:40])
+        with self.assertRaises(wire.WireError):
+            wire.decode(b"{}")
+
+    def test_codec(self):
+        text = codec.codec_from_env("wire").encode(RESULT)
+        self.assertTrue(text.startswith("wire:"))
+        self.assertEqual(codec.decode(text), RESULT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,243 @@
+"""Compact binary form of collected results (handle_execute result or delta message).
+
+Layout, counts are varints, arrays are little-endian fixed-width integers so they are packed and
+unpacked by struct in one call:
+
+    magic "CR", version
+    fields     -- bit mask of present fields (FIELDS order), all_rates None is bit ALL_RATES_NONE
+    width      -- bytes of a rate (4 if all rates fit in int32, else 8), missing rate is the min value
+    strings    -- byte length & "\\0" separated utf-8 of every interned string
+    country, date_key           -- string ids
+    timestamp                   -- int64
+    columns    -- count, uint16 string ids of rate keys (usd_buy, eur_sale, ...)
+    banks      -- count, uint16 string ids, then rates matrix: one row per bank, one column per key
+    all_rates  -- count, uint16 key ids, uint16 code ids, nominals, values
+    skipped    -- count, uint16 string ids
+    extra      -- byte length & utf-8 json of other fields (type, sequence, ... of delta messages)
+
+Every bank id, rate key and currency code is stored once and referred to by id, rates are the
+fixed-point integers of rate_helper.from_string.
+"""
+import json
+import struct
+
+MAGIC = b"CR"
+VERSION = 1
+
+FIELDS = ("country", "date_key", "timestamp", "bank_rates", "all_rates", "skipped")
+ALL_RATES_NONE = 1 << len(FIELDS)
+
+# struct format of a rate by width
+RATE_FORMATS = {4: "i", 8: "q"}
+INT32 = 2 ** 31
+
+
+def encode(message):
+    """ Returns bytes of message, raises WireError if a rate is not an integer """
+    strings = Strings()
+
+    fields = 0
+    for i, field in enumerate(FIELDS):
+        if field in message:
+            fields |= 1 << i
+    all_rates = message.get("all_rates")
+    if "all_rates" in message and all_rates is None:
+        fields |= ALL_RATES_NONE
+
+    bank_rates = message.get("bank_rates", {})
+    banks = sorted(bank_rates)
+    columns = sorted(set(key for bank_id in banks for key in bank_rates[bank_id]))
+    currencies = sorted(all_rates or {})
+
+    rates = [bank_rates[bank_id].get(column) for bank_id in banks for column in columns]
+    for key in currencies:
+        rates.append(all_rates[key]["nominal"])
+        rates.append(all_rates[key]["value"])
+    for value in rates:
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+            raise WireError("not an integer rate: " + repr(value))
+
+    width = 4 if all(value is None or -INT32 < value < INT32 for value in rates) else 8
+    missing = -2 ** (width * 8 - 1)
+    rate = RATE_FORMATS[width]
+
+    body = bytearray()
+    if "country" in message:
+        write_uint(body, strings.id(message["country"]))
+    if "date_key" in message:
+        write_uint(body, strings.id(message["date_key"]))
+    if "timestamp" in message:
+        body.extend(struct.pack("<q", message["timestamp"]))
+
+    if "bank_rates" in message:
+        write_ids(body, [strings.id(column) for column in columns])
+        write_ids(body, [strings.id(bank_id) for bank_id in banks])
+        values = [missing if value is None else value for value in rates[:len(banks) * len(columns)]]
+        body.extend(struct.pack("<%d%s" % (len(values), rate), *values))
+
+    if all_rates is not None:
+        write_ids(body, [strings.id(key) for key in currencies])
+        body.extend(struct.pack("<%dH" % len(currencies), *[strings.id(all_rates[key]["code"]) for key in currencies]))
+        values = rates[len(banks) * len(columns):]
+        body.extend(struct.pack("<%d%s" % (len(values), rate), *values))
+
+    if "skipped" in message:
+        write_ids(body, [strings.id(bank_id) for bank_id in message["skipped"]])
+
+    extra = dict((key, message[key]) for key in message if key not in FIELDS)
+    write_bytes(body, json.dumps(extra, separators=(',', ':')).encode('utf-8') if extra else b"")
+
+    head = bytearray(MAGIC)
+    write_uint(head, VERSION)
+    write_uint(head, fields)
+    write_uint(head, width)
+    write_bytes(head, "\0".join(strings.values).encode('utf-8'))
+    return bytes(head + body)
+
+
+def decode(data):
+    """ Returns message of bytes made by encode() """
+    if data[:len(MAGIC)] != MAGIC:
+        raise WireError("not a wire message")
+
+    reader = Reader(data, len(MAGIC))
+    version = reader.uint()
+    if version != VERSION:
+        raise WireError("unsupported wire version " + str(version))
+
+    fields = reader.uint()
+    width = reader.uint()
+    if width not in RATE_FORMATS:
+        raise WireError("unsupported rate width " + str(width))
+    rate = RATE_FORMATS[width]
+    missing = -2 ** (width * 8 - 1)
+    strings = reader.bytes().decode('utf-8').split("\0")
+
+    message = {}
+    if fields & 1:
+        message["country"] = strings[reader.uint()]
+    if fields & 2:
+        message["date_key"] = strings[reader.uint()]
+    if fields & 4:
+        message["timestamp"] = reader.array("q", 1)[0]
+
+    if fields & 8:
+        columns = [strings[i] for i in reader.ids()]
+        banks = [strings[i] for i in reader.ids()]
+        values = reader.array(rate, len(banks) * len(columns))
+        count = len(columns)
+        bank_rates = {}
+        for row, bank_id in enumerate(banks):
+            row_values = values[row * count:(row + 1) * count]
+            if missing in row_values:
+                bank_rates[bank_id] = dict((column, value) for column, value in zip(columns, row_values)
+                                           if value != missing)
+            else:
+                bank_rates[bank_id] = dict(zip(columns, row_values))
+        message["bank_rates"] = bank_rates
+
+    if fields & 16:
+        if fields & ALL_RATES_NONE:
+            message["all_rates"] = None
+        else:
+            keys = [strings[i] for i in reader.ids()]
+            codes = reader.array("H", len(keys))
+            values = reader.array(rate, 2 * len(keys))
+            message["all_rates"] = dict(
+                (key, {"code": strings[codes[i]], "nominal": values[2 * i], "value": values[2 * i + 1]})
+                for i, key in enumerate(keys)
+            )
+
+    if fields & 32:
+        message["skipped"] = [strings[i] for i in reader.ids()]
+
+    extra = reader.bytes()
+    if extra:
+        message.update(json.loads(extra.decode('utf-8')))
+    return message
+
+
+class Strings:
+    """ Interned strings of a message, id is the position in values """
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def id(self, value):
+        if value not in self.ids:
+            if "\0" in value:
+                raise WireError("string with NUL character: " + repr(value))
+            self.ids[value] = len(self.values)
+            self.values.append(value)
+        return self.ids[value]
+
+
+class Reader:
+
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+
+    def uint(self):
+        result = 0
+        shift = 0
+        while True:
+            if self.pos >= len(self.data):
+                raise WireError("truncated wire message")
+            byte = self.data[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def array(self, kind, count):
+        fmt = "<%d%s" % (count, kind)
+        size = struct.calcsize(fmt)
+        if self.pos + size > len(self.data):
+            raise WireError("truncated wire message")
+        values = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += size
+        return values
+
+    def ids(self):
+        return self.array("H", self.uint())
+
+    def bytes(self):
+        length = self.uint()
+        value = self.data[self.pos:self.pos + length]
+        if len(value) != length:
+            raise WireError("truncated wire message")
+        self.pos += length
+        return bytes(value)
+
+
+# write_uint() appends unsigned varint
+def write_uint(buf, value):
+    while value >= 0x80:
+        buf.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+# write_ids() appends count & uint16 string ids
+def write_ids(buf, ids):
+    write_uint(buf, len(ids))
+    buf.extend(struct.pack("<%dH" % len(ids), *ids))
+
+
+def write_bytes(buf, value):
+    write_uint(buf, len(value))
+    buf.extend(value)
+
+
+class WireError(Exception):
+    """Exception raised when message can not be encoded to or decoded from wire format.
+
+    Attributes:
+        message -- explanation of the error
+    """
+
+    def __init__(self, message):
+        self.message = message
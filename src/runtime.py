@@ -0,0 +1,116 @@
+import time
+
+from src.fetcher.fetcher import reset_session
+
+
+class Runtime:
+    """Objects of a warm lambda container kept between invocations.
+
+    Parsers (with their fetchers, the shared http session, compiled specs & caches), the parsing
+    executor and the publisher (with its sink connection) are created on first use and reused by
+    every invocation. Before an invocation they are checked, if a check fails everything is closed
+    and created again on next use.
+
+    Attributes:
+        new_parsers -- function(executor) returning parsers of configured countries
+        new_publisher -- function returning publisher of the sink
+        new_executor -- function returning executor shared by parsers (None runs without one)
+        max_failures -- failed invocations in a row causing reset
+    """
+
+    def __init__(self, logger, new_parsers, new_publisher, new_executor=None, max_failures=3):
+        self.log = logger
+        self.new_parsers = new_parsers
+        self.new_publisher = new_publisher
+        self.new_executor = new_executor
+        self.max_failures = max_failures
+
+        self.parsers = None
+        self.publisher = None
+        self.executor = None
+        self.created = time.time()
+        self.invocations = 0
+        self.failures = 0
+        self.resets = 0
+
+    def get_executor(self):
+        if self.executor is None and self.new_executor is not None:
+            self.executor = self.new_executor()
+        return self.executor
+
+    def get_parsers(self):
+        if self.parsers is None:
+            self.parsers = self.new_parsers(self.get_executor())
+        return self.parsers
+
+    def get_publisher(self):
+        if self.publisher is None:
+            self.publisher = self.new_publisher()
+        return self.publisher
+
+    def check(self):
+        """ Returns problems of kept objects, empty list if they can be reused """
+        problems = []
+        if self.failures >= self.max_failures:
+            problems.append(str(self.failures) + " failed invocations in a row")
+
+        publisher = self.publisher
+        if publisher is not None and publisher.thread is not None and not publisher.thread.is_alive():
+            problems.append("publisher worker stopped")
+
+        # stdlib executor has no public state, a shut down one rejects new jobs
+        if self.executor is not None and getattr(self.executor, "_shutdown", False):
+            problems.append("executor shut down")
+
+        return problems
+
+    def invoke(self, run):
+        """ Calls run(runtime) with healthy objects, an exception or empty result counts as failure """
+        problems = self.check()
+        if problems:
+            self.reset(", ".join(problems))
+
+        self.invocations += 1
+        try:
+            result = run(self)
+        except Exception:
+            self.failures += 1
+            raise
+
+        self.failures = 0 if result else self.failures + 1
+        return result
+
+    def reset(self, reason):
+        """ Closes kept objects, they are created again on next use """
+        self.log.warning({"msg": "runtime reset", "reason": reason, "stats": self.stats()})
+        self.close()
+        self.resets += 1
+        self.failures = 0
+        self.created = time.time()
+
+    def close(self):
+        parsers, publisher, executor = self.parsers, self.publisher, self.executor
+        self.parsers = self.publisher = self.executor = None
+
+        if publisher is not None:
+            try:
+                publisher.close()
+            except Exception as e:
+                self.log.error({"msg": "closing publisher failed", "error": str(e)})
+
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+        if parsers is not None:
+            # fetchers of new parsers get a new shared session
+            for parser in parsers:
+                parser.fetcher.session.close()
+            reset_session()
+
+    def stats(self):
+        return {
+            "invocations": self.invocations,
+            "resets": self.resets,
+            "failures": self.failures,
+            "age": round(time.time() - self.created, 3),
+        }
@@ -0,0 +1,3 @@
+from .store import FileStore
+from .store import MemoryStore
+from .store import store_from_env
@@ -0,0 +1,60 @@
+import hashlib
+import json
+import os
+import threading
+
+
+class MemoryStore:
+    """ In-process store of json values, lives as long as the (warm) container """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def get(self, key):
+        with self.lock:
+            value = self.values.get(key)
+        # same copy semantics as durable stores
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value):
+        value = json.dumps(value)
+        with self.lock:
+            self.values[key] = value
+
+
+class FileStore:
+    """ Local file store of json values, one file per key """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".json")
+
+    def get(self, key):
+        try:
+            with open(self.path(key)) as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return None
+
+    def set(self, key, value):
+        path = self.path(key)
+        tmp = path + "." + str(threading.get_ident()) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp, path)
+
+
+# store_from_env() builds store from setting: memory, file:<directory> (empty -> None)
+def store_from_env(value):
+    if not value:
+        return None
+    if value == "memory":
+        return MemoryStore()
+    if value.startswith("file:"):
+        return FileStore(value[len("file:"):])
+
+    raise ValueError("unknown store '" + value + "'")
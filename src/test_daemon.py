@@ -0,0 +1,87 @@
+import logging
+import threading
+import unittest
+
+from src.daemon import Daemon
+from src.fetcher import Fetcher
+from src.parser import base
+
+
+class CountingParser(base.Parser):
+    country = "tj"
+    national_bank = "tj_nbt"
+
+    def __init__(self):
+        base.Parser.__init__(self, self.country, logging.getLogger(), Fetcher(), workers=1)
+        self.calls = {}
+        self.date_key = "2026-10-18"
+
+    def rates(self, bank_id):
+        def func():
+            self.calls[bank_id] = self.calls.get(bank_id, 0) + 1
+            return {"usd_buy": self.calls[bank_id], "usd_sale": 1}
+        return func
+
+    def bank_rate_functions(self):
+        return {"tj_a": self.rates("tj_a"), "tj_nbt": self.rates("tj_nbt")}
+
+    def all_rates_function(self):
+        return lambda: {"USD": {"code": "USD", "nominal": 1, "value": 10}}
+
+    def handle_execute(self, b_rate_functions, nb_rate_function, deadline=None):
+        result = base.Parser.handle_execute(self, b_rate_functions, nb_rate_function, deadline)
+        result["date_key"] = self.date_key
+        return result
+
+
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = CountingParser()
+        self.published = []
+        self.daemon = Daemon([self.parser], self.published.append, logging.getLogger(),
+                             bank_interval=300, national_interval=3600)
+
+    def test_intervals(self):
+        self.assertEqual(self.daemon.tick(now=0), 3)
+        self.assertEqual(self.daemon.tick(now=10), 0)
+
+        # only the commercial bank is due after 5 minutes
+        self.assertEqual(self.daemon.tick(now=300), 1)
+        self.assertEqual(self.parser.calls, {"tj_a": 2, "tj_nbt": 1})
+        self.assertEqual(self.daemon.sleep_time(now=310), 290)
+
+        self.assertEqual(self.daemon.tick(now=3600), 3)
+        self.assertEqual(self.parser.calls, {"tj_a": 3, "tj_nbt": 2})
+
+    def test_merged_state(self):
+        self.daemon.tick(now=0)
+        self.daemon.tick(now=300)
+
+        state = self.published[-1]
+        self.assertEqual(state["bank_rates"]["tj_a"]["usd_buy"], 2)
+        self.assertEqual(state["bank_rates"]["tj_nbt"]["usd_buy"], 1)
+        self.assertEqual(state["all_rates"]["USD"]["value"], 10)
+
+    def test_new_day(self):
+        self.daemon.tick(now=0)
+        self.parser.date_key = "2026-10-19"
+        self.daemon.tick(now=300)
+
+        # yesterday's national bank rates are dropped and collected again right away
+        self.assertNotIn("tj_nbt", self.published[-1]["bank_rates"])
+        self.assertEqual(self.daemon.tick(now=301), 2)
+        self.assertEqual(self.published[-1]["bank_rates"]["tj_nbt"]["usd_buy"], 2)
+
+    def test_stop(self):
+        thread = threading.Thread(target=self.daemon.run)
+        thread.start()
+        self.daemon.stop()
+        thread.join(2)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(self.published), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import logging
+import os
+import subprocess
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.fetcher import Fetcher
+from src.parser import base
+from src.parser.countries import parse_countries
+from src.publish import Publisher
+from src.publish import Sink
+from src.runtime import Runtime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StaticParser(base.Parser):
+    country = "tj"
+
+    def __init__(self, executor):
+        base.Parser.__init__(self, self.country, logging.getLogger(), Fetcher(), workers=2, executor=executor)
+
+    def parse_all(self, deadline=None):
+        return self.handle_execute({"tj_a": lambda: {"usd_buy": 1, "usd_sale": 2}}, None, deadline=deadline)
+
+
+class ListSink(Sink):
+
+    def __init__(self):
+        self.messages = []
+        self.closed = 0
+
+    def send(self, message):
+        self.messages.append(message)
+
+    def close(self):
+        self.closed += 1
+
+
+class TestRuntime(unittest.TestCase):
+
+    def setUp(self):
+        self.created = {"parsers": 0, "publishers": 0, "executors": 0}
+        self.sinks = []
+        self.runtime = Runtime(logging.getLogger(), self.new_parsers, self.new_publisher,
+                               new_executor=self.new_executor, max_failures=2)
+        self.addCleanup(self.runtime.close)
+
+    def new_parsers(self, executor):
+        self.created["parsers"] += 1
+        return [StaticParser(executor)]
+
+    def new_publisher(self):
+        self.created["publishers"] += 1
+        self.sinks.append(ListSink())
+        return Publisher(self.sinks[-1], logging.getLogger(), linger=0)
+
+    def new_executor(self):
+        self.created["executors"] += 1
+        return ThreadPoolExecutor(max_workers=2)
+
+    @staticmethod
+    def collect(runtime):
+        publisher = runtime.get_publisher()
+        results = parse_countries(runtime.get_parsers(), on_result=publisher.submit)
+        publisher.flush()
+        return results
+
+    def invocation(self):
+        """ Objects used by an invocation """
+        self.runtime.invoke(self.collect)
+        parser = self.runtime.get_parsers()[0]
+        publisher = self.runtime.get_publisher()
+        return {
+            "parser": parser,
+            "fetcher": parser.fetcher,
+            "session": parser.fetcher.session,
+            "executor": parser.executor,
+            "specs": parser.specs,
+            "publisher": publisher,
+            "sink": publisher.sink,
+            "worker": publisher.thread,
+        }
+
+    def test_warm_invocation_reuses_objects(self):
+        first = self.invocation()
+        second = self.invocation()
+
+        for name in first:
+            self.assertIs(first[name], second[name], name)
+        self.assertEqual(self.created, {"parsers": 1, "publishers": 1, "executors": 1})
+        self.assertEqual(len(self.sinks[0].messages), 2)
+        self.assertEqual(self.runtime.stats()["invocations"], 2)
+
+    def test_reset_after_failures(self):
+        first = self.invocation()
+
+        def broken(runtime):
+            raise RuntimeError("broken")
+
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                self.runtime.invoke(broken)
+        self.assertEqual(self.runtime.check(), ["2 failed invocations in a row"])
+
+        second = self.invocation()
+        for name in ["parser", "fetcher", "session", "executor", "publisher", "sink"]:
+            self.assertIsNot(first[name], second[name], name)
+        self.assertEqual(self.created, {"parsers": 2, "publishers": 2, "executors": 2})
+        self.assertEqual(self.sinks[0].closed, 1)
+        self.assertEqual(self.runtime.stats()["resets"], 1)
+
+        # an empty result is a failure too, a successful invocation clears failures
+        self.runtime.invoke(lambda runtime: {})
+        self.assertEqual(self.runtime.failures, 1)
+        self.invocation()
+        self.assertEqual(self.runtime.failures, 0)
+
+    def test_unhealthy_objects(self):
+        self.invocation()
+        self.assertEqual(self.runtime.check(), [])
+
+        worker = threading.Thread(target=lambda: None)
+        worker.start()
+        worker.join()
+        self.runtime.get_publisher().thread = worker
+        self.runtime.get_executor().shutdown()
+        self.assertEqual(self.runtime.check(), ["publisher worker stopped", "executor shut down"])
+
+        self.invocation()
+        self.assertEqual(self.runtime.check(), [])
+        self.assertEqual(self.created["executors"], 2)
+
+
+
+class TestColdStart(unittest.TestCase):
+
+    def test_lazy_imports(self):
+        # modules of opt-in features are not imported by the handler module unless they are enabled
+        code = ("import sys, app; print(sorted(m for m in ('asyncio', 'zstandard', 'cProfile', 'pstats', "
+                "'tracemalloc', 'pika', 'boto3') if m in sys.modules))")
+        env = dict(os.environ, CERP_COUNTRY="all", CERP_LOG_LEVEL="ERROR", CERP_SINK="stdout")
+        for name in ["CERP_CODEC", "CERP_PROFILE", "CERP_PARSE_PROCESSES"]:
+            env.pop(name, None)
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT, env=env)
+        self.assertEqual(output.decode().strip(), "[]")
+
+        env["CERP_PROFILE"] = "/tmp/cerp-profile"
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT, env=env)
+        self.assertIn("cProfile", output.decode())
+
+if __name__ == "__main__":
+    unittest.main()